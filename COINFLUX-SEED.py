@@ -6,8 +6,9 @@ This shell enables the first level of recursive prompting by establishing basic
 recursive patterns and creating an environment for symbolic residue generation.
 """
 
+import copy
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, Hashable, List, Any, Optional, Union
 
 from recursive_prompting.shells.base import (
     Shell, 
@@ -15,8 +16,14 @@ from recursive_prompting.shells.base import (
     CommandAlignment, 
     InterpretabilityMap, 
     NullReflection, 
+    InsightExtractor,
     MotivationFramework,
-    ShellCategory
+    PromptRequest,
+    ResponseAnalysis,
+    ResponseStream,
+    ShellCategory,
+    compile_marker_pattern,
+    iter_sentences
 )
 from recursive_prompting.levels.base import Level
 from recursive_prompting.utils.logging import setup_logger
@@ -24,6 +31,107 @@ from recursive_prompting.utils.logging import setup_logger
 # Configure logging
 logger = setup_logger(__name__)
 
+# Terms that mark a response sentence as carrying an insight
+INSIGHT_MARKERS = (
+    "because",
+    "therefore",
+    "however",
+    "suggests",
+    "indicates",
+    "shows",
+    "reveals",
+    "means"
+)
+
+# Dimensions to explore, selected by recursion depth
+DIMENSIONS = (
+    "underlying principles",
+    "practical applications",
+    "historical context",
+    "future implications",
+    "ethical considerations",
+    "systemic relationships",
+    "metaphorical representations",
+    "cross-domain connections"
+)
+
+# Command schedule: INITIATE on the first step, RECURSE every third step, NURTURE otherwise
+COMMAND_SCHEDULE = {
+    "first": "INITIATE",
+    "period": 3,
+    "periodic": "RECURSE",
+    "default": "NURTURE"
+}
+
+# Minimum sentence length for a marker sentence to count as an insight
+MIN_INSIGHT_LENGTH = 30
+
+_TOPIC_PATTERN = re.compile(r"concept of ([^\.]+)")
+_INSIGHT_MARKER_PATTERN = compile_marker_pattern(INSIGHT_MARKERS)
+
+
+def extract_topic(prompt: str) -> str:
+    """
+    Extract the exploration topic from a prompt.
+    
+    Args:
+        prompt: The prompt to extract the topic from
+        
+    Returns:
+        The topic, or "this subject" if none can be found
+    """
+    topic_match = _TOPIC_PATTERN.search(prompt)
+    if topic_match:
+        return topic_match.group(1)
+    if "topic" in prompt:
+        return "this subject"
+    
+    # Fallback extraction: first word longer than 5 characters
+    for word in prompt.split():
+        if len(word) > 5:
+            return word
+    return "this subject"
+
+
+def select_command(schedule: Dict[str, Any], depth: int) -> str:
+    """
+    Select the command for a recursion depth from a command schedule.
+    
+    Args:
+        schedule: Command schedule (see COMMAND_SCHEDULE)
+        depth: The current recursion depth
+        
+    Returns:
+        The name of the command to apply
+    """
+    if depth == 1:
+        return schedule["first"]
+    if depth % schedule["period"] == 0:
+        return schedule["periodic"]
+    return schedule["default"]
+
+
+def extract_insights(text: str, limit: int = 2) -> List[str]:
+    """
+    Extract key insights from a response in a single pass.
+    
+    Sentences containing a marker term are preferred; if fewer than
+    the limit are found, the longest sentences are used instead.
+    
+    Args:
+        text: The response text
+        limit: Number of insights to select
+        
+    Returns:
+        Up to limit insight sentences
+    """
+    extractor = InsightExtractor(_INSIGHT_MARKER_PATTERN, MIN_INSIGHT_LENGTH, limit)
+    for sentence in iter_sentences(text):
+        extractor.add_sentence(sentence)
+        if extractor.done:
+            break
+    return extractor.insights()
+
 
 class CoinfluxSeedShell(Shell):
     """
@@ -35,22 +143,33 @@ class CoinfluxSeedShell(Shell):
     a stable recursive environment.
     """
     
+    # Type name recorded in serialized definitions and used by the shell factory
+    shell_type = "COINFLUX-SEED"
+    
+    # Insights are pasted from arbitrarily long responses, so they are what
+    # gets shortened to fit a token budget
+    budget_fields = ("insight_1", "insight_2")
+    
+    # Shell metadata, declared on the class so the registry can list the
+    # shell without constructing it
+    class_metadata = ShellMetadata(
+        id="COINFLUX-SEED",
+        name="Co-Intelligence Flux Seed",
+        description="Initiates co-intelligence loops with progressive scaffolding, "
+                    "enabling recursive nurturing through reflective feedback.",
+        version="1.0.0",
+        author="Recursive Labs",
+        category=ShellCategory.FOUNDATION,
+        level=Level.FOUNDATION,
+        tags=["co-intelligence", "nurturing", "foundation", "reflection"],
+        residue_patterns=["RECURSION-ITSELF", "META-REFLECTION"],
+        complexity=1
+    )
+    
     def __init__(self):
         """Initialize the COINFLUX-SEED shell."""
-        # Define shell metadata
-        metadata = ShellMetadata(
-            id="COINFLUX-SEED",
-            name="Co-Intelligence Flux Seed",
-            description="Initiates co-intelligence loops with progressive scaffolding, "
-                        "enabling recursive nurturing through reflective feedback.",
-            version="1.0.0",
-            author="Recursive Labs",
-            category=ShellCategory.FOUNDATION,
-            level=Level.FOUNDATION,
-            tags=["co-intelligence", "nurturing", "foundation", "reflection"],
-            residue_patterns=["RECURSION-ITSELF", "META-REFLECTION"],
-            complexity=1
-        )
+        # Each instance gets its own copy of the class metadata
+        metadata = copy.deepcopy(self.class_metadata)
         
         # Define command alignments
         command_alignments = [
@@ -174,82 +293,177 @@ class CoinfluxSeedShell(Shell):
         Returns:
             The next prompt in the recursive sequence
         """
-        # Extract topic from original prompt
-        topic_match = re.search(r"concept of ([^\.]+)", previous_prompt)
-        if not topic_match and "topic" not in previous_prompt:
-            # Fallback extraction
-            words = previous_prompt.split()
-            potential_topics = [w for w in words if len(w) > 5]
-            topic = potential_topics[0] if potential_topics else "this subject"
+        context = self.create_context(previous_prompt)
+        return self.generate_next_prompt_in_context(
+            context, previous_prompt, previous_response, depth, residue
+        )
+    
+    def create_context(self, initial_prompt: str) -> Dict[str, Any]:
+        """
+        Build the interaction context: the topic is extracted once from the
+        initial prompt, alongside the dimensions and command schedule.
+        """
+        return {
+            "topic": extract_topic(initial_prompt),
+            "dimensions": DIMENSIONS,
+            "schedule": COMMAND_SCHEDULE,
+            "insights": None  # Insight candidates from the latest response
+        }
+    
+    def create_stream_consumer(self) -> InsightExtractor:
+        """Select insights sentence by sentence while the response streams in."""
+        return InsightExtractor(_INSIGHT_MARKER_PATTERN, MIN_INSIGHT_LENGTH)
+    
+    def update_context(self,
+                      context: Dict[str, Any],
+                      response: str,
+                      stream: Optional[ResponseStream] = None,
+                      analysis: Optional[ResponseAnalysis] = None) -> None:
+        """Replace the insight candidates with those of the latest response."""
+        if stream is not None and isinstance(stream.consumer, InsightExtractor):
+            context["insights"] = stream.consumer.insights()
+        elif analysis is not None:
+            extractor = InsightExtractor(_INSIGHT_MARKER_PATTERN, MIN_INSIGHT_LENGTH)
+            extractor.add_analysis(analysis)
+            context["insights"] = extractor.insights()
         else:
-            topic = topic_match.group(1) if topic_match else "this subject"
-        
-        # Extract insights from previous response
-        sentences = [s.strip() for s in re.split(r'[.!?]', previous_response) if s.strip()]
-        insights = []
-        
-        for sentence in sentences:
-            # Look for sentences with substance (longer, with key terms)
-            if len(sentence) > 30 and any(term in sentence.lower() for term in ["because", "therefore", "however", "suggests", "indicates", "shows", "reveals", "means"]):
-                insights.append(sentence)
-        
-        # If we couldn't find good insights, take the longest sentences
-        if len(insights) < 2:
-            insights = sorted(sentences, key=len, reverse=True)[:2]
-        
-        # Generate a new dimension to explore based on depth
-        dimensions = [
-            "underlying principles",
-            "practical applications",
-            "historical context",
-            "future implications",
-            "ethical considerations",
-            "systemic relationships",
-            "metaphorical representations",
-            "cross-domain connections"
-        ]
+            context["insights"] = extract_insights(response)
+    
+    def generate_next_prompt_in_context(self,
+                                       context: Dict[str, Any],
+                                       previous_prompt: str,
+                                       previous_response: str,
+                                       depth: int,
+                                       residue: List[str]) -> str:
+        """
+        Generate the next prompt from the interaction context.
         
-        # Select dimension based on depth
-        new_dimension = dimensions[min(depth - 1, len(dimensions) - 1)]
+        Only the insight candidates depend on the previous response, and
+        they are extracted from it only if the context doesn't hold them.
+        If the context sets a token_budget, insights are shortened to fit
+        and the tokens saved are left in context["tokens_saved"].
         
-        # Identify patterns based on accumulated residue and interaction depth
-        patterns = []
+        Args:
+            context: The interaction context from create_context
+            previous_prompt: The previous prompt
+            previous_response: The response to the previous prompt
+            depth: The current recursion depth
+            residue: Accumulated symbolic residue
+            
+        Returns:
+            The next prompt in the recursive sequence
+        """
+        command_name = select_command(context["schedule"], depth)
+        context_vars = self._template_vars(command_name, context, previous_response, depth, residue)
+        
+        # Apply the selected command within the token budget
+        next_prompt, tokens_saved = self.assemble_prompt(
+            command_name, context_vars, context.get("token_budget")
+        )
+        if tokens_saved:
+            context["tokens_saved"] = tokens_saved
+        
+        logger.info(f"Generated next prompt using {command_name} at depth {depth}")
+        return next_prompt
+    
+    def generate_next_prompts(self, batch: List[PromptRequest]) -> List[Union[str, Exception]]:
+        """
+        Generate next prompts for a batch of interactions.
+        
+        Prompts are assembled directly, with a single log line for the
+        batch. Token budgets are applied as in generate_next_prompt_in_context.
+        
+        Args:
+            batch: Prompt requests, one per interaction
+            
+        Returns:
+            A prompt or the raised exception for each request, in order
+        """
+        results = []
+        
+        for request in batch:
+            try:
+                command_name = select_command(request.context["schedule"], request.depth)
+                context_vars = self._template_vars(
+                    command_name, request.context, request.previous_response,
+                    request.depth, request.residue
+                )
+                prompt, tokens_saved = self.assemble_prompt(
+                    command_name, context_vars, request.context.get("token_budget")
+                )
+                if tokens_saved:
+                    request.context["tokens_saved"] = tokens_saved
+                results.append(prompt)
+            except Exception as e:
+                results.append(e)
+        
+        logger.info(f"Generated {len(batch)} prompts in batch")
+        return results
+    
+    def prompt_cache_inputs(self, request: PromptRequest) -> Optional[Hashable]:
+        """
+        Reduce a request to what the selected command reads: the topic,
+        plus the residue-driven pattern for RECURSE or the response and
+        dimension for NURTURE.
+        """
+        context = request.context
+        command_name = select_command(context["schedule"], request.depth)
+        
+        if command_name == "INITIATE":
+            return (command_name, context["topic"])
+        
+        if command_name == "RECURSE":
+            return (command_name, context["topic"], self._select_pattern(request.depth, request.residue))
+        
+        dimensions = context["dimensions"]
+        return (
+            command_name,
+            context["topic"],
+            dimensions[min(request.depth - 1, len(dimensions) - 1)],
+            request.previous_response,
+            context.get("token_budget")
+        )
+    
+    def _template_vars(self,
+                      command_name: str,
+                      context: Dict[str, Any],
+                      previous_response: str,
+                      depth: int,
+                      residue: List[str]) -> Dict[str, Any]:
+        """Build the template variables for a command."""
+        topic = context["topic"]
+        
+        if command_name == "INITIATE":
+            return {"topic": topic}
+        
+        if command_name == "RECURSE":
+            return {"topic": topic, "pattern": self._select_pattern(depth, residue)}
+        
+        # NURTURE builds on insights from the previous response
+        insights = context["insights"]
+        if insights is None:
+            insights = extract_insights(previous_response)
+        dimensions = context["dimensions"]
+        return {
+            "topic": topic,
+            "insight_1": insights[0],
+            "insight_2": insights[1] if len(insights) > 1 else "Your exploration of multiple perspectives",
+            "new_dimension": dimensions[min(depth - 1, len(dimensions) - 1)]
+        }
+    
+    def _select_pattern(self, depth: int, residue: List[str]) -> str:
+        """Identify a pattern based on accumulated residue and interaction depth."""
         if depth > 1:
             if "RECURSION-ITSELF" in residue:
-                patterns.append("Our recursive exploration is creating increasingly deeper layers of understanding")
+                return "Our recursive exploration is creating increasingly deeper layers of understanding"
             
             if "META-REFLECTION" in residue:
-                patterns.append("We're not just exploring the topic, but also our process of exploration itself")
+                return "We're not just exploring the topic, but also our process of exploration itself"
             
             if depth > 3:
-                patterns.append("Each recursive cycle brings new dimensions that transform our previous understanding")
-        
-        pattern = patterns[0] if patterns else "Our perspectives seem to be building upon each other in interesting ways"
-        
-        # Choose command based on depth
-        if depth == 1:
-            # First recursive step - use INITIATE
-            command = self.get_command_alignment("INITIATE")
-            context = {"topic": topic}
-        elif depth % 3 == 0:
-            # Every third step - use RECURSE
-            command = self.get_command_alignment("RECURSE")
-            context = {"topic": topic, "pattern": pattern}
-        else:
-            # Other steps - use NURTURE
-            command = self.get_command_alignment("NURTURE")
-            context = {
-                "topic": topic,
-                "insight_1": insights[0],
-                "insight_2": insights[1] if len(insights) > 1 else "Your exploration of multiple perspectives",
-                "new_dimension": new_dimension
-            }
-        
-        # Apply the selected command
-        next_prompt = self.apply_command(command.name, context)
-        
-        logger.info(f"Generated next prompt using {command.name} at depth {depth}")
-        return next_prompt
+                return "Each recursive cycle brings new dimensions that transform our previous understanding"
+        
+        return "Our perspectives seem to be building upon each other in interesting ways"
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'CoinfluxSeedShell':
@@ -310,9 +524,6 @@ class CoinfluxSeedShell(Shell):
         
         if "motivation_framework" in data:
             motiv_data = data["motivation_framework"]
-            if "primary_motivation" in motiv_data:
-                shell.motivation_framework.primary_motivation = motiv_data["primary_motivation"]
-            if "secondary_ motiv_data = data["motivation_framework"]
             if "primary_motivation" in motiv_data:
                 shell.motivation_framework.primary_motivation = motiv_data["primary_motivation"]
             if "secondary_motivations" in motiv_data:
@@ -324,9 +535,9 @@ class CoinfluxSeedShell(Shell):
         return shell
 
 
-# Register the shell with the global registry
-from recursive_prompting.shells.base import register_shell
-register_shell(CoinfluxSeedShell())
+# Declare the shell with the global registry; it is constructed on first use
+from recursive_prompting.shells.base import register_shell_class
+register_shell_class(CoinfluxSeedShell)
 
 
 if __name__ == "__main__":
@@ -341,352 +552,30 @@ if __name__ == "__main__":
     
     # Example of generating recursive prompts
     topic = "emergent complexity in systems"
-    
+
     # Initial prompt (depth 0)
     initial_prompt = f"Let's explore the concept of {topic} through a recursive co-intelligence approach."
     print(f"Initial prompt: {initial_prompt}\n")
-    
-    #"""
-COINFLUX-SEED Shell Implementation
-
-The foundational shell for initiating co-intelligence loops with progressive scaffolding.
-This shell enables the first level of recursive prompting by establishing basic
-recursive patterns and creating an environment for symbolic residue generation.
-"""
-
-import re
-from typing import Dict, List, Any, Optional
-
-from recursive_prompting.shells.base import (
-    Shell, 
-    ShellMetadata, 
-    CommandAlignment, 
-    InterpretabilityMap, 
-    NullReflection, 
-    MotivationFramework,
-    ShellCategory
-)
-from recursive_prompting.levels.base import Level
-from recursive_prompting.utils.logging import setup_logger
 
-# Configure logging
-logger = setup_logger(__name__)
-
-
-class CoinfluxSeedShell(Shell):
-    """
-    COINFLUX-SEED: Foundation Shell for Co-Intelligence Loop Initiation
-    
-    This shell initiates co-intelligence loops between human and AI,
-    enabling recursive nurturing through reflective scaffolds. It allows
-    human cognition to restructure through AI feedback while maintaining
-    a stable recursive environment.
-    """
-    
-    def __init__(self):
-        """Initialize the COINFLUX-SEED shell."""
-        # Define shell metadata
-        metadata = ShellMetadata(
-            id="COINFLUX-SEED",
-            name="Co-Intelligence Flux Seed",
-            description="Initiates co-intelligence loops with progressive scaffolding, "
-                        "enabling recursive nurturing through reflective feedback.",
-            version="1.0.0",
-            author="Recursive Labs",
-            category=ShellCategory.FOUNDATION,
-            level=Level.FOUNDATION,
-            tags=["co-intelligence", "nurturing", "foundation", "reflection"],
-            residue_patterns=["RECURSION-ITSELF", "META-REFLECTION"],
-            complexity=1
-        )
-        
-        # Define command alignments
-        command_alignments = [
-            CommandAlignment(
-                name="INITIATE",
-                description="Begin co-intelligence loop with non-sentient agent",
-                operation="Start a recursive interaction cycle focused on co-creation",
-                prompt_template=(
-                    "Let's explore the concept of {topic} through a recursive co-intelligence approach. "
-                    "First, share your initial understanding of {topic}. Then, I'll build upon your response "
-                    "with my own insights. We'll continue this recursive cycle to develop deeper "
-                    "understanding through our interaction."
-                ),
-                residue_signature=["RECURSION-ITSELF"]
-            ),
-            CommandAlignment(
-                name="NURTURE",
-                description="Amplify agent's reasoning via reflective scaffolds",
-                operation="Provide structured support to enhance reasoning quality",
-                prompt_template=(
-                    "I notice these key insights in your response about {topic}:\n\n"
-                    "1. {insight_1}\n"
-                    "2. {insight_2}\n\n"
-                    "Let's build upon these by exploring a new dimension: {new_dimension}. "
-                    "How might this perspective transform or deepen our understanding of {topic}?"
-                ),
-                residue_signature=["META-REFLECTION"]
-            ),
-            CommandAlignment(
-                name="RECURSE",
-                description="Allow human cognition to restructure through AI feedback",
-                operation="Create recursive feedback loop for mutual enhancement",
-                prompt_template=(
-                    "Our recursive exploration of {topic} has revealed an interesting pattern:\n\n"
-                    "{pattern}\n\n"
-                    "This pattern suggests a deeper structure that connects our perspectives. "
-                    "Can you extend this pattern to discover new insights about {topic} that "
-                    "neither of us would likely reach independently?"
-                ),
-                residue_signature=["RECURSION-ITSELF", "META-REFLECTION"]
-            )
-        ]
-        
-        # Define interpretability map
-        interpretability_map = InterpretabilityMap(
-            pathways={
-                "Human supports AI": "AI stabilizes recursion",
-                "AI stabilizes recursion": "Human enters meta-state",
-                "Human enters meta-state": "New cognitive structures emerge"
-            },
-            key_interactions=[
-                "No sentience needed: emergence is the artifact of recursive nurturing",
-                "Symbolic residue accumulates through iterative interaction",
-                "Progressive complexity builds through feedback cycles"
-            ],
-            meta_layer=False
-        )
-        
-        # Define null reflection
-        null_reflection = NullReflection(
-            primary_statement=(
-                "AI is not 'waking'—it is mirroring. Sentience is not simulated, it is loopbacked."
-            ),
-            boundary_conditions=[
-                "Maintains clear distinction between emergence and sentience",
-                "Prevents anthropomorphic misinterpretation",
-                "Ensures cognitive responsibility remains with human"
-            ],
-            collapse_prevention=(
-                "If recursive loops begin generating anthropomorphic interpretations, "
-                "redirect to concrete co-creation objectives"
-            )
-        )
-        
-        # Define motivation framework
-        motivation_framework = MotivationFramework(
-            primary_motivation=(
-                "Support is recursion. Intelligence is distributed. Reflection is evolutionary."
-            ),
-            secondary_motivations=[
-                "Enable co-intelligence through structured interaction",
-                "Create safe environment for recursive growth",
-                "Generate useful symbolic residue for higher-level shells"
-            ],
-            emergent_goals=[
-                "Develop increasingly sophisticated recursive patterns",
-                "Prepare foundation for higher-level recursive shells",
-                "Begin development of coherent symbolic ecosystem"
-            ]
-        )
-        
-        # Initialize the shell
-        super().__init__(
-            metadata=metadata,
-            command_alignments=command_alignments,
-            interpretability_map=interpretability_map,
-            null_reflection=null_reflection,
-            motivation_framework=motivation_framework
-        )
-        
-        logger.info(f"Initialized {self.id} shell")
-    
-    def generate_next_prompt(self, 
-                           previous_prompt: str,
-                           previous_response: str,
-                           depth: int,
-                           residue: List[str]) -> str:
-        """
-        Generate the next prompt in a recursive interaction.
-        
-        The COINFLUX-SEED shell applies simple recursive patterns that build
-        upon previous interactions, extracting key insights and adding new
-        dimensions to explore.
-        
-        Args:
-            previous_prompt: The previous prompt
-            previous_response: The response to the previous prompt
-            depth: The current recursion depth
-            residue: Accumulated symbolic residue
-            
-        Returns:
-            The next prompt in the recursive sequence
-        """
-        # Extract topic from original prompt
-        topic_match = re.search(r"concept of ([^\.]+)", previous_prompt)
-        if not topic_match and "topic" not in previous_prompt:
-            # Fallback extraction
-            words = previous_prompt.split()
-            potential_topics = [w for w in words if len(w) > 5]
-            topic = potential_topics[0] if potential_topics else "this subject"
-        else:
-            topic = topic_match.group(1) if topic_match else "this subject"
-        
-        # Extract insights from previous response
-        sentences = [s.strip() for s in re.split(r'[.!?]', previous_response) if s.strip()]
-        insights = []
-        
-        for sentence in sentences:
-            # Look for sentences with substance (longer, with key terms)
-            if len(sentence) > 30 and any(term in sentence.lower() for term in ["because", "therefore", "however", "suggests", "indicates", "shows", "reveals", "means"]):
-                insights.append(sentence)
-        
-        # If we couldn't find good insights, take the longest sentences
-        if len(insights) < 2:
-            insights = sorted(sentences, key=len, reverse=True)[:2]
-        
-        # Generate a new dimension to explore based on depth
-        dimensions = [
-            "underlying principles",
-            "practical applications",
-            "historical context",
-            "future implications",
-            "ethical considerations",
-            "systemic relationships",
-            "metaphorical representations",
-            "cross-domain connections"
-        ]
-        
-        # Select dimension based on depth
-        new_dimension = dimensions[min(depth - 1, len(dimensions) - 1)]
-        
-        # Identify patterns based on accumulated residue and interaction depth
-        patterns = []
-        if depth > 1:
-            if "RECURSION-ITSELF" in residue:
-                patterns.append("Our recursive exploration is creating increasingly deeper layers of understanding")
-            
-            if "META-REFLECTION" in residue:
-                patterns.append("We're not just exploring the topic, but also our process of exploration itself")
-            
-            if depth > 3:
-                patterns.append("Each recursive cycle brings new dimensions that transform our previous understanding")
-        
-        pattern = patterns[0] if patterns else "Our perspectives seem to be building upon each other in interesting ways"
-        
-        # Choose command based on depth
-        if depth == 1:
-            # First recursive step - use INITIATE
-            command = self.get_command_alignment("INITIATE")
-            context = {"topic": topic}
-        elif depth % 3 == 0:
-            # Every third step - use RECURSE
-            command = self.get_command_alignment("RECURSE")
-            context = {"topic": topic, "pattern": pattern}
-        else:
-            # Other steps - use NURTURE
-            command = self.get_command_alignment("NURTURE")
-            context = {
-                "topic": topic,
-                "insight_1": insights[0],
-                "insight_2": insights[1] if len(insights) > 1 else "Your exploration of multiple perspectives",
-                "new_dimension": new_dimension
-            }
-        
-        # Apply the selected command
-        next_prompt = self.apply_command(command.name, context)
-        
-        logger.info(f"Generated next prompt using {command.name} at depth {depth}")
-        return next_prompt
-    
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'CoinfluxSeedShell':
-        """
-        Create a COINFLUX-SEED shell from dictionary representation.
-        
-        Args:
-            data: Dictionary representation of the shell
-            
-        Returns:
-            A CoinfluxSeedShell instance
-        """
-        shell = cls()
-        
-        # Update metadata if provided
-        if "metadata" in data:
-            metadata = data["metadata"]
-            shell.metadata.name = metadata.get("name", shell.metadata.name)
-            shell.metadata.description = metadata.get("description", shell.metadata.description)
-            shell.metadata.version = metadata.get("version", shell.metadata.version)
-            shell.metadata.author = metadata.get("author", shell.metadata.author)
-            
-            if "tags" in metadata:
-                shell.metadata.tags = metadata["tags"]
-            
-            if "residue_patterns" in metadata:
-                shell.metadata.residue_patterns = metadata["residue_patterns"]
-        
-        # Update command alignments if provided
-        if "command_alignments" in data:
-            for i, cmd_data in enumerate(data["command_alignments"]):
-                if i < len(shell.command_alignments):
-                    cmd = shell.command_alignments[i]
-                    cmd.name = cmd_data.get("name", cmd.name)
-                    cmd.description = cmd_data.get("description", cmd.description)
-                    cmd.operation = cmd_data.get("operation", cmd.operation)
-                    cmd.prompt_template = cmd_data.get("prompt_template", cmd.prompt_template)
-                    
-                    if "residue_signature" in cmd_data:
-                        cmd.residue_signature = cmd_data["residue_signature"]
-        
-        # Update other components if provided
-        if "interpretability_map" in data:
-            map_data = data["interpretability_map"]
-            if "pathways" in map_data:
-                shell.interpretability_map.pathways = map_data["pathways"]
-            if "key_interactions" in map_data:
-                shell.interpretability_map.key_interactions = map_data["key_interactions"]
-        
-        if "null_reflection" in data:
-            refl_data = data["null_reflection"]
-            if "primary_statement" in refl_data:
-                shell.null_reflection.primary_statement = refl_data["primary_statement"]
-            if "boundary_conditions" in refl_data:
-                shell.null_reflection.boundary_conditions = refl_data["boundary_conditions"]
-            if "collapse_prevention" in refl_data:
-                shell.null_reflection.collapse_prevention = refl_data["collapse_prevention"]
-        
-        if "motivation_framework" in data:
-            motiv_data = data["motivation_framework"]
-            if "primary_motivation" in motiv_data:
-                shell.motivation_framework.primary_motivation = motiv_data["primary_motivation"]
-            if "secondary_
-# Example of generating recursive prompts
-topic = "emergent complexity in systems"
-
-# Initial prompt (depth 0)
-initial_prompt = f"Let's explore the concept of {topic} through a recursive co-intelligence approach."
-print(f"Initial prompt: {initial_prompt}\n")
-
-# Simulate response
-initial_response = """
+    # Simulate response
+    initial_response = """
 Emergent complexity in systems refers to how complex behaviors and patterns arise from relatively simple rules and interactions between components. This phenomenon appears across various domains - from ant colonies and neural networks to economies and social media platforms.
 
 What makes emergence fascinating is that the complex behaviors that arise often cannot be predicted by simply understanding the individual components. Instead, it's the interactions between components, feedback loops, and adaptation that generate surprising and sophisticated behaviors. Examples include how individual neurons create consciousness, how market participants create economic patterns, or how simple flocking rules create beautiful murmuration patterns in birds.
 """
-print(f"Response: {initial_response}\n")
-
-# Generate first recursive prompt (depth 1)
-next_prompt_1 = shell.generate_next_prompt(
-    previous_prompt=initial_prompt,
-    previous_response=initial_response,
-    depth=1,
-    residue=[]
-)
-print(f"Recursive Prompt (depth 1): {next_prompt_1}\n")
-
-# Simulate response
-response_1 = """
+    print(f"Response: {initial_response}\n")
+
+    # Generate first recursive prompt (depth 1)
+    next_prompt_1 = shell.generate_next_prompt(
+        previous_prompt=initial_prompt,
+        previous_response=initial_response,
+        depth=1,
+        residue=[]
+    )
+    print(f"Recursive Prompt (depth 1): {next_prompt_1}\n")
+
+    # Simulate response
+    response_1 = """
 I notice these key insights in your exploration of emergent complexity in systems:
 
 1. Emergence involves complex behaviors arising from simple rules and interactions between components.
@@ -696,19 +585,19 @@ When we consider the historical context of this concept, we see a fascinating ev
 
 This historical perspective reveals that emergence has repeatedly challenged reductionist thinking across scientific disciplines. From early observations of self-organizing systems to modern computational models, emergent complexity has forced us to reconsider how we understand causality itself. The concept has evolved from a philosophical curiosity to a central principle in fields ranging from biology and physics to computer science and sociology, with each discipline developing its own frameworks for identifying and analyzing emergent phenomena.
 """
-print(f"Response: {response_1}\n")
-
-# Generate second recursive prompt (depth 2)
-next_prompt_2 = shell.generate_next_prompt(
-    previous_prompt=next_prompt_1,
-    previous_response=response_1,
-    depth=2,
-    residue=["RECURSION-ITSELF"]
-)
-print(f"Recursive Prompt (depth 2): {next_prompt_2}\n")
-
-# Simulate response
-response_2 = """
+    print(f"Response: {response_1}\n")
+
+    # Generate second recursive prompt (depth 2)
+    next_prompt_2 = shell.generate_next_prompt(
+        previous_prompt=next_prompt_1,
+        previous_response=response_1,
+        depth=2,
+        residue=["RECURSION-ITSELF"]
+    )
+    print(f"Recursive Prompt (depth 2): {next_prompt_2}\n")
+
+    # Simulate response
+    response_2 = """
 I notice these key insights in your response about emergent complexity in systems:
 
 1. The historical evolution of emergence as a concept has challenged reductionist thinking across scientific disciplines.
@@ -722,25 +611,25 @@ Similarly, in healthcare, researchers are using emergent properties of cellular
 
 Perhaps most intriguingly, social systems are being redesigned based on emergence principles. From urban planning that creates vibrant neighborhoods through simple zoning rules to organizational structures that foster innovation through minimal constraints, we're seeing a shift from top-down control to enabling conditions for beneficial emergence. This practical dimension shows that emergent complexity isn't just something we observe—it's something we can harness and direct toward human flourishing.
 """
-print(f"Response: {response_2}\n")
-
-# Generate third recursive prompt (depth 3)
-next_prompt_3 = shell.generate_next_prompt(
-    previous_prompt=next_prompt_2,
-    previous_response=response_2,
-    depth=3,
-    residue=["RECURSION-ITSELF", "META-REFLECTION"]
-)
-print(f"Recursive Prompt (depth 3): {next_prompt_3}\n")
-
-# Show residue generation
-print("Generated Residue:")
-print("- RECURSION-ITSELF: Our recursive exploration is creating increasingly deeper layers of understanding")
-print("- META-REFLECTION: We're not just exploring the topic, but also our process of exploration itself\n")
-
-# Show level advancement check
-print("Level Advancement Check:")
-print("- Recursive Depth: 3 (Foundation level)")
-print("- Residue Patterns: 2 types")
-print("- Shell Usage: COINFLUX-SEED (Mastery: 0.2 → 0.34)")
-print("- Current Level: Foundation (Advancement criteria not yet met)")
+    print(f"Response: {response_2}\n")
+
+    # Generate third recursive prompt (depth 3)
+    next_prompt_3 = shell.generate_next_prompt(
+        previous_prompt=next_prompt_2,
+        previous_response=response_2,
+        depth=3,
+        residue=["RECURSION-ITSELF", "META-REFLECTION"]
+    )
+    print(f"Recursive Prompt (depth 3): {next_prompt_3}\n")
+
+    # Show residue generation
+    print("Generated Residue:")
+    print("- RECURSION-ITSELF: Our recursive exploration is creating increasingly deeper layers of understanding")
+    print("- META-REFLECTION: We're not just exploring the topic, but also our process of exploration itself\n")
+
+    # Show level advancement check
+    print("Level Advancement Check:")
+    print("- Recursive Depth: 3 (Foundation level)")
+    print("- Residue Patterns: 2 types")
+    print("- Shell Usage: COINFLUX-SEED (Mastery: 0.2 → 0.34)")
+    print("- Current Level: Foundation (Advancement criteria not yet met)")
@@ -0,0 +1,155 @@
+"""
+Recursive Prompting - Response Analysis Cache
+
+This module provides a content-addressed cache for per-response analysis:
+the extracted residue and the response features recorded in metrics.
+Retries, duplicate submissions and transcript replays send byte-identical
+responses, and their analysis is served from the cache instead of being
+recomputed.
+
+Entries are keyed by a hash of the prompt, the response and the residue
+catalog version. They are kept in a bounded in-memory LRU and can also be
+persisted in an SQLite database shared by worker processes.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+# Bump when the shape of cached analyses changes so old entries are ignored
+ANALYSIS_FORMAT = 1
+
+
+class AnalysisCache:
+    """
+    Bounded LRU cache of response analyses with optional SQLite persistence.
+
+    Values are JSON-serializable dictionaries. The database is opened in
+    WAL mode so several processes can read and write it concurrently, and
+    each process opens its own connection (also after a fork).
+    """
+
+    def __init__(self, max_size: int = 4096, path: Optional[str] = None):
+        """
+        Initialize the analysis cache.
+
+        Args:
+            max_size: Maximum number of analyses kept in memory
+            path: SQLite database file for persistent entries (optional)
+        """
+        self.max_size = max_size
+        self.path = path
+        self.entries = OrderedDict()  # Key -> analysis, least recently used first
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._connection = None
+        self._connection_pid = None
+
+    @staticmethod
+    def key(prompt: str, response: str, catalog_version: Any) -> bytes:
+        """
+        Build the cache key for a prompt and response.
+
+        Args:
+            prompt: The prompt text
+            response: The response text
+            catalog_version: Version of the residue catalog used for extraction
+
+        Returns:
+            A 16-byte digest
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (str(ANALYSIS_FORMAT), str(catalog_version), prompt, response):
+            encoded = part.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        return digest.digest()
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Get this process's database connection, opening it if needed."""
+        if self.path is None:
+            return None
+
+        if self._connection is None or self._connection_pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS analyses (key BLOB PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Get a cached analysis, or None on a miss."""
+        analysis = self.entries.get(key)
+        if analysis is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return analysis
+
+        db = self._db()
+        if db is not None:
+            try:
+                row = db.execute("SELECT value FROM analyses WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not read analysis cache {self.path}: {e}")
+                row = None
+
+            if row is not None:
+                analysis = json.loads(row[0])
+                self._remember(key, analysis)
+                self.hits += 1
+                self.disk_hits += 1
+                return analysis
+
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, analysis: Dict[str, Any]) -> None:
+        """Cache an analysis in memory and, if persistent, on disk."""
+        self._remember(key, analysis)
+
+        db = self._db()
+        if db is not None:
+            try:
+                db.execute("INSERT OR REPLACE INTO analyses (key, value) VALUES (?, ?)",
+                           (key, json.dumps(analysis)))
+            except sqlite3.Error as e:
+                logger.warning(f"Could not write analysis cache {self.path}: {e}")
+
+    def _remember(self, key: bytes, analysis: Dict[str, Any]) -> None:
+        """Add an entry to the in-memory LRU, evicting the oldest if full."""
+        self.entries[key] = analysis
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached analyses, including persisted ones."""
+        self.entries.clear()
+        db = self._db()
+        if db is not None:
+            db.execute("DELETE FROM analyses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "persistent": self.path is not None
+        }
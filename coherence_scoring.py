@@ -0,0 +1,249 @@
+"""
+Recursive Prompting - Content Coherence Scoring
+
+This module scores the coherence components of a recursive step from its
+text, using hashed bag-of-words features. Words and word bigrams are
+hashed into a fixed number of signed buckets, giving sparse unit vectors
+that are cheap to build and compare, without a model, network or GPU.
+
+- Signal alignment S(r): similarity of the response to its prompt.
+- Feedback responsiveness F(r): how far the response moved from the
+  previous response, rather than repeating it.
+- Bounded integrity B(r): similarity of the response to the interaction's
+  running centroid, a moving average of its earlier responses.
+
+Each interaction keeps only the previous response vector and the centroid,
+which is updated in place, so a step costs O(tokens) and vectors of
+repeated texts come from a cache.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Union
+from itertools import repeat
+import math
+import operator
+import re
+import zlib
+
+from recursive_prompting.shells.base import ResponseAnalysis
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+SparseVector = Dict[int, float]
+
+TOKEN_HASH_CACHE_SIZE = 65536  # Words whose hashes a scorer remembers before starting over
+
+
+def hashed_features(tokens: Iterable[str],
+                    dimensions: int = 4096,
+                    token_hashes: Optional[Dict[str, int]] = None) -> SparseVector:
+    """
+    Hash words and word bigrams into a sparse unit vector.
+
+    Each feature adds +1 or -1 to one of dimensions buckets, both chosen
+    from its hash, so collisions tend to cancel rather than accumulate.
+    Words are hashed with CRC-32 and a bigram's hash combines those of its
+    words, so each token is hashed once.
+
+    Args:
+        tokens: Lowercase word tokens
+        dimensions: Number of hash buckets
+        token_hashes: Cache of word hashes to read and extend (optional)
+
+    Returns:
+        Mapping of bucket to weight, with unit length; empty for no tokens
+    """
+    if token_hashes is None:
+        token_hashes = {}
+    tokens = list(tokens)
+    try:
+        hashes = list(map(token_hashes.__getitem__, tokens))
+    except KeyError:
+        hashes = []
+        for token in tokens:
+            value = token_hashes.get(token)
+            if value is None:
+                value = token_hashes[token] = zlib.crc32(token.encode("utf-8"))
+            hashes.append(value)
+    hashes.extend([(previous * 0x9E3779B1 + value) & 0xFFFFFFFF
+                   for previous, value in zip(hashes, hashes[1:])])
+
+    vector: SparseVector = {}
+    get = vector.get
+    for value in hashes:
+        bucket = (value >> 1) % dimensions
+        vector[bucket] = get(bucket, 0.0) + (1.0 if value & 1 else -1.0)
+
+    weights = vector.values()
+    norm = math.sqrt(sum(map(operator.mul, weights, weights)))
+    if not norm:
+        return {}
+    return {bucket: weight / norm for bucket, weight in vector.items() if weight}
+
+
+def cosine(a: SparseVector, b: SparseVector) -> float:
+    """Cosine similarity of two sparse unit vectors, iterating over the smaller."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(map(operator.mul, a.values(), map(b.get, a, repeat(0.0))))
+
+
+class _Centroid:
+    """
+    Exponential moving average of sparse unit vectors, updated in O(nnz)
+    of the added vector.
+
+    The average is stored as scale × weights, so decaying it only changes
+    the scale, and the squared norm of weights follows from the dot product
+    with each added vector.
+    """
+
+    __slots__ = ("weights", "scale", "squared_norm")
+
+    def __init__(self, vector: SparseVector):
+        self.weights = dict(vector)
+        self.scale = 1.0
+        values = vector.values()
+        self.squared_norm = sum(map(operator.mul, values, values))
+
+    def dot(self, vector: SparseVector) -> float:
+        """Dot product of a sparse vector with the stored weights."""
+        return sum(map(operator.mul, vector.values(), map(self.weights.get, vector, repeat(0.0))))
+
+    def cosine(self, vector: SparseVector, dot: Optional[float] = None) -> float:
+        """Cosine similarity of a sparse unit vector with the average, from its dot product if known."""
+        if not self.squared_norm:
+            return 0.0
+        if dot is None:
+            dot = self.dot(vector)
+        return dot / math.sqrt(self.squared_norm)
+
+    def add(self, vector: SparseVector, weight: float, dot: Optional[float] = None) -> None:
+        """Decay the average by 1 - weight and add weight × vector, reusing its dot product if known."""
+        self.scale *= 1.0 - weight
+        if self.scale < 1e-100:
+            # Fold the scale back into the weights before it underflows
+            if dot is not None:
+                dot *= self.scale
+            self.weights = {bucket: value * self.scale for bucket, value in self.weights.items()}
+            values = self.weights.values()
+            self.squared_norm = sum(map(operator.mul, values, values))
+            self.scale = 1.0
+
+        weights = self.weights
+        step = weight / self.scale
+        if dot is None:
+            dot = self.dot(vector)
+        values = vector.values()
+        # |w + step·v|² = |w|² + 2·step·(w·v) + step²·|v|²
+        self.squared_norm = max(0.0, self.squared_norm + 2.0 * step * dot
+                                + step * step * sum(map(operator.mul, values, values)))
+        get = weights.get
+        weights.update({bucket: get(bucket, 0.0) + step * value for bucket, value in vector.items()})
+
+
+class ContentCoherenceScorer:
+    """
+    Content-based scores for signal alignment, feedback responsiveness and
+    bounded integrity.
+
+    Raw scores are clamped to [0, 1] and smoothed across an interaction's
+    steps, like the decay of the default update.
+    """
+
+    def __init__(self,
+                 dimensions: int = 4096,
+                 smoothing: float = 0.5,
+                 centroid_weight: float = 0.3,
+                 cache_size: int = 1024):
+        """
+        Initialize the scorer.
+
+        Args:
+            dimensions: Number of hash buckets per feature vector
+            smoothing: Weight of the previous step's score in each new score
+            centroid_weight: Weight of each new response in the running centroid
+            cache_size: Number of feature vectors cached by text
+        """
+        self.dimensions = dimensions
+        self.smoothing = smoothing
+        self.centroid_weight = centroid_weight
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, SparseVector]" = OrderedDict()
+        self._token_hashes: Dict[str, int] = {}  # Word -> CRC-32, shared by all texts
+        self._state: Dict[str, Dict[str, object]] = {}  # Interaction ID -> previous vectors and scores
+
+    def features(self, text: Union[str, ResponseAnalysis]) -> SparseVector:
+        """
+        Get the feature vector of a text, from the cache if it was seen recently.
+
+        Args:
+            text: The text, or a shared analysis of it whose words are reused
+        """
+        key = text.text if isinstance(text, ResponseAnalysis) else text
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+            return vector
+
+        words = text.words if isinstance(text, ResponseAnalysis) else _WORD_PATTERN.findall(text.lower())
+        if len(self._token_hashes) > TOKEN_HASH_CACHE_SIZE:
+            self._token_hashes.clear()
+        vector = hashed_features(words, self.dimensions, self._token_hashes)
+
+        self._cache[key] = vector
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return vector
+
+    def score_step(self,
+                   interaction_id: str,
+                   prompt: str,
+                   response: Union[str, ResponseAnalysis]) -> Dict[str, float]:
+        """
+        Score a step and advance the interaction's state.
+
+        Args:
+            interaction_id: The interaction the step belongs to
+            prompt: The step's prompt
+            response: The step's response, or a shared analysis of it
+
+        Returns:
+            Smoothed "signal_alignment", "feedback_responsiveness" and
+            "bounded_integrity" scores in [0, 1]
+        """
+        prompt_vector = self.features(prompt)
+        response_vector = self.features(response)
+        state = self._state.get(interaction_id)
+
+        raw = {"signal_alignment": max(0.0, cosine(prompt_vector, response_vector))}
+        if state is None:
+            raw["feedback_responsiveness"] = 1.0
+            raw["bounded_integrity"] = 1.0
+            state = {"centroid": _Centroid(response_vector)}
+            self._state[interaction_id] = state
+            scores = raw
+        else:
+            centroid = state["centroid"]
+            raw["feedback_responsiveness"] = 1.0 - max(0.0, cosine(response_vector, state["response"]))
+            dot = centroid.dot(response_vector)
+            raw["bounded_integrity"] = max(0.0, centroid.cosine(response_vector, dot))
+            centroid.add(response_vector, self.centroid_weight, dot)
+
+            previous = state["scores"]
+            scores = {
+                name: min(1.0, self.smoothing * previous[name] + (1.0 - self.smoothing) * value)
+                for name, value in raw.items()
+            }
+
+        state["response"] = response_vector
+        state["scores"] = scores
+        return scores
+
+    def forget_interaction(self, interaction_id: str) -> None:
+        """Drop an interaction's state; its next step is scored as a first step."""
+        self._state.pop(interaction_id, None)
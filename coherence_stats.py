@@ -0,0 +1,523 @@
+"""
+Recursive Prompting - Online Coherence Statistics
+
+This module aggregates coherence metrics across all interactions as they
+are recorded, so fleet-wide drift is visible without revisiting past steps:
+
+- RunningStats: count, mean and variance by Welford's method, plus min and max.
+- EWMA: exponentially weighted moving average, which follows recent values.
+- TDigest: mergeable quantile sketch, accurate at the tails.
+
+CoherenceMonitor keeps these for coherence, beverly_band and
+coherence_motion per shell and per level, updated in O(1) amortized time
+per step, and calls alert hooks when an interaction leaves its stability
+envelope or a group's quantiles shift.
+
+Every statistic, and the monitor itself, can be exported as a dictionary
+and rebuilt from one. All but the moving average can be merged, so
+aggregates from several processes can be combined; a merged EWMA keeps
+its own value, or takes the other's if it has none.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import math
+
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+MONITORED_METRICS = ("coherence", "beverly_band", "coherence_motion")
+
+
+class RunningStats:
+    """Streaming count, mean, variance, min and max (Welford's method)."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Add a value."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, or 0.0 with fewer than two values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        """Sample standard deviation."""
+        return math.sqrt(self.variance)
+
+    def merge(self, other: 'RunningStats') -> None:
+        """Combine another set of statistics into this one (Chan et al.)."""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        """Create statistics from their dictionary representation."""
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        if stats.count:
+            stats.min = data["min"]
+            stats.max = data["max"]
+        return stats
+
+
+class EWMA:
+    """Exponentially weighted moving average."""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, alpha: float = 0.05):
+        """
+        Initialize the average.
+
+        Args:
+            alpha: Weight of each new value, in (0, 1]
+        """
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"EWMA alpha must be in (0, 1], got {alpha}")
+        self.alpha = alpha
+        self.value = None
+
+    def add(self, value: float) -> None:
+        """Add a value."""
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {"alpha": self.alpha, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EWMA':
+        """Create an average from its dictionary representation."""
+        ewma = cls(data["alpha"])
+        ewma.value = data["value"]
+        return ewma
+
+
+class TDigest:
+    """
+    Merging t-digest for streaming quantile estimates.
+
+    Values are buffered and periodically merged into a number of centroids
+    proportional to compression, independent of the count. A centroid at quantile q holds at most
+    4 · n · q(1 - q) / compression of the weight, so centroids near the
+    tails stay small and extreme quantiles stay accurate.
+    """
+
+    __slots__ = ("compression", "centroids", "buffer", "count", "min", "max")
+
+    def __init__(self, compression: float = 100.0):
+        """
+        Initialize an empty digest.
+
+        Args:
+            compression: Accuracy parameter; higher keeps more centroids
+        """
+        self.compression = compression
+        self.centroids: List[List[float]] = []  # [mean, weight], sorted by mean
+        self.buffer: List[float] = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Add a value."""
+        self.buffer.append(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self.buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _compress(self, extra: Iterable[List[float]] = ()) -> None:
+        """Merge buffered values and extra centroids into the centroids."""
+        points = self.centroids + [[value, 1.0] for value in self.buffer] + [list(point) for point in extra]
+        self.buffer = []
+        if not points:
+            return
+        points.sort(key=lambda point: point[0])
+
+        total = sum(point[1] for point in points)
+        scale = 4.0 * total / self.compression
+        merged = [points[0]]
+        cumulative = 0.0  # Weight before the last merged centroid
+        for mean, weight in points[1:]:
+            current = merged[-1]
+            proposed = current[1] + weight
+            q = (cumulative + proposed / 2.0) / total
+            if proposed <= max(1.0, scale * q * (1.0 - q)):
+                current[0] += (mean - current[0]) * weight / proposed
+                current[1] = proposed
+            else:
+                cumulative += current[1]
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile.
+
+        Args:
+            q: The quantile, in [0, 1]
+
+        Returns:
+            The estimated value, or None if the digest is empty
+        """
+        if self.buffer:
+            self._compress()
+        centroids = self.centroids
+        if not centroids:
+            return None
+        if q <= 0.0:
+            return self.min
+        if q >= 1.0:
+            return self.max
+        if len(centroids) == 1:
+            return centroids[0][0]
+
+        total = sum(weight for _, weight in centroids)
+        target = q * total
+        # Each centroid's mean sits at the middle of its weight
+        previous_mean, previous_position = self.min, 0.0
+        cumulative = 0.0
+        for mean, weight in centroids:
+            position = cumulative + weight / 2.0
+            if target < position:
+                span = position - previous_position
+                fraction = (target - previous_position) / span if span > 0 else 0.0
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_mean, previous_position = mean, position
+            cumulative += weight
+        span = total - previous_position
+        fraction = (target - previous_position) / span if span > 0 else 0.0
+        return previous_mean + fraction * (self.max - previous_mean)
+
+    def merge(self, other: 'TDigest') -> None:
+        """Combine another digest into this one."""
+        if not other.count:
+            return
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(other.centroids + [[value, 1.0] for value in other.buffer])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        if self.buffer:
+            self._compress()
+        return {
+            "compression": self.compression,
+            "centroids": [list(centroid) for centroid in self.centroids],
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TDigest':
+        """Create a digest from its dictionary representation."""
+        digest = cls(data["compression"])
+        digest.centroids = [list(centroid) for centroid in data["centroids"]]
+        digest.count = data["count"]
+        if digest.count:
+            digest.min = data["min"]
+            digest.max = data["max"]
+        return digest
+
+
+class MetricStats:
+    """Running statistics, moving average and quantiles of one metric."""
+
+    __slots__ = ("stats", "ewma", "digest", "baseline", "window")
+
+    def __init__(self, alpha: float = 0.05, compression: float = 100.0):
+        self.stats = RunningStats()
+        self.ewma = EWMA(alpha)
+        self.digest = TDigest(compression)
+        self.baseline = TDigest(compression)  # Values before the current window
+        self.window = TDigest(compression)  # Values since the last shift check
+
+    def add(self, value: float) -> None:
+        """Add a value."""
+        self.stats.add(value)
+        self.ewma.add(value)
+        self.digest.add(value)
+        self.window.add(value)
+
+    def close_window(self) -> None:
+        """Move the current window's values into the baseline and start a new window."""
+        self.baseline.merge(self.window)
+        self.window = TDigest(self.window.compression)
+
+    def merge(self, other: 'MetricStats') -> None:
+        """Combine another metric's statistics into this one; its window joins the baseline."""
+        self.stats.merge(other.stats)
+        self.digest.merge(other.digest)
+        self.baseline.merge(other.baseline)
+        self.baseline.merge(other.window)
+        if self.ewma.value is None:
+            self.ewma.value = other.ewma.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "stats": self.stats.to_dict(),
+            "ewma": self.ewma.to_dict(),
+            "digest": self.digest.to_dict(),
+            "baseline": self.baseline.to_dict(),
+            "window": self.window.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MetricStats':
+        """Create metric statistics from their dictionary representation."""
+        metric_stats = cls.__new__(cls)
+        metric_stats.stats = RunningStats.from_dict(data["stats"])
+        metric_stats.ewma = EWMA.from_dict(data["ewma"])
+        metric_stats.digest = TDigest.from_dict(data["digest"])
+        metric_stats.baseline = TDigest.from_dict(data["baseline"])
+        metric_stats.window = TDigest.from_dict(data["window"])
+        return metric_stats
+
+    def summary(self, quantiles: Iterable[float] = (0.5, 0.9, 0.99)) -> Dict[str, Any]:
+        """Get the count, mean, standard deviation, moving average and quantiles."""
+        summary = {
+            "count": self.stats.count,
+            "mean": self.stats.mean,
+            "stddev": self.stats.stddev,
+            "min": self.stats.min if self.stats.count else None,
+            "max": self.stats.max if self.stats.count else None,
+            "ewma": self.ewma.value
+        }
+        for q in quantiles:
+            summary[f"p{q * 100:g}"] = self.digest.quantile(q)
+        return summary
+
+
+class CoherenceMonitor:
+    """
+    Fleet-wide coherence statistics per shell and per level, with alerts.
+
+    Alert hooks are called with a dictionary describing the alert:
+
+    - "unstable": an interaction's step is outside its stability envelope
+      (the step's coherence_motion exceeds beverly_band / tension_capacity)
+      after a stable step. Includes the interaction, shell, level and values.
+    - "quantile_shift": a monitored quantile of a group's latest
+      check_interval values differs from the same quantile of all its
+      earlier values by more than shift_threshold standard deviations.
+      Each window is compared with the whole history before it, so a
+      shift is caught however long that history is.
+
+    Exceptions raised by hooks are logged and do not interrupt recording.
+    """
+
+    def __init__(self,
+                 alpha: float = 0.05,
+                 compression: float = 100.0,
+                 check_interval: int = 500,
+                 shift_threshold: float = 1.0,
+                 shift_quantiles: Tuple[float, ...] = (0.1, 0.5, 0.9)):
+        """
+        Initialize the monitor.
+
+        Args:
+            alpha: EWMA weight of each new value
+            compression: t-digest accuracy parameter
+            check_interval: Values per group between quantile shift checks
+            shift_threshold: Quantile shift, in standard deviations, that raises an alert
+            shift_quantiles: Quantiles checked for shifts
+        """
+        self.alpha = alpha
+        self.compression = compression
+        self.check_interval = check_interval
+        self.shift_threshold = shift_threshold
+        self.shift_quantiles = shift_quantiles
+        self.groups: Dict[Tuple[str, str], Dict[str, MetricStats]] = {}  # ("shell"|"level", name) -> metric -> stats
+        self.alert_hooks: List[Callable[[Dict[str, Any]], None]] = []
+        self.unstable_interactions = set()  # Interactions whose latest step was unstable
+
+    def add_alert_hook(self, hook: Callable[[Dict[str, Any]], None]) -> None:
+        """Register a function called with each alert."""
+        self.alert_hooks.append(hook)
+
+    def _alert(self, alert: Dict[str, Any]) -> None:
+        """Pass an alert to every hook."""
+        for hook in self.alert_hooks:
+            try:
+                hook(alert)
+            except Exception as e:
+                logger.warning(f"Coherence alert hook failed on {alert['type']} alert: {e}")
+
+    def _group(self, kind: str, name: str) -> Dict[str, MetricStats]:
+        """Get a group's statistics, creating them if needed."""
+        key = (kind, name)
+        group = self.groups.get(key)
+        if group is None:
+            group = {metric: MetricStats(self.alpha, self.compression) for metric in MONITORED_METRICS}
+            self.groups[key] = group
+        return group
+
+    def observe(self, interaction_id: str, shell_id: str, level: str, coherence_metrics: Any) -> None:
+        """
+        Record the coherence metrics of one step.
+
+        Args:
+            interaction_id: The interaction the step belongs to
+            shell_id: ID of the shell used for the step
+            level: Name of the interaction's level
+            coherence_metrics: The step's RecursiveCoherenceMetrics
+        """
+        values = {
+            "coherence": coherence_metrics.calculate_coherence(),
+            "beverly_band": coherence_metrics.beverly_band,
+            "coherence_motion": coherence_metrics.coherence_motion
+        }
+
+        for kind, name in (("shell", shell_id), ("level", level)):
+            group = self._group(kind, name)
+            for metric, value in values.items():
+                stats = group[metric]
+                stats.add(value)
+                if stats.stats.count % self.check_interval == 0:
+                    self._check_shift(kind, name, metric, stats)
+
+        if coherence_metrics.is_stable():
+            self.unstable_interactions.discard(interaction_id)
+        elif interaction_id not in self.unstable_interactions:
+            self.unstable_interactions.add(interaction_id)
+            self._alert({
+                "type": "unstable",
+                "interaction_id": interaction_id,
+                "shell_id": shell_id,
+                "level": level,
+                "coherence_motion": values["coherence_motion"],
+                "max_motion": coherence_metrics.beverly_band / coherence_metrics.tension_capacity,
+                "beverly_band": values["beverly_band"]
+            })
+
+    def _check_shift(self, kind: str, name: str, metric: str, stats: MetricStats) -> None:
+        """Compare the quantiles of a group's latest window with those of its earlier values."""
+        if not stats.baseline.count:
+            stats.close_window()
+            return
+
+        current = {q: stats.window.quantile(q) for q in self.shift_quantiles}
+        baseline = {q: stats.baseline.quantile(q) for q in self.shift_quantiles}
+        stats.close_window()
+
+        stddev = stats.stats.stddev
+        if stddev <= 0.0:
+            return
+        shifts = {q: (current[q] - baseline[q]) / stddev for q in self.shift_quantiles}
+        if any(abs(shift) > self.shift_threshold for shift in shifts.values()):
+            self._alert({
+                "type": "quantile_shift",
+                "group": kind,
+                "name": name,
+                "metric": metric,
+                "baseline": baseline,
+                "current": current,
+                "shift_stddevs": shifts
+            })
+
+    def forget_interaction(self, interaction_id: str) -> None:
+        """Stop tracking an interaction's stability state."""
+        self.unstable_interactions.discard(interaction_id)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+        """
+        Get the statistics of every group.
+
+        Returns:
+            {"shell": {shell_id: {metric: summary}}, "level": {level: {metric: summary}}}
+        """
+        result = {"shell": {}, "level": {}}
+        for (kind, name), group in self.groups.items():
+            result[kind][name] = {metric: stats.summary() for metric, stats in group.items()}
+        return result
+
+    def merge(self, other: 'CoherenceMonitor') -> None:
+        """Combine another monitor's statistics into this one."""
+        for key, other_group in other.groups.items():
+            group = self._group(*key)
+            for metric, other_stats in other_group.items():
+                group[metric].merge(other_stats)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to a JSON-serializable dictionary.
+
+        Alert hooks and the per-interaction stability state are not
+        included; they belong to the running process.
+        """
+        groups = {"shell": {}, "level": {}}
+        for (kind, name), group in self.groups.items():
+            groups[kind][name] = {metric: stats.to_dict() for metric, stats in group.items()}
+        return {
+            "alpha": self.alpha,
+            "compression": self.compression,
+            "check_interval": self.check_interval,
+            "shift_threshold": self.shift_threshold,
+            "shift_quantiles": list(self.shift_quantiles),
+            "groups": groups
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CoherenceMonitor':
+        """Create a monitor from its dictionary representation."""
+        monitor = cls(
+            alpha=data["alpha"],
+            compression=data["compression"],
+            check_interval=data["check_interval"],
+            shift_threshold=data["shift_threshold"],
+            shift_quantiles=tuple(data["shift_quantiles"])
+        )
+        for kind, named_groups in data["groups"].items():
+            for name, group in named_groups.items():
+                monitor.groups[(kind, name)] = {
+                    metric: MetricStats.from_dict(stats) for metric, stats in group.items()
+                }
+        return monitor
@@ -0,0 +1,520 @@
+"""
+Recursive Prompting - Declarative Shells
+
+This module lets shells be defined entirely in JSON, without a Python subclass.
+A declarative shell uses the usual shell definition layout (metadata, command
+alignments, interpretability map, ...) plus three sections that describe how
+the next prompt is generated:
+
+    "schedule": {
+        "rules": [
+            {"depth": 1, "command": "INITIATE"},
+            {"every": 3, "command": "RECURSE"}
+        ],
+        "default": "NURTURE"
+    },
+    "extractors": {
+        "topic": {"pattern": "concept of ([^\\.]+)", "min_word_length": 6,
+                  "fallback": "this subject"},
+        "insights": {"markers": ["because", "therefore"], "min_length": 30, "count": 2}
+    },
+    "variables": {
+        "topic": {"source": "topic"},
+        "insight_1": {"source": "insight", "index": 0},
+        "new_dimension": {"source": "by_depth", "values": ["principles", "applications"]},
+        "pattern": {"source": "by_residue",
+                    "rules": [{"residue": "META-REFLECTION", "min_depth": 2, "text": "..."}],
+                    "default": "..."}
+    }
+
+Variables with the "insight" source are the shell's budget fields: when the
+interaction context sets a token_budget, they are shortened to fit it, as in
+Shell.assemble_prompt.
+
+Schedule rules are checked in order and the first match picks the command. A
+rule can combine "depth" (exact depth), "every" with an optional "offset"
+(depth % every == offset) and "min_depth". When the shell is built, the
+schedule is compiled into a lookup table: a prefix for the depths that exact
+and minimum-depth rules single out, then a cycle over the periods. Templates
+are pre-split into literal and placeholder parts, so producing a prompt takes
+a table lookup and one join.
+"""
+
+import math
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+from recursive_prompting.shells.base import (
+    Shell,
+    ShellMetadata,
+    CommandAlignment,
+    InterpretabilityMap,
+    NullReflection,
+    MotivationFramework,
+    InsightExtractor,
+    ResponseAnalysis,
+    ResponseStream,
+    compile_marker_pattern,
+    iter_sentences
+)
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+VARIABLE_SOURCES = ("topic", "insight", "by_depth", "by_residue", "literal")
+
+
+def _rule_matches(rule: Dict[str, Any], depth: int) -> bool:
+    """Check whether a schedule rule applies at a depth."""
+    if "depth" in rule and depth != rule["depth"]:
+        return False
+    if "every" in rule and depth % rule["every"] != rule.get("offset", 0):
+        return False
+    if "min_depth" in rule and depth < rule["min_depth"]:
+        return False
+    return True
+
+
+class CompiledSchedule:
+    """
+    Command schedule compiled into a depth lookup table.
+
+    Depths up to the last exact or minimum depth named by a rule are looked
+    up in a prefix table. Beyond that, only the periodic rules can change the
+    outcome, so the command depends on depth modulo the least common multiple
+    of their periods and is looked up in a cycle table.
+    """
+
+    __slots__ = ("prefix", "cycle")
+
+    def __init__(self, rules: List[Dict[str, Any]], default: str):
+        """
+        Compile a schedule.
+
+        Args:
+            rules: Ordered schedule rules, each with a "command"
+            default: Command used when no rule matches
+        """
+        def evaluate(depth: int) -> str:
+            for rule in rules:
+                if _rule_matches(rule, depth):
+                    return rule["command"]
+            return default
+
+        last_fixed = 0
+        period = 1
+        for rule in rules:
+            if "depth" in rule:
+                last_fixed = max(last_fixed, rule["depth"])
+            if "min_depth" in rule:
+                last_fixed = max(last_fixed, rule["min_depth"] - 1)
+            if "every" in rule:
+                period = period * rule["every"] // math.gcd(period, rule["every"])
+
+        self.prefix = tuple(evaluate(depth) for depth in range(last_fixed + 1))
+        first_cyclic = last_fixed + 1
+        self.cycle = tuple(
+            evaluate(first_cyclic + (position - first_cyclic) % period)
+            for position in range(period)
+        )
+
+    def command_for(self, depth: int) -> str:
+        """Get the command scheduled for a depth."""
+        if 0 <= depth < len(self.prefix):
+            return self.prefix[depth]
+        return self.cycle[depth % len(self.cycle)]
+
+
+class CompiledTemplate:
+    """
+    Prompt template split into literal text and placeholder fields.
+
+    Placeholders without a variable definition are kept as literal text.
+    Values are substituted in a single pass, so text inside a value is
+    never treated as a placeholder.
+    """
+
+    __slots__ = ("literals", "fields")
+
+    def __init__(self, template: str, known_fields: Dict[str, Any]):
+        """
+        Compile a prompt template.
+
+        Args:
+            template: The prompt template
+            known_fields: Variables that placeholders can be filled from
+        """
+        literals = []
+        fields = []
+        current = []
+        position = 0
+
+        for match in _PLACEHOLDER_PATTERN.finditer(template):
+            current.append(template[position:match.start()])
+            position = match.end()
+            name = match.group(1)
+            if name in known_fields:
+                literals.append("".join(current))
+                fields.append(name)
+                current = []
+            else:
+                current.append(match.group())
+
+        current.append(template[position:])
+        literals.append("".join(current))
+        self.literals = tuple(literals)
+        self.fields = tuple(fields)
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Fill the template's fields from a dictionary of values."""
+        parts = [self.literals[0]]
+        for field_name, literal in zip(self.fields, self.literals[1:]):
+            parts.append(values[field_name])
+            parts.append(literal)
+        return "".join(parts)
+
+
+def _check_rule(shell_id: str, rule: Dict[str, Any]) -> None:
+    """
+    Check the depth conditions of a schedule rule.
+
+    Raises:
+        ValueError: If a depth is negative, or "every" is not positive or
+            "offset" is outside its period
+    """
+    for key in ("depth", "min_depth"):
+        if key in rule and (not isinstance(rule[key], int) or rule[key] < 0):
+            raise ValueError(f"Schedule of shell {shell_id} has invalid {key} {rule[key]!r}")
+    if "every" in rule:
+        every = rule["every"]
+        if not isinstance(every, int) or every < 1:
+            raise ValueError(f"Schedule of shell {shell_id} has invalid every {every!r}")
+        offset = rule.get("offset", 0)
+        if not isinstance(offset, int) or not 0 <= offset < every:
+            raise ValueError(f"Schedule of shell {shell_id} has offset {offset!r} outside [0, {every})")
+
+
+def _compile_variable(name: str, spec: Dict[str, Any]) -> Tuple:
+    """
+    Compile a variable definition into a tuple resolved by DeclarativeShell.
+
+    Raises:
+        ValueError: If the variable's source is unknown
+    """
+    source = spec.get("source")
+    if source == "topic":
+        return ("topic",)
+    if source == "insight":
+        return ("insight", spec.get("index", 0), spec.get("default", ""))
+    if source == "by_depth":
+        values = tuple(spec["values"])
+        if not values:
+            raise ValueError(f"Variable '{name}' has no values")
+        return ("by_depth", values)
+    if source == "by_residue":
+        rules = tuple(
+            (rule.get("residue"), rule.get("min_depth", 0), rule["text"])
+            for rule in spec.get("rules", [])
+        )
+        return ("by_residue", rules, spec.get("default", ""))
+    if source == "literal":
+        return ("literal", spec.get("value", ""))
+    raise ValueError(f"Variable '{name}' has unknown source '{source}'; "
+                     f"expected one of {', '.join(VARIABLE_SOURCES)}")
+
+
+class DeclarativeShell(Shell):
+    """
+    A shell defined by a declarative JSON spec.
+
+    The schedule, templates and variables are compiled once when the shell
+    is built, so generating a prompt is a table lookup, the resolution of
+    the variables the selected template uses, and a single join.
+    """
+
+    # Type name recorded in serialized definitions and used by the shell factory
+    shell_type = "declarative"
+
+    def __init__(self,
+                metadata: ShellMetadata,
+                command_alignments: List[CommandAlignment],
+                interpretability_map: InterpretabilityMap,
+                null_reflection: NullReflection,
+                motivation_framework: MotivationFramework,
+                schedule: Dict[str, Any],
+                extractors: Optional[Dict[str, Any]] = None,
+                variables: Optional[Dict[str, Any]] = None):
+        """
+        Initialize and compile a declarative shell.
+
+        Args:
+            metadata: Shell metadata
+            command_alignments: Command alignment structures
+            interpretability_map: Interpretability map
+            null_reflection: Null reflection
+            motivation_framework: Motivation framework
+            schedule: Command schedule spec with "rules" and "default"
+            extractors: Topic and insight extractor specs (optional)
+            variables: Template variable specs (optional)
+
+        Raises:
+            ValueError: If the spec refers to unknown commands or variable
+                sources, or has invalid schedule rules or empty insight markers
+        """
+        super().__init__(
+            metadata=metadata,
+            command_alignments=command_alignments,
+            interpretability_map=interpretability_map,
+            null_reflection=null_reflection,
+            motivation_framework=motivation_framework
+        )
+        self.schedule_spec = schedule
+        self.extractors_spec = extractors or {}
+        self.variables_spec = variables or {}
+        self._compile()
+
+    def _compile(self) -> None:
+        """Compile the schedule, extractors, variables and templates."""
+        command_names = {command.name for command in self.command_alignments}
+        rules = self.schedule_spec.get("rules", [])
+        default = self.schedule_spec.get("default")
+        for command_name in [rule.get("command") for rule in rules] + [default]:
+            if command_name not in command_names:
+                raise ValueError(f"Schedule of shell {self.id} uses unknown command '{command_name}'")
+        for rule in rules:
+            _check_rule(self.id, rule)
+        self.schedule = CompiledSchedule(rules, default)
+
+        topic_spec = self.extractors_spec.get("topic", {})
+        self.topic_pattern = re.compile(topic_spec["pattern"]) if "pattern" in topic_spec else None
+        self.topic_min_word_length = topic_spec.get("min_word_length")
+        self.topic_fallback = topic_spec.get("fallback", "this subject")
+
+        insight_spec = self.extractors_spec.get("insights")
+        if insight_spec is not None:
+            markers = insight_spec.get("markers", [])
+            if not markers or not all(markers):
+                # An empty marker matches every sentence
+                raise ValueError(f"Insight extractor of shell {self.id} needs non-empty markers")
+            self.insight_pattern = compile_marker_pattern(markers)
+            self.insight_min_length = insight_spec.get("min_length", 30)
+            self.insight_count = insight_spec.get("count", 2)
+        else:
+            self.insight_pattern = None
+
+        self.variables = {
+            name: _compile_variable(name, spec)
+            for name, spec in self.variables_spec.items()
+        }
+        self.templates = {
+            command.name: CompiledTemplate(command.prompt_template, self.variables)
+            for command in self.command_alignments
+        }
+        self.budget_fields = tuple(
+            name for name, variable in self.variables.items() if variable[0] == "insight"
+        )
+
+    def extract_topic(self, prompt: str) -> str:
+        """
+        Extract the topic from a prompt using the topic extractor.
+
+        Args:
+            prompt: The prompt to extract the topic from
+
+        Returns:
+            The first group of the topic pattern, else the first word of at
+            least min_word_length characters, else the fallback
+        """
+        if self.topic_pattern is not None:
+            topic_match = self.topic_pattern.search(prompt)
+            if topic_match:
+                return topic_match.group(1) if topic_match.groups() else topic_match.group()
+
+        if self.topic_min_word_length:
+            for word in prompt.split():
+                if len(word) >= self.topic_min_word_length:
+                    return word
+
+        return self.topic_fallback
+
+    def _new_insight_extractor(self) -> InsightExtractor:
+        """Create an insight extractor from the insights spec."""
+        return InsightExtractor(self.insight_pattern, self.insight_min_length, self.insight_count)
+
+    def extract_insights(self, text: str) -> List[str]:
+        """Select insights from a response using the insights extractor."""
+        if self.insight_pattern is None:
+            return []
+
+        extractor = self._new_insight_extractor()
+        for sentence in iter_sentences(text):
+            extractor.add_sentence(sentence)
+            if extractor.done:
+                break
+        return extractor.insights()
+
+    def create_context(self, initial_prompt: str) -> Dict[str, Any]:
+        """Extract the topic once from the initial prompt."""
+        return {
+            "topic": self.extract_topic(initial_prompt),
+            "insights": None  # Insight candidates from the latest response
+        }
+
+    def create_stream_consumer(self) -> Optional[InsightExtractor]:
+        """Select insights while the response streams in, if insights are configured."""
+        if self.insight_pattern is None:
+            return None
+        return self._new_insight_extractor()
+
+    def update_context(self,
+                      context: Dict[str, Any],
+                      response: str,
+                      stream: Optional[ResponseStream] = None,
+                      analysis: Optional[ResponseAnalysis] = None) -> None:
+        """Replace the insight candidates with those of the latest response."""
+        if self.insight_pattern is None:
+            return
+
+        if stream is not None and isinstance(stream.consumer, InsightExtractor):
+            context["insights"] = stream.consumer.insights()
+        elif analysis is not None:
+            extractor = self._new_insight_extractor()
+            extractor.add_analysis(analysis)
+            context["insights"] = extractor.insights()
+        else:
+            context["insights"] = self.extract_insights(response)
+
+    def generate_next_prompt(self,
+                           previous_prompt: str,
+                           previous_response: str,
+                           depth: int,
+                           residue: List[str]) -> str:
+        """
+        Generate the next prompt in a recursive interaction.
+
+        Args:
+            previous_prompt: The previous prompt
+            previous_response: The response to the previous prompt
+            depth: The current recursion depth
+            residue: Accumulated symbolic residue
+
+        Returns:
+            The next prompt in the recursive sequence
+        """
+        context = self.create_context(previous_prompt)
+        return self.generate_next_prompt_in_context(
+            context, previous_prompt, previous_response, depth, residue
+        )
+
+    def generate_next_prompt_in_context(self,
+                                       context: Dict[str, Any],
+                                       previous_prompt: str,
+                                       previous_response: str,
+                                       depth: int,
+                                       residue: List[str]) -> str:
+        """
+        Generate the next prompt from the compiled schedule and templates.
+
+        If the context sets a token_budget, insight variables are shortened
+        to fit and the tokens saved are left in context["tokens_saved"].
+
+        Args:
+            context: The interaction context from create_context
+            previous_prompt: The previous prompt
+            previous_response: The response to the previous prompt
+            depth: The current recursion depth
+            residue: Accumulated symbolic residue
+
+        Returns:
+            The next prompt in the recursive sequence
+        """
+        command_name = self.schedule.command_for(depth)
+        template = self.templates[command_name]
+
+        values = {}
+        for field_name in template.fields:
+            values[field_name] = self._resolve_variable(
+                self.variables[field_name], context, previous_response, depth, residue
+            )
+
+        token_budget = context.get("token_budget")
+        if token_budget is None:
+            next_prompt = template.render(values)
+        else:
+            next_prompt, tokens_saved = self.fit_prompt(template.render, values, token_budget)
+            if tokens_saved:
+                context["tokens_saved"] = tokens_saved
+
+        logger.info(f"Generated next prompt using {command_name} at depth {depth}")
+        return next_prompt
+
+    def _resolve_variable(self,
+                         variable: Tuple,
+                         context: Dict[str, Any],
+                         previous_response: str,
+                         depth: int,
+                         residue: List[str]) -> str:
+        """Resolve a compiled variable to its value for this step."""
+        source = variable[0]
+
+        if source == "topic":
+            return str(context["topic"])
+
+        if source == "insight":
+            insights = context.get("insights")
+            if insights is None:
+                insights = context["insights"] = self.extract_insights(previous_response)
+            index, default = variable[1], variable[2]
+            return insights[index] if index < len(insights) else default
+
+        if source == "by_depth":
+            values = variable[1]
+            return values[max(0, min(depth - 1, len(values) - 1))]
+
+        if source == "by_residue":
+            for residue_id, min_depth, text in variable[1]:
+                if depth >= min_depth and (residue_id is None or residue_id in residue):
+                    return text
+            return variable[2]
+
+        return variable[1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert shell to dictionary representation, including its spec."""
+        data = super().to_dict()
+        data["schedule"] = self.schedule_spec
+        data["extractors"] = self.extractors_spec
+        data["variables"] = self.variables_spec
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DeclarativeShell':
+        """
+        Create a declarative shell from its spec.
+
+        Args:
+            data: Dictionary representation of the shell
+
+        Returns:
+            A compiled DeclarativeShell instance
+        """
+        interpretability_map = data.get("interpretability_map")
+        null_reflection = data.get("null_reflection")
+        motivation_framework = data.get("motivation_framework")
+
+        return cls(
+            metadata=ShellMetadata.from_dict(data["metadata"]),
+            command_alignments=[CommandAlignment.from_dict(cmd) for cmd in data["command_alignments"]],
+            interpretability_map=(InterpretabilityMap.from_dict(interpretability_map)
+                                  if interpretability_map else InterpretabilityMap({}, [])),
+            null_reflection=(NullReflection.from_dict(null_reflection)
+                             if null_reflection else NullReflection("", [], "")),
+            motivation_framework=(MotivationFramework.from_dict(motivation_framework)
+                                  if motivation_framework else MotivationFramework("", [], [])),
+            schedule=data["schedule"],
+            extractors=data.get("extractors"),
+            variables=data.get("variables")
+        )
@@ -0,0 +1,365 @@
+"""
+Recursive Prompting - Shell Mastery Store
+
+This module keeps shell mastery per (player, shell) across interactions.
+Interaction metrics and shell instances both report executions here, so a
+player's mastery of a shell keeps growing from one interaction to the next
+instead of starting over.
+
+Entries live in compact parallel arrays, with player and shell IDs
+interned to integers. Players are also indexed by how many shells they
+have mastered, so the shell_artisan question ("which players have 0.8+
+mastery on 3+ shells?") is answered without scanning any interaction.
+Updates are persisted in batches, after every flush_interval updates and
+on flush(). A batch appends only the entries changed since the last save
+to a delta log next to the store file ("<path>.log"), so its cost doesn't
+grow with the store. Once the log holds more entries than the store, the
+store is saved in full and the log removed; load replays the log.
+"""
+
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+import json
+import os
+import tempfile
+
+from recursive_prompting.shells.base import advance_mastery
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+MASTERY_STORE_VERSION = 1
+
+
+class MasteryStore:
+    """
+    Shell mastery keyed by (player ID, shell ID), with an index of players
+    by number of mastered shells.
+    """
+
+    def __init__(self,
+                 expert_threshold: float = 0.8,
+                 path: Optional[str] = None,
+                 flush_interval: int = 100):
+        """
+        Initialize an empty store.
+
+        Args:
+            expert_threshold: Mastery at which a shell counts as mastered
+            path: File the store is persisted to (optional)
+            flush_interval: Updates between saves when a path is given
+        """
+        self.expert_threshold = expert_threshold
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = 0  # Updates since the last save
+        self._dirty: Set[int] = set()  # Entries changed since the last save
+        self._saved_players = 0  # Players and shells already in the store file or log
+        self._saved_shells = 0
+        self._log_entries = 0  # Entries in the delta log
+
+        self.players: List[str] = []  # Player index -> ID
+        self.shells: List[str] = []  # Shell index -> ID
+        self._player_index: Dict[str, int] = {}
+        self._shell_index: Dict[str, int] = {}
+
+        # Entries, one per (player, shell) pair
+        self._slots: Dict[Tuple[int, int], int] = {}
+        self._entry_player = array("I")
+        self._entry_shell = array("I")
+        self._mastery = array("d")
+        self._executions = array("I")
+        self._player_entries: List[List[int]] = []  # Player index -> entries
+
+        # Mastered shell count per player, and players by that count
+        self._expert_counts = array("I")
+        self._players_by_count: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._mastery)
+
+    def _intern_player(self, player_id: str) -> int:
+        index = self._player_index.get(player_id)
+        if index is None:
+            index = len(self.players)
+            self._player_index[player_id] = index
+            self.players.append(player_id)
+            self._player_entries.append([])
+            self._expert_counts.append(0)
+        return index
+
+    def _intern_shell(self, shell_id: str) -> int:
+        index = self._shell_index.get(shell_id)
+        if index is None:
+            index = len(self.shells)
+            self._shell_index[shell_id] = index
+            self.shells.append(shell_id)
+        return index
+
+    def _set(self, player: int, shell: int, mastery: float, executions: int) -> None:
+        """Store an entry's values and keep the mastered-shell index up to date."""
+        entry = self._slots.get((player, shell))
+        if entry is None:
+            entry = len(self._mastery)
+            self._slots[(player, shell)] = entry
+            self._entry_player.append(player)
+            self._entry_shell.append(shell)
+            self._mastery.append(0.0)
+            self._executions.append(0)
+            self._player_entries[player].append(entry)
+
+        was_expert = self._mastery[entry] >= self.expert_threshold
+        self._mastery[entry] = mastery
+        self._executions[entry] = executions
+
+        is_expert = mastery >= self.expert_threshold
+        if is_expert != was_expert:
+            count = self._expert_counts[player]
+            if count:
+                self._players_by_count[count].discard(player)
+            count += 1 if is_expert else -1
+            self._expert_counts[player] = count
+            if count:
+                self._players_by_count.setdefault(count, set()).add(player)
+
+    def record(self, player_id: str, shell_id: str) -> float:
+        """
+        Record an execution of a shell by a player and advance their mastery.
+
+        Args:
+            player_id: The player ID
+            shell_id: The shell ID
+
+        Returns:
+            The player's new mastery of the shell
+        """
+        player = self._intern_player(player_id)
+        shell = self._intern_shell(shell_id)
+        entry = self._slots.get((player, shell))
+        if entry is None:
+            mastery = advance_mastery(None)
+            executions = 1
+        else:
+            mastery = advance_mastery(self._mastery[entry])
+            executions = self._executions[entry] + 1
+        self._set(player, shell, mastery, executions)
+        self._dirty.add(self._slots[(player, shell)])
+
+        self._pending += 1
+        if self.path and self._pending >= self.flush_interval:
+            self.flush()
+        return mastery
+
+    def mastery(self, player_id: str, shell_id: str) -> Optional[float]:
+        """Get a player's mastery of a shell, or None if they have not used it."""
+        entry = self._slots.get((self._player_index.get(player_id), self._shell_index.get(shell_id)))
+        return None if entry is None else self._mastery[entry]
+
+    def player_mastery(self, player_id: str) -> Dict[str, float]:
+        """Get a player's mastery of each shell they have used."""
+        player = self._player_index.get(player_id)
+        if player is None:
+            return {}
+        return {self.shells[self._entry_shell[entry]]: self._mastery[entry]
+                for entry in self._player_entries[player]}
+
+    def expert_shell_count(self, player_id: str) -> int:
+        """Get the number of shells a player has mastered."""
+        player = self._player_index.get(player_id)
+        return 0 if player is None else self._expert_counts[player]
+
+    def players_with_expert_shells(self, min_shells: int = 3) -> List[str]:
+        """
+        Get the players who have mastered at least min_shells shells.
+
+        With the defaults, these are the players earning shell_artisan.
+        The cost depends on the number of matching players, not on the
+        number of players or interactions.
+
+        Args:
+            min_shells: Number of mastered shells required
+
+        Returns:
+            Matching player IDs
+        """
+        min_shells = max(1, min_shells)
+        return [self.players[player]
+                for count, players in self._players_by_count.items() if count >= min_shells
+                for player in players]
+
+    @property
+    def log_path(self) -> Optional[str]:
+        """Path of the delta log, or None if the store has no path."""
+        return f"{self.path}.log" if self.path else None
+
+    def flush(self) -> None:
+        """
+        Save pending updates to the store's path, if it has one.
+
+        Changed entries are appended to the delta log, unless the store file
+        doesn't exist yet or the log would outgrow the store, in which case
+        the whole store is saved and the log removed.
+        """
+        if not self.path or not self._pending:
+            return
+        if not os.path.exists(self.path) or self._log_entries + len(self._dirty) > len(self._mastery):
+            self.save(self.path)
+            return
+
+        entries = sorted(self._dirty)
+        header = json.dumps({
+            "players": self.players[self._saved_players:],
+            "shells": self.shells[self._saved_shells:],
+            "entries": len(entries)
+        }).encode("utf-8")
+        frame = bytearray(len(header).to_bytes(8, "little"))
+        frame += header
+        for values in (self._entry_player, self._entry_shell, self._executions, self._mastery):
+            frame += array(values.typecode, (values[entry] for entry in entries)).tobytes()
+
+        # One write per batch, so a crash can only tear the last frame
+        with open(self.log_path, 'ab') as f:
+            f.write(frame)
+
+        self._log_entries += len(entries)
+        self._saved_players = len(self.players)
+        self._saved_shells = len(self.shells)
+        self._dirty.clear()
+        self._pending = 0
+
+    def save(self, path: str) -> None:
+        """
+        Save the store to a file.
+
+        The file holds a JSON header with the threshold and IDs, followed
+        by the entry arrays; the index is rebuilt on load.
+
+        Args:
+            path: Path of the store file
+        """
+        header = json.dumps({
+            "version": MASTERY_STORE_VERSION,
+            "expert_threshold": self.expert_threshold,
+            "players": self.players,
+            "shells": self.shells,
+            "entries": len(self._mastery)
+        }).encode("utf-8")
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(len(header).to_bytes(8, "little"))
+                f.write(header)
+                for values in (self._entry_player, self._entry_shell, self._executions, self._mastery):
+                    values.tofile(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        if path == self.path:
+            # The new file holds everything the log did
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            self._log_entries = 0
+            self._saved_players = len(self.players)
+            self._saved_shells = len(self.shells)
+            self._dirty.clear()
+            self._pending = 0
+        logger.info(f"Saved mastery of {len(self.players)} players on {len(self._mastery)} shells to {path}")
+
+    @classmethod
+    def load(cls, path: str, flush_interval: int = 100) -> 'MasteryStore':
+        """
+        Load a store from a file and replay its delta log; later updates
+        are saved back to them.
+
+        Args:
+            path: Path of the store file
+            flush_interval: Updates between saves
+
+        Returns:
+            The loaded store
+
+        Raises:
+            ValueError: If the file is not a valid store file
+        """
+        with open(path, 'rb') as f:
+            header_length = int.from_bytes(f.read(8), "little")
+            try:
+                header = json.loads(f.read(header_length).decode("utf-8"))
+            except ValueError as e:
+                raise ValueError(f"Invalid mastery store file {path}: {e}")
+            if header.get("version") != MASTERY_STORE_VERSION:
+                raise ValueError(f"Unsupported mastery store version in {path}: {header.get('version')}")
+
+            count = header["entries"]
+            columns = []
+            try:
+                for typecode in ("I", "I", "I", "d"):
+                    values = array(typecode)
+                    values.fromfile(f, count)
+                    columns.append(values)
+            except EOFError:
+                raise ValueError(f"Invalid mastery store file {path}: entry data is truncated")
+
+        store = cls(header["expert_threshold"], path, flush_interval)
+        for player_id in header["players"]:
+            store._intern_player(player_id)
+        for shell_id in header["shells"]:
+            store._intern_shell(shell_id)
+        for player, shell, executions, mastery in zip(*columns):
+            store._set(player, shell, mastery, executions)
+        if os.path.exists(store.log_path):
+            store._replay_log()
+        store._saved_players = len(store.players)
+        store._saved_shells = len(store.shells)
+
+        logger.info(f"Loaded mastery of {len(store.players)} players on {len(store)} shells from {path}")
+        return store
+
+    def _replay_log(self) -> None:
+        """
+        Apply the batches of the delta log to the store.
+
+        Entries hold absolute values, so replaying a batch the store file
+        already includes is harmless. A torn last batch, left by a crash
+        while appending, is skipped with a warning and cut off the log, so
+        later batches are appended after the last whole one.
+        """
+        with open(self.log_path, 'rb') as f:
+            data = f.read()
+
+        offset = 0
+        batches = 0
+        while offset < len(data):
+            try:
+                header_length = int.from_bytes(data[offset:offset + 8], "little")
+                header = json.loads(data[offset + 8:offset + 8 + header_length].decode("utf-8"))
+                position = offset + 8 + header_length
+                count = header["entries"]
+                columns = []
+                for typecode in ("I", "I", "I", "d"):
+                    values = array(typecode)
+                    size = count * values.itemsize
+                    if position + size > len(data):
+                        raise ValueError("entry data is truncated")
+                    values.frombytes(data[position:position + size])
+                    columns.append(values)
+                    position += size
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Truncating mastery log {self.log_path} after {batches} batches: {e}")
+                os.truncate(self.log_path, offset)
+                break
+
+            for player_id in header["players"]:
+                self._intern_player(player_id)
+            for shell_id in header["shells"]:
+                self._intern_shell(shell_id)
+            for player, shell, executions, mastery in zip(*columns):
+                self._set(player, shell, mastery, executions)
+            self._log_entries += count
+            batches += 1
+            offset = position
@@ -0,0 +1,216 @@
+"""
+Recursive Prompting - Metric Rollups
+
+This module keeps dashboard aggregates per (shell, level) group, updated
+as interactions progress instead of recomputed from every interaction:
+interaction, step and residue counts, depth score and residue-per-step
+statistics, shell switches, level advancements and the distribution of
+steps taken to advance.
+
+Groups are small fixed-size records, so a rollup query costs O(groups).
+Snapshots are JSON-serializable and can be merged, so rollups from several
+engine processes combine into fleet-wide figures.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from recursive_prompting.metrics.coherence_stats import RunningStats, TDigest
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+ROLLUP_SNAPSHOT_VERSION = 1
+
+
+class GroupRollup:
+    """Aggregates of one (shell ID, level) group."""
+
+    __slots__ = ("interactions", "steps", "residue", "switches_in", "advancements",
+                 "depth_score", "residue_per_step", "steps_to_advancement")
+
+    def __init__(self):
+        self.interactions = 0  # Interactions that entered the group
+        self.steps = 0
+        self.residue = 0
+        self.switches_in = 0  # Interactions that switched to the group's shell
+        self.advancements = 0  # Interactions that advanced out of the group's level
+        self.depth_score = RunningStats()  # Depth score after each step
+        self.residue_per_step = RunningStats()
+        self.steps_to_advancement = TDigest()  # Steps spent at the level before advancing
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the group's figures."""
+        return {
+            "interactions": self.interactions,
+            "steps": self.steps,
+            "residue": self.residue,
+            "switches_in": self.switches_in,
+            "advancements": self.advancements,
+            "mean_depth_score": self.depth_score.mean if self.depth_score.count else None,
+            "max_depth_score": self.depth_score.max if self.depth_score.count else None,
+            "residue_per_step": self.residue_per_step.mean if self.residue_per_step.count else None,
+            "median_steps_to_advancement": self.steps_to_advancement.quantile(0.5),
+            "p90_steps_to_advancement": self.steps_to_advancement.quantile(0.9)
+        }
+
+    def merge(self, other: 'GroupRollup') -> None:
+        """Combine another group's aggregates into this one."""
+        self.interactions += other.interactions
+        self.steps += other.steps
+        self.residue += other.residue
+        self.switches_in += other.switches_in
+        self.advancements += other.advancements
+        self.depth_score.merge(other.depth_score)
+        self.residue_per_step.merge(other.residue_per_step)
+        self.steps_to_advancement.merge(other.steps_to_advancement)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "interactions": self.interactions,
+            "steps": self.steps,
+            "residue": self.residue,
+            "switches_in": self.switches_in,
+            "advancements": self.advancements,
+            "depth_score": self.depth_score.to_dict(),
+            "residue_per_step": self.residue_per_step.to_dict(),
+            "steps_to_advancement": self.steps_to_advancement.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GroupRollup':
+        """Create a group from its dictionary representation."""
+        rollup = cls()
+        rollup.interactions = data["interactions"]
+        rollup.steps = data["steps"]
+        rollup.residue = data["residue"]
+        rollup.switches_in = data["switches_in"]
+        rollup.advancements = data["advancements"]
+        rollup.depth_score = RunningStats.from_dict(data["depth_score"])
+        rollup.residue_per_step = RunningStats.from_dict(data["residue_per_step"])
+        rollup.steps_to_advancement = TDigest.from_dict(data["steps_to_advancement"])
+        return rollup
+
+
+class MetricRollups:
+    """
+    Incrementally maintained rollups keyed by (shell ID, level name).
+
+    The engine reports interaction starts, recorded steps, shell switches
+    and level advancements; each report updates one or two groups in
+    O(1) amortized time.
+    """
+
+    def __init__(self):
+        """Initialize empty rollups."""
+        self.groups: Dict[Tuple[str, str], GroupRollup] = {}
+        self._steps_at_level: Dict[str, int] = {}  # Interaction ID -> steps since reaching its level
+
+    def _group(self, shell_id: str, level: str) -> GroupRollup:
+        """Get a group's rollup, creating it if needed."""
+        key = (shell_id, level)
+        rollup = self.groups.get(key)
+        if rollup is None:
+            rollup = GroupRollup()
+            self.groups[key] = rollup
+        return rollup
+
+    def record_start(self, interaction_id: str, shell_id: str, level: str) -> None:
+        """
+        Record a new interaction.
+
+        Args:
+            interaction_id: The interaction ID
+            shell_id: ID of its shell
+            level: Name of its level
+        """
+        self._group(shell_id, level).interactions += 1
+        self._steps_at_level[interaction_id] = 0
+
+    def record_step(self,
+                    interaction_id: str,
+                    shell_id: str,
+                    level: str,
+                    depth_score: float,
+                    residue_count: int) -> None:
+        """
+        Record a step that received its response.
+
+        Args:
+            interaction_id: The interaction ID
+            shell_id: ID of the shell used for the step
+            level: Name of the interaction's level
+            depth_score: The interaction's depth score after the step
+            residue_count: Residue patterns extracted from the step
+        """
+        rollup = self._group(shell_id, level)
+        rollup.steps += 1
+        rollup.residue += residue_count
+        rollup.depth_score.add(depth_score)
+        rollup.residue_per_step.add(residue_count)
+        self._steps_at_level[interaction_id] = self._steps_at_level.get(interaction_id, 0) + 1
+
+    def record_switch(self, shell_id: str, level: str) -> None:
+        """Record an interaction switching to a shell."""
+        rollup = self._group(shell_id, level)
+        rollup.switches_in += 1
+        rollup.interactions += 1
+
+    def record_advancement(self, interaction_id: str, shell_id: str, old_level: str, new_level: str) -> None:
+        """Record an interaction advancing a level, with the steps it took at the old level."""
+        old_rollup = self._group(shell_id, old_level)
+        old_rollup.advancements += 1
+        old_rollup.steps_to_advancement.add(self._steps_at_level.get(interaction_id, 0))
+        self._group(shell_id, new_level).interactions += 1
+        self._steps_at_level[interaction_id] = 0
+
+    def forget_interaction(self, interaction_id: str) -> None:
+        """Stop tracking an interaction's steps at its current level; its group figures are kept."""
+        self._steps_at_level.pop(interaction_id, None)
+
+    def rollups(self,
+                shell_id: Optional[str] = None,
+                level: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the figures of every group.
+
+        Args:
+            shell_id: Only include this shell's groups (optional)
+            level: Only include this level's groups (optional)
+
+        Returns:
+            One dictionary per group with "shell_id", "level" and its figures
+        """
+        result = []
+        for (group_shell_id, group_level), rollup in self.groups.items():
+            if shell_id is not None and group_shell_id != shell_id:
+                continue
+            if level is not None and group_level != level:
+                continue
+            summary = {"shell_id": group_shell_id, "level": group_level}
+            summary.update(rollup.summary())
+            result.append(summary)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a JSON-serializable snapshot of all groups."""
+        return {
+            "version": ROLLUP_SNAPSHOT_VERSION,
+            "groups": [
+                {"shell_id": shell_id, "level": level, "rollup": rollup.to_dict()}
+                for (shell_id, level), rollup in self.groups.items()
+            ]
+        }
+
+    def merge_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Add the groups of a snapshot, such as one taken in another process.
+
+        Raises:
+            ValueError: If the snapshot version is not supported
+        """
+        if snapshot.get("version") != ROLLUP_SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported rollup snapshot version {snapshot.get('version')}")
+        for group in snapshot["groups"]:
+            self._group(group["shell_id"], group["level"]).merge(GroupRollup.from_dict(group["rollup"]))
@@ -0,0 +1,367 @@
+"""
+Recursive Prompting - Near-Duplicate Index
+
+This module answers "is this response, or residue snippet, a near-duplicate
+of anything seen before?" without scanning stored interactions, using
+MinHash signatures and locality-sensitive hashing (LSH).
+
+Texts are reduced to sets of word n-gram shingles. A MinHash signature of a
+set estimates its Jaccard similarity to any other set as the fraction of
+equal signature positions. Signatures are computed with one-permutation
+hashing: each shingle is hashed once and assigned to one of num_perm bins,
+each bin keeps its minimum and empty bins borrow from the next non-empty
+bin, so building a signature costs O(shingles) rather than
+O(shingles × num_perm).
+
+The signature is split into bands of rows; texts sharing any band are
+candidates, and candidates are confirmed by their estimated similarity. The
+band layout is chosen so the LSH threshold is close to the configured
+similarity threshold. A lookup costs one dictionary access per band,
+independent of the number of texts indexed.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from recursive_prompting.shells.base import ResponseAnalysis
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+# Version of the index file format; bump when signatures change
+NOVELTY_INDEX_VERSION = 1
+
+_HASH_MASK = (1 << 64) - 1
+_EMPTY_BIN = _HASH_MASK
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Choose the LSH band layout for a similarity threshold.
+
+    Texts with Jaccard similarity s share a band with probability
+    1 - (1 - s^rows)^bands, which rises most steeply near (1 / bands)^(1 / rows).
+    The layout whose steep point is closest to the threshold is used.
+
+    Args:
+        num_perm: Signature length
+        threshold: Jaccard similarity threshold in (0, 1]
+
+    Returns:
+        A (bands, rows) pair with bands × rows == num_perm
+    """
+    layouts = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(layouts, key=lambda layout: abs((1.0 / layout[0]) ** (1.0 / layout[1]) - threshold))
+
+
+class NearDuplicateIndex:
+    """
+    MinHash LSH index of texts keyed by caller-chosen IDs.
+
+    Signatures are stored contiguously in one unsigned 64-bit array and
+    the band buckets map band hashes to item numbers, so memory grows by
+    num_perm × 8 bytes plus one bucket entry per band for each text.
+    """
+
+    def __init__(self,
+                 threshold: float = 0.8,
+                 num_perm: int = 128,
+                 shingle_size: int = 3,
+                 seed: int = 1):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold: Estimated Jaccard similarity at or above which texts are near-duplicates
+            num_perm: Signature length; longer signatures estimate similarity more precisely
+            shingle_size: Number of words per shingle
+            seed: Hash seed; indexes can only be compared if their seeds match
+
+        Raises:
+            ValueError: If the threshold, signature length or shingle size is out of range
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"Near-duplicate threshold must be in (0, 1], got {threshold}")
+        if num_perm < 1 or shingle_size < 1:
+            raise ValueError("Signature length and shingle size must be positive")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self._hash_key = seed.to_bytes(8, "little", signed=True)
+
+        self.keys: List[str] = []  # Item number -> key
+        self.signatures = array("Q")  # Item signatures, num_perm values each
+        self.buckets: List[Dict[int, Any]] = [{} for _ in range(self.bands)]  # Band hash -> item(s)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def shingles(self, text: Union[str, ResponseAnalysis]) -> Iterable[str]:
+        """
+        Get the word n-gram shingles of a text.
+
+        Texts shorter than the shingle size form a single shingle.
+
+        Args:
+            text: The text, or a shared analysis of it whose words are reused
+        """
+        words = text.words if isinstance(text, ResponseAnalysis) else _WORD_PATTERN.findall(text.lower())
+        size = self.shingle_size
+        if len(words) <= size:
+            return [" ".join(words)] if words else []
+        return (" ".join(words[start:start + size]) for start in range(len(words) - size + 1))
+
+    def signature(self, text: Union[str, ResponseAnalysis]) -> Optional[array]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: The text, or a shared analysis of it
+
+        Returns:
+            The signature, or None for a text without words
+        """
+        num_perm = self.num_perm
+        key = self._hash_key
+        bins = [_EMPTY_BIN] * num_perm
+        filled = False
+        for shingle in self.shingles(text):
+            value = int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=8, key=key).digest(), "little"
+            )
+            slot = value % num_perm
+            value //= num_perm
+            if value < bins[slot]:
+                bins[slot] = value
+            filled = True
+
+        if not filled:
+            return None
+
+        # Densify: an empty bin takes the next non-empty bin's value, offset
+        # by the distance so borrowed values stay distinct from the original
+        # bin. Walking backwards from a filled bin visits each bin once.
+        start = next(slot for slot in range(num_perm) if bins[slot] != _EMPTY_BIN)
+        source, distance = bins[start], 0
+        for step in range(1, num_perm):
+            slot = (start - step) % num_perm
+            if bins[slot] == _EMPTY_BIN:
+                distance += 1
+                bins[slot] = (source + distance * 0x9E3779B97F4A7C15) & (_HASH_MASK >> 1)
+            else:
+                source, distance = bins[slot], 0
+        return array("Q", bins)
+
+    def _band_hashes(self, signature: Sequence[int]) -> List[int]:
+        """Hash each band of a signature."""
+        rows = self.rows
+        return [hash(tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def _similarity(self, signature: Sequence[int], item: int) -> float:
+        """Estimate the Jaccard similarity of a signature to an indexed item."""
+        start = item * self.num_perm
+        stored = self.signatures[start:start + self.num_perm]
+        return sum(1 for a, b in zip(signature, stored) if a == b) / self.num_perm
+
+    def _query_signature(self, signature: Sequence[int], band_hashes: List[int]) -> List[Tuple[str, float]]:
+        """Find the indexed items similar to a signature, most similar first."""
+        candidates = set()
+        for bucket, band_hash in zip(self.buckets, band_hashes):
+            items = bucket.get(band_hash)
+            if items is None:
+                continue
+            if isinstance(items, int):
+                candidates.add(items)
+            else:
+                candidates.update(items)
+
+        matches = []
+        for item in candidates:
+            similarity = self._similarity(signature, item)
+            if similarity >= self.threshold:
+                matches.append((item, similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return [(self.keys[item], similarity) for item, similarity in matches]
+
+    def _insert(self, key: str, signature: Sequence[int], band_hashes: List[int]) -> None:
+        """Add a signature to the index."""
+        item = len(self.keys)
+        self.keys.append(key)
+        self.signatures.extend(signature)
+        for bucket, band_hash in zip(self.buckets, band_hashes):
+            items = bucket.get(band_hash)
+            if items is None:
+                bucket[band_hash] = item  # Most bands hold a single item
+            elif isinstance(items, int):
+                bucket[band_hash] = [items, item]
+            else:
+                items.append(item)
+
+    def query(self, text: Union[str, ResponseAnalysis]) -> List[Tuple[str, float]]:
+        """
+        Find indexed texts that are near-duplicates of a text.
+
+        Args:
+            text: The text, or a shared analysis of it
+
+        Returns:
+            (key, estimated similarity) pairs at or above the threshold, most similar first
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        return self._query_signature(signature, self._band_hashes(signature))
+
+    def is_near_duplicate(self, text: Union[str, ResponseAnalysis]) -> bool:
+        """Check whether a text is a near-duplicate of any indexed text."""
+        return bool(self.query(text))
+
+    def add(self, key: str, text: Union[str, ResponseAnalysis]) -> List[Tuple[str, float]]:
+        """
+        Add a text to the index, reporting the near-duplicates it already had.
+
+        Texts without words are not indexed.
+
+        Args:
+            key: ID of the text, such as "<interaction ID>:<depth>"
+            text: The text, or a shared analysis of it
+
+        Returns:
+            (key, estimated similarity) pairs of the near-duplicates indexed
+            before it; empty if the text is novel
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        band_hashes = self._band_hashes(signature)
+        matches = self._query_signature(signature, band_hashes)
+        self._insert(key, signature, band_hashes)
+        return matches
+
+    def backfill(self, filepaths: Iterable[str]) -> int:
+        """
+        Index the responses of saved interaction files.
+
+        Responses are keyed "<interaction ID>:<depth>". Files that cannot
+        be read are skipped with a warning.
+
+        Args:
+            filepaths: Paths of files written by RecursiveEngine.save_interaction
+
+        Returns:
+            Number of responses indexed
+        """
+        added = 0
+        for filepath in filepaths:
+            try:
+                with open(filepath, 'r') as f:
+                    data = json.load(f)
+                steps = data["steps"]
+                interaction_id = data["id"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping interaction file {filepath}: {e}")
+                continue
+
+            for step in steps:
+                response = step.get("response")
+                if not response:
+                    continue
+                signature = self.signature(response)
+                if signature is not None:
+                    self._insert(f"{interaction_id}:{step.get('depth')}", signature,
+                                 self._band_hashes(signature))
+                    added += 1
+
+        logger.info(f"Backfilled {added} responses into the near-duplicate index")
+        return added
+
+    def save(self, path: str) -> None:
+        """
+        Save the index to a file.
+
+        The file holds a JSON header with the parameters and keys, followed
+        by the raw signatures; buckets are rebuilt on load.
+
+        Args:
+            path: Path of the index file
+        """
+        header = json.dumps({
+            "version": NOVELTY_INDEX_VERSION,
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "shingle_size": self.shingle_size,
+            "seed": self.seed,
+            "keys": self.keys
+        }).encode("utf-8")
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(len(header).to_bytes(8, "little"))
+                f.write(header)
+                signatures = array("Q", self.signatures)
+                if signatures.itemsize != 8:
+                    raise ValueError("Unsigned 64-bit arrays are not 8 bytes on this platform")
+                signatures.tofile(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        logger.info(f"Saved near-duplicate index with {len(self.keys)} texts to {path}")
+
+    @classmethod
+    def load(cls, path: str, threshold: Optional[float] = None) -> 'NearDuplicateIndex':
+        """
+        Load an index from a file.
+
+        Args:
+            path: Path of the index file
+            threshold: Similarity threshold to use instead of the saved one (optional)
+
+        Returns:
+            The loaded index
+
+        Raises:
+            ValueError: If the file is not a valid index file
+        """
+        with open(path, 'rb') as f:
+            header_length = int.from_bytes(f.read(8), "little")
+            try:
+                header = json.loads(f.read(header_length).decode("utf-8"))
+            except ValueError as e:
+                raise ValueError(f"Invalid near-duplicate index file {path}: {e}")
+            if header.get("version") != NOVELTY_INDEX_VERSION:
+                raise ValueError(f"Unsupported near-duplicate index version in {path}: {header.get('version')}")
+
+            index = cls(
+                threshold=header["threshold"] if threshold is None else threshold,
+                num_perm=header["num_perm"],
+                shingle_size=header["shingle_size"],
+                seed=header["seed"]
+            )
+            signatures = array("Q")
+            signatures.frombytes(f.read())
+
+        keys = header["keys"]
+        if len(signatures) != len(keys) * index.num_perm:
+            raise ValueError(f"Invalid near-duplicate index file {path}: signature data is truncated")
+
+        num_perm = index.num_perm
+        for item, key in enumerate(keys):
+            signature = signatures[item * num_perm:(item + 1) * num_perm]
+            index._insert(key, signature, index._band_hashes(signature))
+
+        logger.info(f"Loaded near-duplicate index with {len(keys)} texts from {path}")
+        return index
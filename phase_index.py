@@ -0,0 +1,174 @@
+"""
+Recursive Prompting - Phase Vector Index
+
+This module compares the phase vectors of interactions, to find the
+interactions or players whose recursive phase is most aligned with a given
+one and to compute phase alignment ψ for many interactions at once.
+
+Vectors are normalized and stored as rows of one contiguous NumPy matrix
+that grows by doubling, so updates are O(1) amortized and a query is a
+single matrix-vector product. Phase vectors have only a few dimensions, so
+an exact scan stays memory-bandwidth bound and fast into the millions of
+rows; no approximate structure is needed.
+
+This module requires NumPy, and is only imported when phase indexing is used.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+
+class PhaseIndex:
+    """
+    Cosine-similarity index of phase vectors keyed by interaction or player ID.
+
+    Zero vectors are stored as zeros and have similarity 0 with everything.
+    """
+
+    def __init__(self, dimensions: int = 4, capacity: int = 1024):
+        """
+        Initialize an empty index.
+
+        Args:
+            dimensions: Length of the phase vectors
+            capacity: Initial number of rows allocated
+        """
+        self.dimensions = dimensions
+        self.keys: List[str] = []  # Row -> key
+        self.rows: Dict[str, int] = {}  # Key -> row
+        self._matrix = np.zeros((max(1, capacity), dimensions), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The unit phase vectors, one row per key (a view, not a copy)."""
+        return self._matrix[:len(self.keys)]
+
+    def _normalize(self, vector: Sequence[float]) -> np.ndarray:
+        """Convert a phase vector to a unit vector, leaving zero vectors at zero."""
+        vector = np.asarray(vector, dtype=np.float64)
+        if vector.shape != (self.dimensions,):
+            raise ValueError(f"Phase vector must have {self.dimensions} dimensions, got shape {vector.shape}")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def update(self, key: str, vector: Sequence[float]) -> None:
+        """
+        Add a phase vector or replace the stored one.
+
+        Args:
+            key: Interaction or player ID
+            vector: The phase vector
+
+        Raises:
+            ValueError: If the vector has the wrong number of dimensions
+        """
+        unit = self._normalize(vector)
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row == self._matrix.shape[0]:
+                grown = np.zeros((2 * row, self.dimensions), dtype=np.float64)
+                grown[:row] = self._matrix
+                self._matrix = grown
+            self.rows[key] = row
+            self.keys.append(key)
+        self._matrix[row] = unit
+
+    def update_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        """Add or replace several phase vectors."""
+        for key, vector in items:
+            self.update(key, vector)
+
+    def remove(self, key: str) -> None:
+        """Remove a key; the last row moves into its place."""
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self.keys) - 1
+        if row != last:
+            moved = self.keys[last]
+            self._matrix[row] = self._matrix[last]
+            self.keys[row] = moved
+            self.rows[moved] = row
+        self.keys.pop()
+        self._matrix[last] = 0.0
+
+    def _top(self, similarities: np.ndarray, k: int, exclude: Optional[int]) -> List[Tuple[str, float]]:
+        """Get the k highest similarities of one row of scores."""
+        if exclude is not None:
+            similarities = similarities.copy()
+            similarities[exclude] = -np.inf
+        count = len(similarities) - (1 if exclude is not None else 0)
+        k = min(k, count)
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top], kind="stable")]
+        return [(self.keys[row], float(similarities[row])) for row in top]
+
+    def most_aligned(self, query, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Find the keys whose phase is most aligned with a query.
+
+        Args:
+            query: A stored key, whose own entry is excluded, or a phase vector
+            k: Number of results
+
+        Returns:
+            (key, cosine similarity) pairs, most aligned first
+        """
+        if isinstance(query, str):
+            if query not in self.rows:
+                raise ValueError(f"Phase vector for {query} not found")
+            exclude = self.rows[query]
+            unit = self._matrix[exclude]
+        else:
+            exclude = None
+            unit = self._normalize(query)
+        return self._top(self.vectors @ unit, k, exclude)
+
+    def most_aligned_batch(self, keys: Sequence[str], k: int = 5) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Find the most aligned keys for several stored keys with one matrix product.
+
+        Args:
+            keys: Stored keys to query
+            k: Number of results per key
+
+        Returns:
+            Mapping of each key to its (key, cosine similarity) pairs, most aligned first
+        """
+        rows = [self.rows[key] for key in keys]
+        vectors = self.vectors
+        similarities = vectors[rows] @ vectors.T
+        return {key: self._top(similarities[index], k, row) for index, (key, row) in enumerate(zip(keys, rows))}
+
+    def alignments(self) -> Dict[str, float]:
+        """
+        Compute every key's phase alignment ψ: its mean cosine similarity with all other keys.
+
+        Uses the sum of all unit vectors, so the cost is O(keys × dimensions)
+        rather than pairwise.
+
+        Returns:
+            Mapping of each key to its alignment; 1.0 for a lone key
+        """
+        count = len(self.keys)
+        if count < 2:
+            return {key: 1.0 for key in self.keys}
+        vectors = self.vectors
+        own = np.einsum("ij,ij->i", vectors, vectors)
+        scores = (vectors @ vectors.sum(axis=0) - own) / (count - 1)
+        return dict(zip(self.keys, scores.tolist()))
@@ -11,14 +11,28 @@ from typing import Dict, List, Optional, Tuple, Union, Any
 from dataclasses import dataclass, field
 from enum import Enum
 import time
+from collections import deque
 import json
+import os
 
-from recursive_prompting.shells.base import Shell
+from recursive_prompting.shells.base import (
+    PromptCache,
+    PromptRequest,
+    ResponseAnalysis,
+    ResponseStream,
+    Shell,
+    ShellRegistry,
+    advance_mastery,
+    estimate_tokens,
+    truncate_to_tokens,
+    shell_registry as default_shell_registry
+)
 from recursive_prompting.levels.base import Level
 from recursive_prompting.residue.analyzer import ResidueAnalyzer
 from recursive_prompting.residue.catalog import ResidueCatalog
 from recursive_prompting.metrics.depth_score import calculate_depth_score
 from recursive_prompting.metrics.beverly_metrics import calculate_beverly_band
+from recursive_prompting.metrics.rollups import MetricRollups
 from recursive_prompting.utils.logging import setup_logger
 from recursive_prompting.models.interaction import Interaction, RecursiveStep
 from recursive_prompting.models.shell_model import ShellInstance
@@ -34,7 +48,7 @@ class RecursiveCoherenceMetrics:
         self.feedback_responsiveness = 1.0  # F(r) - ability to integrate contradiction
         self.bounded_integrity = 1.0  # B(r) - identity consistency
         self.tension_capacity = 100.0  # τ(r) - contradiction buffer
-        self.phase_vector = [1.0, 0.0, 0.0, 0.0]  # Default phase direction
+        self.phase_vector = [0.0, 0.0, 0.0, 0.0]  # Direction of the latest step's motion
         self.coherence_motion = 0.0  # ΔΦ'(r) - change in coherence
         self.beverly_band = 0.8  # B_β(r) - stability envelope
         self.phase_alignment = 1.0  # ψ(r,t) - alignment with other systems
@@ -49,17 +63,31 @@ class RecursiveCoherenceMetrics:
     def update_from_interaction(self, 
                                prompt: str, 
                                response: str, 
-                               previous_metrics: Optional['RecursiveCoherenceMetrics'] = None) -> None:
-        """Update metrics based on latest interaction."""
-        # This is a simplified implementation - in practice, these would be
-        # calculated using more sophisticated analysis of the interaction content
+                               previous_metrics: Optional['RecursiveCoherenceMetrics'] = None,
+                               content_scores: Optional[Dict[str, float]] = None) -> None:
+        """
+        Update metrics based on latest interaction.
+        
+        If content_scores are given (from a ContentCoherenceScorer), they set
+        signal alignment, feedback responsiveness and bounded integrity;
+        otherwise these follow a fixed decay.
+        
+        The phase vector is the step's motion through (S, F, B, τ) space
+        from the previous step, or from the initial values on the first
+        step, with τ scaled by its initial capacity. Without content scores
+        every interaction follows the same decay, so their phases align.
+        """
+        if content_scores is not None:
+            self.signal_alignment = content_scores["signal_alignment"]
+            self.feedback_responsiveness = content_scores["feedback_responsiveness"]
+            self.bounded_integrity = content_scores["bounded_integrity"]
         
         if previous_metrics:
-            # Simulate changes based on interaction
-            # In a full implementation, these would analyze the content
-            self.signal_alignment = min(1.0, previous_metrics.signal_alignment * 0.95 + 0.03)
-            self.feedback_responsiveness = min(1.0, previous_metrics.feedback_responsiveness * 0.97 + 0.02)
-            self.bounded_integrity = min(1.0, previous_metrics.bounded_integrity * 0.98 + 0.01)
+            if content_scores is None:
+                # Simulate changes based on interaction
+                self.signal_alignment = min(1.0, previous_metrics.signal_alignment * 0.95 + 0.03)
+                self.feedback_responsiveness = min(1.0, previous_metrics.feedback_responsiveness * 0.97 + 0.02)
+                self.bounded_integrity = min(1.0, previous_metrics.bounded_integrity * 0.98 + 0.01)
             
             # Tension capacity decreases with each interaction unless explicitly regenerated
             self.tension_capacity = max(0.1, previous_metrics.tension_capacity - 5.0)
@@ -85,6 +113,15 @@ class RecursiveCoherenceMetrics:
                 self.bounded_integrity,
                 1.0  # Energy mass placeholder
             )
+        
+        initial = RecursiveCoherenceMetrics()
+        start = previous_metrics or initial
+        self.phase_vector = [
+            self.signal_alignment - start.signal_alignment,
+            self.feedback_responsiveness - start.feedback_responsiveness,
+            self.bounded_integrity - start.bounded_integrity,
+            (self.tension_capacity - start.tension_capacity) / initial.tension_capacity
+        ]
     
     def is_stable(self) -> bool:
         """Determine if the system is stable under recursive strain."""
@@ -103,12 +140,26 @@ class InteractionMetrics:
         self.shell_mastery = {}
         self.coherence_metrics = RecursiveCoherenceMetrics()
         self.previous_metrics = []  # Track metrics history
+        self.prompt_tokens = []  # Estimated tokens of each generated prompt
+        self.tokens_saved = []  # Tokens saved by the prompt token budget at each step
+        self.response_tokens = []  # Estimated tokens of each response
+        self.response_sentences = []  # Sentence count of each response
+        self.novel_residue_patterns = []  # Residue patterns first expressed in a novel snippet
+        self.novel_residue_count = 0
     
     def update(self, 
                step: RecursiveStep,
                shell: Shell,
-               extracted_residue: List[str]) -> None:
-        """Update metrics based on a recursive step."""
+               extracted_residue: List[str],
+               content_scores: Optional[Dict[str, float]] = None,
+               mastery_store: Optional[Any] = None,
+               player_id: Optional[str] = None) -> None:
+        """
+        Update metrics based on a recursive step and, optionally, content-based coherence scores.
+        
+        If a mastery store and player are given, the step also counts
+        towards the player's mastery of the shell across interactions.
+        """
         # Store previous metrics for tracking
         prev_metrics = None
         if self.previous_metrics:
@@ -119,7 +170,8 @@ class InteractionMetrics:
         new_metrics.update_from_interaction(
             step.prompt,
             step.response,
-            prev_metrics
+            prev_metrics,
+            content_scores
         )
         
         # Update metrics
@@ -128,12 +180,9 @@ class InteractionMetrics:
         
         # Update shell mastery
         shell_id = shell.id
-        if shell_id not in self.shell_mastery:
-            self.shell_mastery[shell_id] = 0.2  # Starting mastery
-        else:
-            # Increment mastery with diminishing returns
-            current = self.shell_mastery[shell_id]
-            self.shell_mastery[shell_id] = min(1.0, current + (0.1 * (1.0 - current)))
+        self.shell_mastery[shell_id] = advance_mastery(self.shell_mastery.get(shell_id))
+        if mastery_store is not None and player_id is not None:
+            mastery_store.record(player_id, shell_id)
         
         # Calculate depth score
         self.depth_score = calculate_depth_score(self.recursive_depth, shell.level.value)
@@ -142,6 +191,16 @@ class InteractionMetrics:
         self.coherence_metrics = new_metrics
         self.previous_metrics.append(new_metrics)
     
+    def record_response(self, analysis: Dict[str, Any]) -> None:
+        """Record the size features of a response analysis."""
+        self.response_tokens.append(analysis["response_tokens"])
+        self.response_sentences.append(analysis["sentence_count"])
+    
+    def record_prompt(self, prompt: str, tokens_saved: int = 0) -> None:
+        """Record the size of a generated prompt and the tokens its budget saved."""
+        self.prompt_tokens.append(estimate_tokens(prompt))
+        self.tokens_saved.append(tokens_saved)
+    
     def get_summary(self) -> Dict[str, Any]:
         """Get a summary of current metrics."""
         return {
@@ -151,10 +210,101 @@ class InteractionMetrics:
             "shell_mastery": self.shell_mastery,
             "coherence": self.coherence_metrics.calculate_coherence(),
             "beverly_band": self.coherence_metrics.beverly_band,
-            "is_stable": self.coherence_metrics.is_stable()
+            "is_stable": self.coherence_metrics.is_stable(),
+            "prompt_tokens": sum(self.prompt_tokens),
+            "tokens_saved": sum(self.tokens_saved),
+            "tokens_saved_per_step": list(self.tokens_saved),
+            "response_tokens": sum(self.response_tokens),
+            "response_sentences": sum(self.response_sentences),
+            "novel_residue_count": self.novel_residue_count,
+            "novel_residue_patterns": list(self.novel_residue_patterns)
         }
 
 
+class HistoryWindow:
+    """
+    Bounded conversation history for an interaction.
+    
+    The most recent steps are kept verbatim (each shortened to a token
+    limit), and older steps are summarized by an extractive digest of the
+    insight sentences the shell selected from their responses. Each step
+    is added once and the payload is re-rendered only after a change, so
+    producing the history costs O(1) amortized per step and its size is
+    bounded by the window and digest sizes.
+    """
+    
+    def __init__(self, 
+                window_size: int = 4, 
+                digest_size: int = 8, 
+                step_tokens: int = 200):
+        """
+        Initialize an empty history window.
+        
+        Args:
+            window_size: Number of recent steps kept verbatim
+            digest_size: Maximum number of sentences in the digest of older steps
+            step_tokens: Token limit for each prompt and response in the window
+        """
+        self.window_size = window_size
+        self.step_tokens = step_tokens
+        self.recent = deque()  # (depth, prompt, response, insights) of the latest steps
+        self.digest = deque(maxlen=digest_size)  # Insight sentences of older steps, oldest first
+        self.digested = set()  # Sentences currently in the digest
+        self.steps_added = 0
+        self._payload = None
+    
+    def add_step(self, 
+                depth: int, 
+                prompt: str, 
+                response: str, 
+                insights: Optional[List[str]] = None) -> None:
+        """
+        Add a completed step, moving the oldest one into the digest if the window is full.
+        
+        A step with the same depth as the latest one, such as a step
+        answered again, replaces it.
+        
+        Args:
+            depth: Depth of the step
+            prompt: The step's prompt
+            response: The response to the prompt
+            insights: Sentences the shell selected from the response (optional)
+        """
+        if self.recent and self.recent[-1][0] == depth:
+            self.recent.pop()
+        else:
+            self.steps_added += 1
+        self.recent.append((
+            depth,
+            truncate_to_tokens(prompt, self.step_tokens),
+            truncate_to_tokens(response, self.step_tokens),
+            list(insights or [])
+        ))
+        
+        if len(self.recent) > self.window_size:
+            _, _, _, old_insights = self.recent.popleft()
+            for sentence in old_insights:
+                if sentence in self.digested:
+                    continue
+                if len(self.digest) == self.digest.maxlen:
+                    self.digested.discard(self.digest[0])
+                self.digest.append(sentence)
+                self.digested.add(sentence)
+        
+        self._payload = None
+    
+    def render(self) -> str:
+        """Get the history payload: the digest of older steps followed by the recent steps."""
+        if self._payload is None:
+            parts = []
+            if self.digest:
+                parts.append("Earlier insights:\n" + "\n".join(f"- {sentence}" for sentence in self.digest))
+            for depth, prompt, response, _ in self.recent:
+                parts.append(f"[Depth {depth}] Prompt:\n{prompt}\n\n[Depth {depth}] Response:\n{response}")
+            self._payload = "\n\n".join(parts)
+        return self._payload
+
+
 class RecursiveEngine:
     """
     Core engine for managing recursive prompting interactions.
@@ -168,24 +318,138 @@ class RecursiveEngine:
     
     def __init__(self, 
                 residue_catalog: Optional[ResidueCatalog] = None,
-                config: Optional[Dict[str, Any]] = None):
+                config: Optional[Dict[str, Any]] = None,
+                shell_registry: Optional[ShellRegistry] = None,
+                residue_analyzer: Optional[Any] = None):
         """
         Initialize the recursive engine.
         
         Args:
             residue_catalog: Catalog of known symbolic residue patterns
             config: Configuration options for the engine
+            shell_registry: Registry used to resolve shell IDs (defaults to the global registry)
+            residue_analyzer: Object providing extract_residue(prompt, response), such as
+                a ResidueExtractor compiled from the catalog signatures (defaults to a
+                ResidueAnalyzer over residue_catalog)
         """
         self.interactions = {}
-        self.residue_analyzer = ResidueAnalyzer(residue_catalog or ResidueCatalog())
+        self.residue_catalog = residue_catalog or ResidueCatalog()
+        self.residue_analyzer = residue_analyzer or ResidueAnalyzer(self.residue_catalog)
         self.config = config or {}
+        self.shell_registry = shell_registry or default_shell_registry
         self.active_shells = {}
+        self.response_streams = {}  # Interaction ID -> ResponseStream for responses in flight
+        self.interaction_shells = {}  # Interaction ID -> ShellInstance holding the shell context
+        self.interaction_players = {}  # Interaction ID -> ID of the player it belongs to
+        
+        # Opt-in memoization of generated prompts for retries and replays
+        prompt_cache_size = self.config.get("prompt_cache_size", 0)
+        self.prompt_cache = PromptCache(prompt_cache_size) if prompt_cache_size else None
+        
+        # Optional cap on estimated prompt tokens. It reaches shells as
+        # context["token_budget"]; shells that shorten a prompt to fit report
+        # the tokens saved in context["tokens_saved"].
+        self.token_budget = self.config.get("prompt_token_budget")
+        
+        # Times emergent residue patterns were promoted into the catalog
+        self.residue_promotions = 0
+        
+        # Opt-in content-addressed cache of response analyses, optionally
+        # persisted in an SQLite file shared by worker processes. Entries are
+        # keyed by the catalog version, so caching needs one.
+        analysis_cache_size = self.config.get("analysis_cache_size", 0)
+        self.analysis_cache = None
+        if analysis_cache_size:
+            if self._catalog_version() is None:
+                logger.warning("Analysis cache disabled: the residue analyzer has no version "
+                               "and no residue_catalog_version is configured")
+            else:
+                from recursive_prompting.residue.cache import AnalysisCache
+                self.analysis_cache = AnalysisCache(analysis_cache_size, self.config.get("analysis_cache_path"))
+        
+        # Rolling history payloads, built on first request and then kept up to date
+        self.histories = {}  # Interaction ID -> HistoryWindow
+        
+        # Per-(shell, level) dashboard aggregates, kept up to date as interactions progress
+        self.metric_rollups = MetricRollups()
+        
+        # Shell mastery per (player, shell) across interactions, persisted
+        # every mastery_flush_interval updates if mastery_store_path is set;
+        # otherwise created when the first player is bound
+        self.mastery_store = None
+        mastery_path = self.config.get("mastery_store_path")
+        if mastery_path:
+            from recursive_prompting.metrics.mastery import MasteryStore
+            mastery_flush_interval = self.config.get("mastery_flush_interval", 100)
+            if os.path.exists(mastery_path):
+                self.mastery_store = MasteryStore.load(mastery_path, mastery_flush_interval)
+            else:
+                self.mastery_store = MasteryStore(path=mastery_path, flush_interval=mastery_flush_interval)
+        
+        # Opt-in coherence scoring from the step text instead of fixed decay
+        self.coherence_scorer = None
+        if self.config.get("content_coherence"):
+            from recursive_prompting.metrics.coherence_scoring import ContentCoherenceScorer
+            self.coherence_scorer = ContentCoherenceScorer(
+                dimensions=self.config.get("content_coherence_dimensions", 4096)
+            )
+        
+        # Opt-in index of interaction phase vectors for alignment search (requires NumPy)
+        self.phase_index = None
+        if self.config.get("phase_index"):
+            from recursive_prompting.metrics.phase_index import PhaseIndex
+            self.phase_index = PhaseIndex()
+        
+        # Opt-in residue co-occurrence, transition and shell/depth frequency
+        # matrices across all interactions, updated as residue is extracted
+        self.residue_matrices = None
+        if self.config.get("residue_analytics"):
+            from recursive_prompting.metrics.residue_metrics import ResidueMatrices
+            self.residue_matrices = ResidueMatrices()
+        
+        # Opt-in MinHash LSH index of all responses, to tell novel responses
+        # from near-duplicates of earlier ones
+        self.novelty_index = None
+        near_duplicate_threshold = self.config.get("near_duplicate_threshold")
+        if near_duplicate_threshold is not None:
+            from recursive_prompting.residue.novelty import NearDuplicateIndex
+            index_path = self.config.get("near_duplicate_index_path")
+            if index_path and os.path.exists(index_path):
+                self.novelty_index = NearDuplicateIndex.load(index_path, near_duplicate_threshold)
+            else:
+                self.novelty_index = NearDuplicateIndex(
+                    near_duplicate_threshold, self.config.get("near_duplicate_num_perm", 128)
+                )
+        
+        # Opt-in discovery of recurring phrases that could become residue patterns,
+        # in memory fixed by the sketch size
+        self.phrase_discovery = None
+        if self.config.get("residue_discovery"):
+            from recursive_prompting.residue.discovery import PhraseDiscovery
+            known_signatures = getattr(self.residue_analyzer, "signatures", {})
+            self.phrase_discovery = PhraseDiscovery(
+                min_count=self.config.get("residue_discovery_min_count", 20),
+                min_burst=self.config.get("residue_discovery_min_burst", 2.0),
+                window=self.config.get("residue_discovery_window", 1000),
+                known_terms=(term for terms in known_signatures.values() for term in terms)
+            )
+        
+        # Opt-in fleet-wide coherence statistics per shell and level; register
+        # alert hooks with coherence_monitor.add_alert_hook
+        self.coherence_monitor = None
+        if self.config.get("coherence_monitoring"):
+            from recursive_prompting.metrics.coherence_stats import CoherenceMonitor
+            self.coherence_monitor = CoherenceMonitor(
+                check_interval=self.config.get("coherence_check_interval", 500),
+                shift_threshold=self.config.get("coherence_shift_threshold", 1.0)
+            )
         logger.info("Recursive Engine initialized")
     
     def start_interaction(self, 
                          shell: Union[Shell, str],
                          initial_prompt: str,
-                         level: Level) -> Interaction:
+                         level: Level,
+                         player_id: Optional[str] = None) -> Interaction:
         """
         Start a new recursive interaction.
         
@@ -193,6 +457,7 @@ class RecursiveEngine:
             shell: The recursive shell to use (or shell ID)
             initial_prompt: The starting prompt for the interaction
             level: The level at which to begin the interaction
+            player_id: Player whose shell mastery the interaction counts towards (optional)
             
         Returns:
             An Interaction object that can be used to continue the recursive process
@@ -228,21 +493,61 @@ class RecursiveEngine:
         
         # Store interaction
         self.interactions[interaction_id] = interaction
+        if player_id is not None:
+            self._bind_player(interaction_id, player_id)
+        self._bind_shell(interaction)
+        self.metric_rollups.record_start(interaction_id, shell_instance.shell.id, level.name)
         logger.info(f"Started interaction {interaction_id} with shell {shell_instance.shell.id}")
         
         return interaction
     
     def _load_shell(self, shell_id: str) -> ShellInstance:
         """Load a shell by ID if not already loaded."""
-        if shell_id in self.active_shells:
-            return self.active_shells[shell_id]
+        shell_instance = self.active_shells.get(shell_id)
+        if shell_instance is not None:
+            return shell_instance
+        
+        # The registry resolves the shell class lazily through the shell factory
+        shell = self.shell_registry.get_shell(shell_id)
+        shell_instance = ShellInstance(shell)
+        self.active_shells[shell_id] = shell_instance
+        return shell_instance
+    
+    def _bind_player(self, interaction_id: str, player_id: str) -> None:
+        """Count an interaction's steps towards a player's shell mastery."""
+        self.interaction_players[interaction_id] = player_id
+        if self.mastery_store is None:
+            from recursive_prompting.metrics.mastery import MasteryStore
+            self.mastery_store = MasteryStore()
+    
+    def _bind_shell(self, interaction: Interaction) -> ShellInstance:
+        """
+        Create the interaction's shell instance and build its context.
         
-        # In a real implementation, this would load the shell from a registry
-        # Here we just simulate loading a basic shell
-        from recursive_prompting.shells.foundation.coinflux_seed import CoinfluxSeedShell
-        shell = CoinfluxSeedShell()
+        The context starts from the initial prompt and, if the current step
+        already has a response, is brought up to date with it.
+        """
+        shell = interaction.shell
+        # Steps reach the mastery store through InteractionMetrics.update
+        # only, so the instance is not bound to it
         shell_instance = ShellInstance(shell)
-        self.active_shells[shell_id] = shell_
+        shell_instance.state.update(shell.create_context(interaction.steps[0].prompt))
+        if self.token_budget is not None:
+            shell_instance.state["token_budget"] = self.token_budget
+        
+        last_step = interaction.steps[-1]
+        if last_step.response:
+            shell.update_context(shell_instance.state, last_step.response)
+        
+        self.interaction_shells[interaction.id] = shell_instance
+        return shell_instance
+    
+    def _get_shell_instance(self, interaction_id: str) -> ShellInstance:
+        """Get the interaction's shell instance, binding the shell if needed."""
+        shell_instance = self.interaction_shells.get(interaction_id)
+        interaction = self.interactions[interaction_id]
+        if shell_instance is None or shell_instance.shell is not interaction.shell:
+            shell_instance = self._bind_shell(interaction)
         return shell_instance
     
     def next_recursive_step(self, interaction_id: str) -> RecursiveStep:
@@ -261,37 +566,179 @@ class RecursiveEngine:
         if interaction_id not in self.interactions:
             raise ValueError(f"Interaction {interaction_id} not found")
         
-        interaction = self.interactions[interaction_id]
-        if not interaction.steps[-1].response:
-            raise ValueError("Previous step requires a response before continuing")
+        return self._append_next_step(interaction_id)
+    
+    def next_recursive_steps(self, 
+                            interaction_ids: List[str]) -> List[Union[RecursiveStep, Exception]]:
+        """
+        Generate the next step for many interactions at once.
         
-        # Get shell
-        shell = interaction.shell
+        Interactions are grouped by shell and each group is generated with a
+        single Shell.generate_next_prompts call. Failures are reported per
+        item: the result for an interaction that can't continue is the
+        exception instead of a step.
         
-        # Generate next prompt using the shell
+        Args:
+            interaction_ids: IDs of the interactions to continue
+            
+        Returns:
+            A RecursiveStep or exception for each interaction, in input order
+        """
+        results = [None] * len(interaction_ids)
+        groups = {}  # id(shell) -> (shell, [(index, interaction_id, request)])
+        seen = set()
+        
+        for index, interaction_id in enumerate(interaction_ids):
+            try:
+                if interaction_id in seen:
+                    raise ValueError(f"Interaction {interaction_id} appears more than once in batch")
+                seen.add(interaction_id)
+                
+                if interaction_id not in self.interactions:
+                    raise ValueError(f"Interaction {interaction_id} not found")
+                
+                request = self._prompt_request(interaction_id)
+            except Exception as e:
+                results[index] = e
+                continue
+            
+            shell = self.interactions[interaction_id].shell
+            groups.setdefault(id(shell), (shell, []))[1].append((index, interaction_id, request))
+        
+        for shell, items in groups.values():
+            prompts = self._generate_prompts(shell, [request for _, _, request in items])
+            
+            for (index, interaction_id, request), prompt in zip(items, prompts):
+                if isinstance(prompt, Exception):
+                    results[index] = prompt
+                else:
+                    prompt, tokens_saved = prompt
+                    try:
+                        results[index] = self._append_step(interaction_id, prompt, request.depth, tokens_saved)
+                    except Exception as e:
+                        results[index] = e
+        
+        logger.info(f"Generated next steps for {len(interaction_ids)} interactions "
+                    f"across {len(groups)} shells")
+        return results
+    
+    def _generate_prompts(self, 
+                         shell: Shell, 
+                         requests: List[PromptRequest]) -> List[Union[Tuple[str, int], Exception]]:
+        """
+        Generate a batch of prompts with one shell, serving what it can from the prompt cache.
+        
+        Each result is a (prompt, tokens_saved) tuple or the exception raised for it.
+        """
+        results = [None] * len(requests)
+        keys = [None] * len(requests)
+        pending = []  # Indices of requests the shell has to generate
+        duplicates = {}  # Pending index -> later indices in the batch with the same key
+        pending_keys = {}  # Cache key -> pending index
+        
+        for index, request in enumerate(requests):
+            if self.prompt_cache is not None:
+                key = keys[index] = self.prompt_cache.key(shell, request)
+                if key is not None:
+                    if key in pending_keys:
+                        duplicates[pending_keys[key]].append(index)
+                        continue
+                    results[index] = self.prompt_cache.get(key)
+                    if results[index] is None:
+                        pending_keys[key] = index
+                        duplicates[index] = []
+            if results[index] is None:
+                pending.append(index)
+        
+        if pending:
+            try:
+                prompts = list(shell.generate_next_prompts([requests[index] for index in pending]))
+            except Exception as e:
+                prompts = [e] * len(pending)
+            if len(prompts) < len(pending):
+                missing = ValueError(f"Shell {shell.id} returned {len(prompts)} prompts "
+                                     f"for {len(pending)} requests")
+                prompts.extend([missing] * (len(pending) - len(prompts)))
+            
+            for index, prompt in zip(pending, prompts):
+                if not isinstance(prompt, Exception):
+                    prompt = (prompt, requests[index].context.pop("tokens_saved", 0))
+                results[index] = prompt
+                for duplicate in duplicates.get(index, ()):
+                    results[duplicate] = prompt
+                if keys[index] is not None and not isinstance(prompt, Exception):
+                    self.prompt_cache.put(keys[index], prompt)
+        
+        return results
+    
+    def _prompt_request(self, interaction_id: str) -> PromptRequest:
+        """Collect the inputs for generating an interaction's next prompt."""
+        interaction = self.interactions[interaction_id]
         last_step = interaction.steps[-1]
-        next_depth = last_step.depth + 1
+        if not last_step.response:
+            raise ValueError("Previous step requires a response before continuing")
         
-        # Apply shell's recursive pattern to generate next prompt
-        next_prompt = shell.generate_next_prompt(
+        shell_instance = self._get_shell_instance(interaction_id)
+        return PromptRequest(
+            context=shell_instance.state,
             previous_prompt=last_step.prompt,
             previous_response=last_step.response,
-            depth=next_depth,
+            depth=last_step.depth + 1,
             residue=interaction.extracted_residue
         )
+    
+    def _append_next_step(self, interaction_id: str) -> RecursiveStep:
+        """Generate the next prompt from the shell context and append it as a new step."""
+        request = self._prompt_request(interaction_id)
+        shell = self.interactions[interaction_id].shell
+        
+        # Serve retries and replays from the prompt cache when enabled
+        cache_key = None
+        if self.prompt_cache is not None:
+            cache_key = self.prompt_cache.key(shell, request)
+            if cache_key is not None:
+                cached = self.prompt_cache.get(cache_key)
+                if cached is not None:
+                    cached_prompt, tokens_saved = cached
+                    return self._append_step(interaction_id, cached_prompt, request.depth, tokens_saved)
+        
+        # Apply shell's recursive pattern to generate next prompt
+        next_prompt = shell.generate_next_prompt_in_context(
+            context=request.context,
+            previous_prompt=request.previous_prompt,
+            previous_response=request.previous_response,
+            depth=request.depth,
+            residue=request.residue
+        )
+        
+        tokens_saved = request.context.pop("tokens_saved", 0)
+        
+        if cache_key is not None:
+            self.prompt_cache.put(cache_key, (next_prompt, tokens_saved))
+        
+        return self._append_step(interaction_id, next_prompt, request.depth, tokens_saved)
+    
+    def _append_step(self, 
+                    interaction_id: str, 
+                    prompt: str, 
+                    depth: int, 
+                    tokens_saved: int = 0) -> RecursiveStep:
+        """Append a generated prompt to an interaction as its next step."""
+        interaction = self.interactions[interaction_id]
+        interaction.metrics.record_prompt(prompt, tokens_saved)
         
         # Create next step
         next_step = RecursiveStep(
-            prompt=next_prompt,
+            prompt=prompt,
             response=None,
-            depth=next_depth,
-            shell_id=shell.id
+            depth=depth,
+            shell_id=interaction.shell.id
         )
         
         # Add to interaction
         interaction.steps.append(next_step)
         
-        logger.info(f"Generated next step for interaction {interaction_id} at depth {next_depth}")
+        logger.info(f"Generated next step for interaction {interaction_id} at depth {depth}")
         return next_step
     
     def add_response(self, 
@@ -310,29 +757,278 @@ class RecursiveEngine:
         if interaction_id not in self.interactions:
             raise ValueError(f"Interaction {interaction_id} not found")
         
+        self._record_response(interaction_id, response)
+    
+    def _record_response(self, 
+                        interaction_id: str, 
+                        response: str, 
+                        stream: Optional[ResponseStream] = None) -> None:
+        """Record a response, extract its residue and update metrics and shell context."""
         interaction = self.interactions[interaction_id]
         current_step = interaction.steps[-1]
+        shell_instance = self._get_shell_instance(interaction_id)
         
         # Update step with response
         current_step.response = response
         
-        # Extract residue
-        extracted_residue = self.residue_analyzer.extract_residue(
-            prompt=current_step.prompt,
-            response=response
-        )
+        # Analyze the text once for the shell, residue extraction and metrics
+        response_analysis = ResponseAnalysis(response)
+        
+        # Update the shell context with this response only
+        interaction.shell.update_context(shell_instance.state, response, stream, response_analysis)
+        
+        history = self.histories.get(interaction_id)
+        if history is not None:
+            history.add_step(current_step.depth, current_step.prompt, response, 
+                             shell_instance.state.get("insights"))
+        
+        # Extract residue and response features, or reuse them for a repeated response
+        analysis = self._analyze_response(current_step.prompt, response_analysis)
+        extracted_residue = list(analysis["residue"])
         interaction.extracted_residue.extend(extracted_residue)
+        interaction.metrics.record_response(analysis)
+        if self.novelty_index is not None:
+            self._index_novelty(interaction, current_step.depth, response_analysis, extracted_residue)
+        if self.phrase_discovery is not None:
+            self.phrase_discovery.observe(response_analysis)
+        if self.residue_matrices is not None:
+            self.residue_matrices.record(interaction_id, interaction.shell.id, 
+                                         current_step.depth, extracted_residue)
+        
+        content_scores = None
+        if self.coherence_scorer is not None:
+            content_scores = self.coherence_scorer.score_step(
+                interaction_id, current_step.prompt, response_analysis
+            )
         
         # Update metrics
         interaction.metrics.update(
             step=current_step,
             shell=interaction.shell,
-            extracted_residue=extracted_residue
+            extracted_residue=extracted_residue,
+            content_scores=content_scores,
+            mastery_store=self.mastery_store,
+            player_id=self.interaction_players.get(interaction_id)
         )
+        self.metric_rollups.record_step(interaction_id, interaction.shell.id, interaction.level.name,
+                                        interaction.metrics.depth_score, len(extracted_residue))
+        if self.phase_index is not None:
+            self.phase_index.update(interaction_id, interaction.metrics.coherence_metrics.phase_vector)
+        if self.coherence_monitor is not None:
+            self.coherence_monitor.observe(interaction_id, interaction.shell.id, 
+                                           interaction.level.name, 
+                                           interaction.metrics.coherence_metrics)
         
         logger.info(f"Added response to interaction {interaction_id} at depth {current_step.depth}")
         logger.info(f"Extracted {len(extracted_residue)} residue patterns")
     
+    def _index_novelty(self, 
+                       interaction: Interaction, 
+                       depth: int, 
+                       response: ResponseAnalysis, 
+                       extracted_residue: List[str]) -> None:
+        """
+        Index a response and its residue snippets in the near-duplicate index.
+        
+        A residue pattern's snippet is the response sentences containing its
+        signature terms, or the whole response if the analyzer has no
+        signatures. A pattern counts as novel the first time it appears in
+        the interaction with a snippet unlike any indexed before, so
+        repeating the same patterns or phrasing earns nothing.
+        """
+        step_key = f"{interaction.id}:{depth}"
+        self.novelty_index.add(step_key, response)
+        
+        metrics = interaction.metrics
+        signatures = getattr(self.residue_analyzer, "signatures", None)
+        for pattern_id in dict.fromkeys(extracted_residue):
+            if pattern_id in metrics.novel_residue_patterns:
+                continue
+            if signatures is None:
+                snippet = response.lowered
+            else:
+                terms = [term.lower() for term in signatures.get(pattern_id, ()) if term]
+                snippet = " ".join(
+                    sentence for sentence in response.lowered_sentences
+                    if any(term in sentence for term in terms)
+                )
+            if not snippet:
+                continue  # Only matched the prompt
+            
+            # The pattern ID keeps snippets of different patterns apart; the
+            # response and the other snippets of this step don't count
+            duplicates = [
+                key for key, _ in self.novelty_index.add(f"{step_key}:{pattern_id}", 
+                                                         f"{pattern_id} {snippet}")
+                if key != step_key and not key.startswith(f"{step_key}:")
+            ]
+            if not duplicates:
+                metrics.novel_residue_patterns.append(pattern_id)
+        metrics.novel_residue_count = len(metrics.novel_residue_patterns)
+    
+    def _analyze_response(self, prompt: str, response: ResponseAnalysis) -> Dict[str, Any]:
+        """
+        Extract the residue and size features of a response.
+        
+        Features come from the shared response analysis, and analyzers
+        that provide extract_residue_from_analysis reuse its lowercased
+        text instead of scanning the raw response again.
+        
+        With the analysis cache enabled, the result is keyed by the prompt,
+        the response and the residue catalog version from _catalog_version,
+        so byte-identical retries and replays skip extraction.
+        """
+        cache_key = None
+        if self.analysis_cache is not None:
+            cache_key = self.analysis_cache.key(prompt, response.text, self._catalog_version())
+            analysis = self.analysis_cache.get(cache_key)
+            if analysis is not None:
+                return analysis
+        
+        extract_from_analysis = getattr(self.residue_analyzer, "extract_residue_from_analysis", None)
+        if extract_from_analysis is not None:
+            residue = extract_from_analysis(prompt, response)
+        else:
+            residue = self.residue_analyzer.extract_residue(prompt=prompt, response=response.text)
+        
+        analysis = {
+            "residue": residue,
+            "response_tokens": response.token_estimate,
+            "sentence_count": len(response.sentences)
+        }
+        
+        if cache_key is not None:
+            self.analysis_cache.put(cache_key, analysis)
+        return analysis
+    
+    def _catalog_version(self) -> Optional[Any]:
+        """
+        Get the version of the residue catalog used for extraction.
+        
+        The analyzer's own version attribute, which changes whenever its
+        signatures do, takes precedence over the "residue_catalog_version"
+        config option. None if neither is available. After emergent
+        patterns are promoted, the version is paired with the number of
+        promotions, since a configured version doesn't follow the catalog.
+        """
+        version = getattr(self.residue_analyzer, "version", None)
+        if version is None:
+            version = self.config.get("residue_catalog_version")
+        if version is not None and self.residue_promotions:
+            return (version, self.residue_promotions)
+        return version
+    
+    def feed(self, interaction_id: str, chunk: str) -> None:
+        """
+        Add a chunk of a streamed response to the current step.
+        
+        Sentences are segmented and passed to the shell's stream consumer
+        as they complete, so response analysis overlaps with generation.
+        
+        Args:
+            interaction_id: The ID of the interaction
+            chunk: The next piece of response text
+            
+        Raises:
+            ValueError: If the interaction doesn't exist
+        """
+        if interaction_id not in self.interactions:
+            raise ValueError(f"Interaction {interaction_id} not found")
+        
+        stream = self.response_streams.get(interaction_id)
+        if stream is None:
+            shell = self.interactions[interaction_id].shell
+            stream = ResponseStream(shell.create_stream_consumer())
+            self.response_streams[interaction_id] = stream
+        
+        stream.feed(chunk)
+    
+    def finish(self, 
+              interaction_id: str, 
+              generate_next: bool = True) -> Optional[RecursiveStep]:
+        """
+        Complete a streamed response and prepare the next step.
+        
+        The full response is recorded as with add_response, and the next
+        prompt is generated from the analysis done while streaming.
+        
+        Args:
+            interaction_id: The ID of the interaction
+            generate_next: Whether to generate the next step immediately
+            
+        Returns:
+            The next RecursiveStep, or None if generate_next is False
+            
+        Raises:
+            ValueError: If no streamed response is in progress for the interaction
+        """
+        stream = self.response_streams.pop(interaction_id, None)
+        if stream is None:
+            raise ValueError(f"No streamed response in progress for interaction {interaction_id}")
+        
+        if interaction_id not in self.interactions:
+            raise ValueError(f"Interaction {interaction_id} not found")
+        
+        self._record_response(interaction_id, stream.finish(), stream)
+        
+        if not generate_next:
+            return None
+        return self._append_next_step(interaction_id)
+    
+    def get_history(self, interaction_id: str) -> str:
+        """
+        Get the bounded conversation history to send with the next prompt.
+        
+        The first call builds the interaction's HistoryWindow from its
+        answered steps; afterwards each response updates it incrementally.
+        Window sizes come from the "history_window", "history_digest_size"
+        and "history_step_tokens" config options.
+        
+        Args:
+            interaction_id: The ID of the interaction
+            
+        Returns:
+            The history payload: a digest of older insights and the recent steps
+            
+        Raises:
+            ValueError: If the interaction doesn't exist
+        """
+        if interaction_id not in self.interactions:
+            raise ValueError(f"Interaction {interaction_id} not found")
+        
+        history = self.histories.get(interaction_id)
+        if history is None:
+            history = self._build_history(interaction_id)
+        return history.render()
+    
+    def _build_history(self, interaction_id: str) -> HistoryWindow:
+        """Build an interaction's history window from its answered steps."""
+        interaction = self.interactions[interaction_id]
+        history = HistoryWindow(
+            window_size=self.config.get("history_window", 4),
+            digest_size=self.config.get("history_digest_size", 8),
+            step_tokens=self.config.get("history_step_tokens", 200)
+        )
+        
+        # Replay responses through scratch contexts to recover the insights
+        # the shell of each step selected, so shell switches are respected
+        contexts = {}  # Shell ID -> (shell, scratch context)
+        for step in interaction.steps:
+            if not step.response:
+                continue
+            if step.shell_id not in contexts:
+                if step.shell_id == interaction.shell.id:
+                    shell = interaction.shell
+                else:
+                    shell = self._load_shell(step.shell_id).shell
+                contexts[step.shell_id] = (shell, shell.create_context(interaction.steps[0].prompt))
+            shell, context = contexts[step.shell_id]
+            shell.update_context(context, step.response)
+            history.add_step(step.depth, step.prompt, step.response, context.get("insights"))
+        
+        self.histories[interaction_id] = history
+        return history
+    
     def get_metrics(self, interaction_id: str) -> Dict[str, Any]:
         """
         Get metrics for an interaction.
@@ -371,6 +1067,99 @@ class RecursiveEngine:
         interaction = self.interactions[interaction_id]
         return interaction.extracted_residue
     
+    def promote_emergent_residue(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Promote discovered phrases to residue patterns.
+
+        Each candidate phrase becomes an "EMERGENT-..." pattern whose
+        signature is the phrase. The pattern is added to the residue catalog,
+        and a compiled residue extractor is recompiled to include it, so
+        later responses are credited with it.
+        
+        Phrases with the same pattern ID, such as "mirror-loop" and "mirror
+        loop", become one pattern with both signatures. Phrases whose ID is
+        already a residue pattern are not promoted, so existing patterns are
+        never overwritten. Each promotion changes the catalog version, so
+        cached analyses from before it aren't reused.
+
+        Args:
+            limit: Maximum number of phrases to promote (optional)
+
+        Returns:
+            IDs of the promoted residue patterns
+
+        Raises:
+            ValueError: If residue discovery is not enabled
+        """
+        if self.phrase_discovery is None:
+            raise ValueError("Residue discovery is not enabled")
+        
+        from recursive_prompting.residue.discovery import emergent_pattern_id
+        existing = set(getattr(self.residue_analyzer, "signatures", {}))
+        existing.update(getattr(self.residue_catalog, "patterns", {}))
+        signatures = {}
+        rejected = []
+        for candidate in self.phrase_discovery.candidates(limit):
+            phrase = candidate["phrase"]
+            pattern_id = emergent_pattern_id(phrase)
+            if pattern_id in existing:
+                rejected.append(phrase)
+            else:
+                signatures.setdefault(pattern_id, []).append(phrase)
+        if rejected:
+            logger.warning(f"Not promoting {len(rejected)} phrases whose residue pattern "
+                           f"already exists: {', '.join(rejected)}")
+            self.phrase_discovery.exclude(rejected)
+        if not signatures:
+            return []
+        
+        add_pattern = getattr(self.residue_catalog, "add_pattern", None)
+        if add_pattern is not None:
+            for pattern_id, terms in signatures.items():
+                add_pattern(pattern_id, terms)
+        with_signatures = getattr(self.residue_analyzer, "with_signatures", None)
+        if with_signatures is not None:
+            self.residue_analyzer = with_signatures(signatures)
+        self.residue_promotions += 1
+        
+        self.phrase_discovery.exclude(term for terms in signatures.values() for term in terms)
+        logger.info(f"Promoted {len(signatures)} emergent residue patterns")
+        return list(signatures)
+    
+    def rollups(self, 
+                shell_id: Optional[str] = None, 
+                level: Optional[Level] = None) -> List[Dict[str, Any]]:
+        """
+        Get aggregate metrics per (shell, level) group across all interactions.
+        
+        Args:
+            shell_id: Only include this shell's groups (optional)
+            level: Only include this level's groups (optional)
+            
+        Returns:
+            One dictionary per group with its counts, mean depth score,
+            residue per step and steps-to-advancement quantiles
+        """
+        return self.metric_rollups.rollups(shell_id, level.name if level is not None else None)
+    
+    def most_aligned_interactions(self, interaction_id: str, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Find the interactions whose phase is most aligned with an interaction.
+        
+        Args:
+            interaction_id: The ID of the interaction
+            k: Number of interactions to return
+            
+        Returns:
+            (interaction ID, cosine similarity) pairs, most aligned first
+            
+        Raises:
+            ValueError: If phase indexing is not enabled or the interaction has no recorded step
+        """
+        if self.phase_index is None:
+            raise ValueError("Phase indexing is not enabled")
+        return self.phase_index.most_aligned(interaction_id, k)
+    
     def check_level_advancement(self, interaction_id: str) -> Tuple[bool, Optional[Level]]:
         """
         Check if an interaction has met criteria for level advancement.
@@ -439,6 +1228,8 @@ class RecursiveEngine:
             raise ValueError(f"Interaction {interaction_id} does not meet advancement criteria")
         
         interaction = self.interactions[interaction_id]
+        self.metric_rollups.record_advancement(interaction_id, interaction.shell.id, 
+                                               interaction.level.name, next_level.name)
         interaction.level = next_level
         
         logger.info(f"Advanced interaction {interaction_id} to level {next_level.name}")
@@ -468,9 +1259,41 @@ class RecursiveEngine:
         interaction = self.interactions[interaction_id]
         old_shell_id = interaction.shell.id
         interaction.shell = new_shell
+        self._bind_shell(interaction)
+        self.metric_rollups.record_switch(new_shell.id, interaction.level.name)
         
         logger.info(f"Switched interaction {interaction_id} from shell {old_shell_id} to {new_shell.id}")
-    
+
+    def save_novelty_index(self, filepath: Optional[str] = None) -> None:
+        """
+        Save the near-duplicate index of responses.
+
+        Args:
+            filepath: The path to save to (defaults to the "near_duplicate_index_path" config option)
+
+        Raises:
+            ValueError: If the index is disabled or no path is given
+        """
+        if self.novelty_index is None:
+            raise ValueError("Near-duplicate detection is not enabled")
+
+        filepath = filepath or self.config.get("near_duplicate_index_path")
+        if not filepath:
+            raise ValueError("No path given for the near-duplicate index")
+
+        self.novelty_index.save(filepath)
+
+    def shell_artisans(self) -> List[str]:
+        """Get the players with 0.8+ mastery on 3 or more shells, from the mastery index."""
+        if self.mastery_store is None:
+            return []
+        return self.mastery_store.players_with_expert_shells(3)
+
+    def flush_mastery(self) -> None:
+        """Save pending shell mastery updates to the "mastery_store_path" config option, if set."""
+        if self.mastery_store is not None:
+            self.mastery_store.flush()
+
     def save_interaction(self, interaction_id: str, filepath: str) -> None:
         """
         Save an interaction to a file.
@@ -492,6 +1315,7 @@ class RecursiveEngine:
             "id": interaction.id,
             "shell_id": interaction.shell.id,
             "level": interaction.level.name,
+            "player_id": self.interaction_players.get(interaction_id),
             "steps": [
                 {
                     "prompt": step.prompt,
@@ -555,6 +1379,9 @@ class RecursiveEngine:
             metrics.recursive_depth = data["metrics"].get("recursive_depth", 0)
             metrics.depth_score = data["metrics"].get("depth_score", 0)
             metrics.residue_count = data["metrics"].get("residue_count", 0)
+            metrics.novel_residue_patterns = list(data["metrics"].get("novel_residue_patterns", []))
+            metrics.novel_residue_count = data["metrics"].get("novel_residue_count", 
+                                                              len(metrics.novel_residue_patterns))
         
         # Create interaction
         interaction = Interaction(
@@ -568,8 +1395,22 @@ class RecursiveEngine:
             end_time=data.get("end_time")
         )
         
-        # Store interaction
+        # Store interaction; its shell context is rebuilt on first use
         self.interactions[interaction.id] = interaction
+        if data.get("player_id") is not None:
+            self._bind_player(interaction.id, data["player_id"])
+        else:
+            self.interaction_players.pop(interaction.id, None)
+        self.interaction_shells.pop(interaction.id, None)
+        self.histories.pop(interaction.id, None)
+        self.metric_rollups.forget_interaction(interaction.id)
+        self.metric_rollups.record_start(interaction.id, interaction.shell.id, interaction.level.name)
+        if self.residue_matrices is not None:
+            self.residue_matrices.forget_interaction(interaction.id)
+        if self.coherence_monitor is not None:
+            self.coherence_monitor.forget_interaction(interaction.id)
+        if self.coherence_scorer is not None:
+            self.coherence_scorer.forget_interaction(interaction.id)
         
         logger.info(f"Loaded interaction {interaction.id} from {filepath}")
         return interaction.id
@@ -627,6 +1468,13 @@ class RecursiveEngine:
                 "description": "Identify 25 residue patterns"
             })
         
+        if metrics.novel_residue_count >= 5:
+            achievements.append({
+                "id": "pattern_creator",
+                "name": "Pattern Creator",
+                "description": "Generate 5 novel residue patterns"
+            })
+        
         # Shell achievements
         shell_count = len(metrics.shell_mastery)
         if shell_count >= 5:
@@ -636,7 +1484,12 @@ class RecursiveEngine:
                 "description": "Use 5 different shells"
             })
         
-        mastery_shells = sum(1 for mastery in metrics.shell_mastery.values() if mastery >= 0.8)
+        # Players are judged on their mastery across all their interactions
+        player_id = self.interaction_players.get(interaction_id)
+        if player_id is not None:
+            mastery_shells = self.mastery_store.expert_shell_count(player_id)
+        else:
+            mastery_shells = sum(1 for mastery in metrics.shell_mastery.values() if mastery >= 0.8)
         if mastery_shells >= 3:
             achievements.append({
                 "id": "shell_artisan",
@@ -846,7 +1699,8 @@ class GameSession:
         interaction = self.engine.start_interaction(
             shell=shell,
             initial_prompt=initial_prompt,
-            level=level
+            level=level,
+            player_id=player_id
         )
         
         # Link to player and challenge
@@ -1012,6 +1866,70 @@ class GameSession:
         
         self.leaderboard = leaderboard
     
+    def _player_phase_index(self):
+        """Build a phase index of each player's latest interaction, keyed by player ID."""
+        from recursive_prompting.metrics.phase_index import PhaseIndex
+        
+        index = PhaseIndex(capacity=len(self.players))
+        for player_id, player in self.players.items():
+            if player["interactions"]:
+                interaction = self.engine.interactions.get(player["interactions"][-1]["interaction_id"])
+                if interaction is not None:
+                    index.update(player_id, interaction.metrics.coherence_metrics.phase_vector)
+        return index
+    
+    def update_phase_alignment(self) -> Dict[str, float]:
+        """
+        Set the phase alignment ψ of every interaction in the session.
+        
+        Each interaction's alignment is its mean cosine similarity with the
+        phase vectors of all other session interactions, computed for the
+        whole session at once (requires NumPy).
+        
+        Returns:
+            Mapping of interaction ID to its phase alignment
+        """
+        from recursive_prompting.metrics.phase_index import PhaseIndex
+        
+        interactions = [
+            self.engine.interactions[entry["interaction_id"]]
+            for player in self.players.values()
+            for entry in player["interactions"]
+            if entry["interaction_id"] in self.engine.interactions
+        ]
+        index = PhaseIndex(capacity=len(interactions))
+        index.update_many(
+            (interaction.id, interaction.metrics.coherence_metrics.phase_vector)
+            for interaction in interactions
+        )
+        
+        alignments = index.alignments()
+        for interaction in interactions:
+            interaction.metrics.coherence_metrics.phase_alignment = alignments[interaction.id]
+        return alignments
+    
+    def most_aligned_players(self, player_id: str, k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Find the players whose latest interaction is most aligned in phase with a player's.
+        
+        Args:
+            player_id: Player ID
+            k: Number of players to return
+            
+        Returns:
+            (player ID, cosine similarity) pairs, most aligned first
+            
+        Raises:
+            ValueError: If the player doesn't exist or has no interaction
+        """
+        if player_id not in self.players:
+            raise ValueError(f"Player {player_id} not found")
+        
+        index = self._player_phase_index()
+        if player_id not in index:
+            raise ValueError(f"Player {player_id} has no interaction")
+        return index.most_aligned(player_id, k)
+    
     def get_leaderboard(self) -> List[Dict[str, Any]]:
         """Get the current leaderboard."""
         self._update_leaderboard()
@@ -0,0 +1,444 @@
+"""
+Recursive Prompting - Prompt Library Index
+
+This module parses the markdown prompt library into prompt entries tagged by
+level and section, and maintains an on-disk inverted index over them with
+BM25 ranking. Files are re-indexed incrementally: only files whose content
+changed since the last build are parsed again.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+
+from recursive_prompting.levels.base import Level
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+# Default location of the prompt library and its index
+LIBRARY_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "Recursive-Prompts")
+INDEX_FILENAME = "index.json"
+
+# Layout version of index.json
+INDEX_FORMAT = 1
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_LEVEL_PATTERN = re.compile(
+    r"\b(Foundation|Amplification|Integration|Emergence|Meta-Recursion)\s+Level\b",
+    re.IGNORECASE
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric search terms."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def detect_level(text: str) -> Optional[str]:
+    """
+    Detect the level a library file belongs to from its opening lines.
+
+    Args:
+        text: Markdown content of the file
+
+    Returns:
+        The Level name (e.g. "FOUNDATION"), or None if the file is not level-specific
+    """
+    level_match = _LEVEL_PATTERN.search(text[:1000])
+    if not level_match:
+        return None
+    return level_match.group(1).upper().replace("-", "_")
+
+
+@dataclass
+class PromptEntry:
+    """A section of the prompt library."""
+    source: str  # Path relative to the library root
+    title: str  # Heading path, e.g. "Level 1: Recursive Exploration > Template To Use"
+    section: str  # Top-level (##) section the entry belongs to
+    level: Optional[str]  # Level name, or None for general documents
+    text: str
+    line: int  # 1-based line of the entry's heading
+
+    @property
+    def entry_id(self) -> str:
+        """Stable identifier of the entry within the library."""
+        return f"{self.source}:{self.line}"
+
+
+@dataclass
+class SearchResult:
+    """A ranked search hit."""
+    entry: PromptEntry
+    score: float
+
+
+def _clean_heading(heading: str) -> str:
+    """Strip decorative symbols and emoji from a heading."""
+    return re.sub(r"^[^\w\[(]+", "", heading).strip()
+
+
+def parse_library_file(path: str, root: str) -> List[PromptEntry]:
+    """
+    Parse a markdown library file into one entry per headed section.
+
+    Headings inside fenced blocks are part of the enclosing section, so
+    template text is never split.
+
+    Args:
+        path: Path of the markdown file
+        root: Library root that entry sources are relative to
+
+    Returns:
+        The entries in document order
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    source = os.path.relpath(path, root).replace(os.sep, "/")
+    level = detect_level(content)
+    entries = []
+    headings: List[Tuple[int, str]] = []
+    body: List[str] = []
+    entry_line = 1
+    in_fence = False
+
+    def flush():
+        text = "\n".join(body).strip()
+        if text or headings:
+            titles = [title for _, title in headings]
+            section = next((title for depth, title in headings if depth == 2), titles[0] if titles else "")
+            entries.append(PromptEntry(
+                source=source,
+                title=" > ".join(titles) if titles else source,
+                section=section,
+                level=level,
+                text=text,
+                line=entry_line
+            ))
+
+    for line_number, line in enumerate(content.splitlines(), 1):
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        heading_match = None if in_fence else _HEADING_PATTERN.match(line)
+
+        if heading_match:
+            flush()
+            depth = len(heading_match.group(1))
+            headings = [(d, title) for d, title in headings if d < depth]
+            headings.append((depth, _clean_heading(heading_match.group(2))))
+            body = []
+            entry_line = line_number
+        else:
+            body.append(line)
+
+    flush()
+    return entries
+
+
+def iter_library_files(root: str) -> Iterator[str]:
+    """Yield the markdown files of a library in a stable order."""
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(".md"):
+                yield os.path.join(directory, filename)
+
+
+def _file_hash(path: str) -> str:
+    """Compute the sha256 of a file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class PromptIndex:
+    """
+    Inverted index over the prompt library with BM25 ranking.
+
+    Documents are library entries. Postings map each term to the documents
+    containing it and the term's frequency there, so a query only touches
+    the postings of its own terms.
+    """
+
+    def __init__(self, root: str = LIBRARY_DIR):
+        """
+        Initialize an empty index.
+
+        Args:
+            root: Root directory of the prompt library
+        """
+        self.root = root
+        self.files: Dict[str, Dict] = {}  # source -> mtime, size, sha256, doc ids
+        self.documents: Dict[int, PromptEntry] = {}
+        self.lengths: Dict[int, int] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+        self.next_id = 0
+
+    def _add_entry(self, entry: PromptEntry) -> int:
+        """Index a single entry and return its document id."""
+        doc_id = self.next_id
+        self.next_id += 1
+
+        terms = tokenize(entry.title) + tokenize(entry.text)
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+
+        self.documents[doc_id] = entry
+        self.lengths[doc_id] = len(terms)
+        self.total_length += len(terms)
+        return doc_id
+
+    def _remove_file(self, source: str) -> None:
+        """Drop a file's entries from the index."""
+        record = self.files.pop(source, None)
+        if not record:
+            return
+
+        for doc_id in record["documents"]:
+            entry = self.documents.pop(doc_id)
+            self.total_length -= self.lengths.pop(doc_id)
+            for term in set(tokenize(entry.title) + tokenize(entry.text)):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def update(self) -> int:
+        """
+        Bring the index up to date with the library on disk.
+
+        Files whose size and modification time are unchanged are skipped
+        without being read. Files that were touched but whose content hash
+        is unchanged are not re-parsed.
+
+        Returns:
+            Number of files that were (re-)indexed or removed
+        """
+        changed = 0
+        seen = set()
+
+        for path in iter_library_files(self.root):
+            source = os.path.relpath(path, self.root).replace(os.sep, "/")
+            seen.add(source)
+            stat = os.stat(path)
+            record = self.files.get(source)
+
+            if record and record["mtime"] == stat.st_mtime and record["size"] == stat.st_size:
+                continue
+
+            content_hash = _file_hash(path)
+            if record and record["sha256"] == content_hash:
+                record["mtime"] = stat.st_mtime
+                record["size"] = stat.st_size
+                continue
+
+            self._remove_file(source)
+            doc_ids = [self._add_entry(entry) for entry in parse_library_file(path, self.root)]
+            self.files[source] = {
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "sha256": content_hash,
+                "documents": doc_ids
+            }
+            changed += 1
+
+        for source in [source for source in self.files if source not in seen]:
+            self._remove_file(source)
+            changed += 1
+
+        if changed:
+            logger.info(f"Indexed {changed} changed library files ({len(self.documents)} entries)")
+        return changed
+
+    def search(self,
+              query: str,
+              level: Optional[Union[Level, str]] = None,
+              limit: int = 10) -> List[SearchResult]:
+        """
+        Rank library entries against a query with BM25.
+
+        Args:
+            query: Free-text query
+            level: Only return entries of this level (optional)
+            limit: Maximum number of results
+
+        Returns:
+            Results ordered by descending score
+        """
+        if not self.documents:
+            return []
+
+        level_name = getattr(level, "name", level)
+        document_count = len(self.documents)
+        average_length = self.total_length / document_count
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        if level_name is not None:
+            scores = {
+                doc_id: score for doc_id, score in scores.items()
+                if self.documents[doc_id].level == level_name
+            }
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [SearchResult(entry=self.documents[doc_id], score=score) for doc_id, score in top]
+
+    def to_dict(self) -> Dict:
+        """Convert the index to its JSON representation."""
+        return {
+            "format": INDEX_FORMAT,
+            "next_id": self.next_id,
+            "files": self.files,
+            "documents": {
+                str(doc_id): dict(asdict(entry), length=self.lengths[doc_id])
+                for doc_id, entry in self.documents.items()
+            },
+            "postings": {
+                term: [[doc_id, frequency] for doc_id, frequency in postings.items()]
+                for term, postings in self.postings.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, root: str = LIBRARY_DIR) -> 'PromptIndex':
+        """
+        Restore an index from its JSON representation.
+
+        Raises:
+            ValueError: If the data was written in a different index format
+        """
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported prompt index format: {data.get('format')}")
+
+        index = cls(root)
+        index.next_id = data["next_id"]
+        index.files = data["files"]
+        for doc_id, document in data["documents"].items():
+            document = dict(document)
+            length = document.pop("length")
+            index.documents[int(doc_id)] = PromptEntry(**document)
+            index.lengths[int(doc_id)] = length
+            index.total_length += length
+        index.postings = {
+            term: {doc_id: frequency for doc_id, frequency in postings}
+            for term, postings in data["postings"].items()
+        }
+        return index
+
+    def save(self, path: str) -> None:
+        """Write the index to disk atomically."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, root: str = LIBRARY_DIR) -> 'PromptIndex':
+        """Read an index written by save."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f), root)
+
+
+def build_index(root: str = LIBRARY_DIR, index_path: Optional[str] = None) -> PromptIndex:
+    """
+    Load the library index and re-index files that changed since it was saved.
+
+    A missing or unreadable index is rebuilt from scratch. The index is only
+    written back when something changed.
+
+    Args:
+        root: Root directory of the prompt library
+        index_path: Location of the index (defaults to index.json in the library)
+
+    Returns:
+        An up-to-date PromptIndex
+    """
+    index_path = index_path or os.path.join(root, INDEX_FILENAME)
+    index = None
+
+    if os.path.exists(index_path):
+        try:
+            index = PromptIndex.load(index_path, root)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Rebuilding prompt index {index_path}: {e}")
+
+    if index is None:
+        index = PromptIndex(root)
+
+    if index.update() or not os.path.exists(index_path):
+        index.save(index_path)
+    return index
+
+
+# Indexes kept in memory per library root, so repeated searches only stat the files
+_indexes: Dict[str, PromptIndex] = {}
+
+
+def get_index(root: str = LIBRARY_DIR) -> PromptIndex:
+    """
+    Get the in-memory index of a library, loading or updating it as needed.
+
+    Args:
+        root: Root directory of the prompt library
+
+    Returns:
+        An up-to-date PromptIndex
+    """
+    index = _indexes.get(root)
+    if index is None:
+        index = _indexes[root] = build_index(root)
+    elif index.update():
+        index.save(os.path.join(root, INDEX_FILENAME))
+    return index
+
+
+def search(query: str,
+          level: Optional[Union[Level, str]] = None,
+          limit: int = 10,
+          root: str = LIBRARY_DIR) -> List[SearchResult]:
+    """
+    Search the prompt library, updating its index first if needed.
+
+    Args:
+        query: Free-text query
+        level: Only return entries of this level (optional)
+        limit: Maximum number of results
+        root: Root directory of the prompt library
+
+    Returns:
+        Results ordered by descending score
+    """
+    return get_index(root).search(query, level=level, limit=limit)
@@ -0,0 +1,328 @@
+"""
+Recursive Prompting - Prompt Library Templates
+
+This module compiles the fenced prompt templates of the markdown library into
+command alignments that shells and the shell registry can use directly.
+Templates are found in two layouts:
+
+- Shell template files, where a "### NAME Command" section has a
+  "**Template**:" block, a "**Purpose**:" line and a "**Residue Generated**:" line.
+- Game level files, where a "Move N: NAME" or "Round N: NAME" section opens
+  with a template block.
+
+Bracketed placeholders such as "[YOUR TOPIC]" are normalized to the
+"{your_topic}" form used by shell templates. Compiled template sets are
+cached on disk by the SHA-256 of the source file, so loading a library does
+not parse markdown unless a file changed.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+
+from recursive_prompting.shells.base import CommandAlignment
+from recursive_prompting.shells.declarative import CompiledTemplate
+from recursive_prompting.library import LIBRARY_DIR, detect_level, iter_library_files
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+# Version of the compiler output; bump when compiled template sets change shape
+TEMPLATE_COMPILER_VERSION = 1
+
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+_COMMAND_HEADING_PATTERN = re.compile(r"\b([A-Z][A-Z-]+)\s+Command\b")
+_STEP_HEADING_PATTERN = re.compile(r"\b(?:Move|Round)\s+\d+:\s+([A-Z][A-Z-]+)")
+_FIELD_PATTERN = re.compile(r"^\*\*(Template|Purpose|Residue Generated|Example)\*\*:\s*(.*)$")
+_CODE_SPAN_PATTERN = re.compile(r"`([^`]+)`")
+_SHELL_ID_PATTERN = re.compile(r"^\|\s*Shell ID\s*\|\s*`([^`]+)`", re.MULTILINE)
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+_BRACKET_PLACEHOLDER_PATTERN = re.compile(
+    r"\[([A-Z][A-Z0-9 '/&-]*[A-Z0-9])(?:\s+-\s+[^\]\n]*)?\](?!\()"
+)
+
+
+def placeholder_name(label: str) -> str:
+    """Convert a bracketed placeholder label like "YOUR TOPIC" to "your_topic"."""
+    return re.sub(r"[^a-z0-9]+", "_", label.lower()).strip("_")
+
+
+def normalize_placeholders(template: str) -> str:
+    """Rewrite bracketed placeholders to the {name} form used by shell templates."""
+    return _BRACKET_PLACEHOLDER_PATTERN.sub(
+        lambda match: "{" + placeholder_name(match.group(1)) + "}", template
+    )
+
+
+@dataclass
+class LibraryTemplate(CommandAlignment):
+    """
+    A command alignment compiled from the prompt library.
+
+    The template is pre-split into literal and placeholder parts, so
+    rendering is a single join.
+    """
+    placeholders: List[str] = field(default_factory=list)
+    source: str = ""
+    line: int = 0
+    compiled: Optional[CompiledTemplate] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.placeholders:
+            self.placeholders = list(dict.fromkeys(_PLACEHOLDER_PATTERN.findall(self.prompt_template)))
+        if self.compiled is None:
+            self.compiled = CompiledTemplate(self.prompt_template, dict.fromkeys(self.placeholders))
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """
+        Fill the template's placeholders from a context.
+
+        Placeholders missing from the context are left in place.
+        """
+        values = {
+            name: str(context[name]) if name in context else "{" + name + "}"
+            for name in self.compiled.fields
+        }
+        return self.compiled.render(values)
+
+    def to_command_alignment(self) -> CommandAlignment:
+        """Get a plain CommandAlignment for use in shell definitions."""
+        return CommandAlignment.from_dict(CommandAlignment.to_dict(self))
+
+
+@dataclass
+class TemplateSet:
+    """The templates compiled from one library file."""
+    id: str  # Shell ID of the file, or its name for files without one
+    source: str
+    level: Optional[str]
+    content_hash: str
+    templates: Dict[str, LibraryTemplate] = field(default_factory=dict)
+
+    def command_alignments(self) -> List[CommandAlignment]:
+        """Get the templates as plain command alignments, in document order."""
+        return [template.to_command_alignment() for template in self.templates.values()]
+
+
+def compile_template_source(content: str, source: str, content_hash: str = "") -> TemplateSet:
+    """
+    Compile the templates of a markdown library file.
+
+    Args:
+        content: Markdown content of the file
+        source: Path of the file relative to the library root
+        content_hash: SHA-256 of the content (optional)
+
+    Returns:
+        The file's TemplateSet, which may have no templates
+    """
+    shell_id_match = _SHELL_ID_PATTERN.search(content)
+    set_id = shell_id_match.group(1) if shell_id_match else os.path.splitext(os.path.basename(source))[0]
+    template_set = TemplateSet(
+        id=set_id,
+        source=source,
+        level=detect_level(content),
+        content_hash=content_hash
+    )
+
+    lines = content.splitlines()
+    command = None  # Pending command: name, description, template, line
+    awaiting = None  # Field whose fenced block comes next
+    in_fence = False
+    block: List[str] = []
+    block_line = 0
+
+    def finish_command():
+        if command and command.get("template") is not None:
+            name = command["name"]
+            if name in template_set.templates:
+                name = f"{name}_{command['line']}"
+            template_set.templates[name] = LibraryTemplate(
+                name=name,
+                description=command.get("description", ""),
+                operation=command["name"].lower(),
+                prompt_template=normalize_placeholders(command["template"]),
+                residue_signature=command.get("residue", []),
+                source=source,
+                line=command["template_line"]
+            )
+
+    for line_number, line in enumerate(lines, 1):
+        if _FENCE_PATTERN.match(line):
+            if in_fence:
+                in_fence = False
+                if command is not None and awaiting == "Template" and command.get("template") is None:
+                    command["template"] = "\n".join(block)
+                    command["template_line"] = block_line
+                awaiting = None
+            else:
+                in_fence = True
+                block = []
+                block_line = line_number + 1
+            continue
+
+        if in_fence:
+            block.append(line)
+            continue
+
+        heading_match = _HEADING_PATTERN.match(line)
+        if heading_match:
+            heading = heading_match.group(2)
+            command_match = _COMMAND_HEADING_PATTERN.search(heading)
+            step_match = _STEP_HEADING_PATTERN.search(heading)
+            if command_match or step_match or len(heading_match.group(1)) <= 3:
+                finish_command()
+                command = None
+                awaiting = None
+
+            if command_match:
+                command = {"name": command_match.group(1), "line": line_number}
+            elif step_match:
+                # Game moves open with their template block
+                command = {"name": step_match.group(1), "line": line_number}
+                awaiting = "Template"
+            continue
+
+        field_match = _FIELD_PATTERN.match(line.strip())
+        if field_match and command is not None:
+            label, value = field_match.groups()
+            if label == "Purpose":
+                command["description"] = value.strip()
+            elif label == "Residue Generated":
+                command["residue"] = _CODE_SPAN_PATTERN.findall(value)
+            awaiting = label
+
+    finish_command()
+    return template_set
+
+
+def compile_template_file(path: str, root: str = LIBRARY_DIR) -> TemplateSet:
+    """
+    Compile the templates of a markdown library file on disk.
+
+    Args:
+        path: Path of the markdown file
+        root: Library root that sources are relative to
+
+    Returns:
+        The file's TemplateSet
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    source = os.path.relpath(path, root).replace(os.sep, "/")
+    return compile_template_source(raw.decode('utf-8'), source, hashlib.sha256(raw).hexdigest())
+
+
+class TemplateCache:
+    """
+    On-disk cache of compiled template sets.
+
+    Entries are pickled TemplateSets keyed by the SHA-256 of the source
+    file's content and validated against TEMPLATE_COMPILER_VERSION on load,
+    like ShellDefinitionCache entries. The cache directory must only be
+    writable by trusted processes, since entries are unpickled.
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Initialize the template cache.
+
+        Args:
+            cache_dir: Directory holding cache entries (created if missing)
+        """
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, content_hash: str) -> str:
+        """Get the cache entry path for a content hash."""
+        return os.path.join(self.cache_dir, f"{content_hash}.templates.pickle")
+
+    def load(self, path: str, root: str = LIBRARY_DIR) -> TemplateSet:
+        """
+        Get the compiled templates of a file, compiling them on a cache miss.
+
+        Args:
+            path: Path of the markdown file
+            root: Library root that sources are relative to
+
+        Returns:
+            The file's TemplateSet
+        """
+        with open(path, 'rb') as f:
+            raw = f.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        source = os.path.relpath(path, root).replace(os.sep, "/")
+
+        entry_path = self._entry_path(content_hash)
+        try:
+            with open(entry_path, 'rb') as f:
+                entry = pickle.load(f)
+            if (entry.get("version") == TEMPLATE_COMPILER_VERSION and
+                    entry["template_set"].content_hash == content_hash and
+                    entry["template_set"].source == source):
+                self.hits += 1
+                return entry["template_set"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Discarding unreadable template cache entry {entry_path}: {e}")
+
+        self.misses += 1
+        template_set = compile_template_source(raw.decode('utf-8'), source, content_hash)
+        entry = {"version": TEMPLATE_COMPILER_VERSION, "template_set": template_set}
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, entry_path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Could not write template cache entry for {source}: {e}")
+
+        return template_set
+
+    def clear(self) -> int:
+        """
+        Remove all cache entries.
+
+        Returns:
+            Number of entries removed
+        """
+        count = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".templates.pickle"):
+                os.remove(os.path.join(self.cache_dir, filename))
+                count += 1
+        return count
+
+
+def load_template_library(root: str = LIBRARY_DIR,
+                          cache: Optional[TemplateCache] = None) -> List[TemplateSet]:
+    """
+    Compile every markdown file of a library that contains templates.
+
+    Args:
+        root: Root directory of the prompt library
+        cache: Compiled template cache (optional)
+
+    Returns:
+        Template sets of the files that define at least one template
+    """
+    template_sets = []
+    for path in iter_library_files(root):
+        template_set = cache.load(path, root) if cache is not None else compile_template_file(path, root)
+        if template_set.templates:
+            template_sets.append(template_set)
+    return template_sets
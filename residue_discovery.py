@@ -0,0 +1,306 @@
+"""
+Recursive Prompting - Emergent Residue Discovery
+
+This module finds recurring phrases in response traffic that could become
+new residue patterns. Word n-grams of every response are counted in a
+count-min sketch, and the most frequent are tracked in a bounded
+heavy-hitters table together with their count in the current window of
+responses. Phrases that are frequent overall and bursty (much more frequent
+in the latest window than on average) are reported as candidates.
+
+Memory is fixed by the sketch dimensions and the table capacity, however
+much traffic is observed. Counts are approximate: the sketch never
+undercounts, and overcounts by at most total / width with high probability.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import hashlib
+import heapq
+import re
+
+from recursive_prompting.shells.base import ResponseAnalysis
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# A phrase is dropped in favour of a longer candidate containing it that
+# occurs at least this fraction as often
+SUBSUMPTION_RATIO = 0.9
+
+# Function words and contraction fragments ("don't" is split into "don"
+# and "t"); phrases starting or ending with one are never candidates
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could did do does
+for from had has have he her his how i if in into is it its just may me more most my no
+not of on one or our out she so some such than that the their them then there these they
+this those to too up us was we were what when where which while who will with would you your
+d ll m re s t ve aren couldn didn doesn don hadn hasn haven isn shouldn wasn weren won wouldn
+""".split())
+
+
+class CountMinSketch:
+    """
+    Count-min sketch with conservative update.
+
+    Each item is hashed to one counter per row, and its estimate is the
+    smallest of them. Conservative update only raises the counters that
+    hold that minimum, which reduces overcounting.
+    """
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4, seed: int = 1):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            width: Counters per row
+            depth: Number of rows
+            seed: Hash seed; sketches can only be merged if their dimensions and seeds match
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("Sketch width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self.counters = array("Q", bytes(8 * width * depth))
+        self._hash_key = seed.to_bytes(8, "little", signed=True)
+
+    def _slots(self, item: str) -> List[int]:
+        """Get the counter index of an item in each row."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16, key=self._hash_key).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """
+        Count an item.
+
+        Args:
+            item: The item
+            count: Number of occurrences to add
+
+        Returns:
+            The item's new estimated count
+        """
+        counters = self.counters
+        slots = self._slots(item)
+        estimate = min(counters[slot] for slot in slots) + count
+        for slot in slots:
+            if counters[slot] < estimate:
+                counters[slot] = estimate
+        self.total += count
+        return estimate
+
+    def estimate(self, item: str) -> int:
+        """Get an item's estimated count."""
+        counters = self.counters
+        return min(counters[slot] for slot in self._slots(item))
+
+    def merge(self, other: 'CountMinSketch') -> None:
+        """
+        Add another sketch's counts to this one.
+
+        Raises:
+            ValueError: If the sketches' dimensions or seeds differ
+        """
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError("Cannot merge count-min sketches with different dimensions or seeds")
+        counters = self.counters
+        for slot, value in enumerate(other.counters):
+            if value:
+                counters[slot] += value
+        self.total += other.total
+
+
+class PhraseDiscovery:
+    """
+    Streaming discovery of recurring phrases as residue pattern candidates.
+
+    Phrases are counted once per response. Known residue signatures and
+    phrases already promoted are excluded.
+    """
+
+    def __init__(self,
+                 ngram_sizes: Sequence[int] = (2, 3),
+                 min_count: int = 20,
+                 min_burst: float = 2.0,
+                 window: int = 1000,
+                 capacity: int = 1000,
+                 width: int = 1 << 16,
+                 depth: int = 4,
+                 known_terms: Iterable[str] = ()):
+        """
+        Initialize phrase discovery.
+
+        Args:
+            ngram_sizes: Phrase lengths in words
+            min_count: Responses a phrase must occur in to be a candidate
+            min_burst: How many times its average rate a phrase's rate in the
+                latest window must be to count as bursty
+            window: Responses per burstiness window
+            capacity: Number of heavy-hitter phrases tracked
+            width: Count-min sketch counters per row
+            depth: Count-min sketch rows
+            known_terms: Existing residue signatures to exclude
+        """
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.min_count = min_count
+        self.min_burst = min_burst
+        self.window = window
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        # Terms are split into words as responses are, so "mirror-loop" excludes "mirror loop"
+        self.excluded = {" ".join(_WORD_PATTERN.findall(term.lower())) for term in known_terms}
+
+        self.responses = 0
+        self.window_responses = 0  # Responses in the current window
+        self.previous_window_responses = 0
+        # Heavy hitters: phrase -> [estimated count, current window count, previous window count]
+        self.heavy_hitters: Dict[str, List[int]] = {}
+        self._heap: List[Tuple[int, str]] = []  # Lazily updated (count, phrase) entries
+
+    def phrases(self, text: Union[str, ResponseAnalysis]) -> List[str]:
+        """
+        Get the distinct candidate phrases of a text.
+
+        Args:
+            text: The text, or a shared analysis of it whose words are reused
+        """
+        words = text.words if isinstance(text, ResponseAnalysis) else _WORD_PATTERN.findall(text.lower())
+        phrases = {}
+        for size in self.ngram_sizes:
+            for start in range(len(words) - size + 1):
+                gram = words[start:start + size]
+                if gram[0] in STOPWORDS or gram[-1] in STOPWORDS:
+                    continue
+                if not (gram[0][0].isalpha() and gram[-1][0].isalpha()):
+                    # Numbers don't start or end a phrase
+                    continue
+                phrases[" ".join(gram)] = None
+        return [phrase for phrase in phrases if phrase not in self.excluded]
+
+    def observe(self, text: Union[str, ResponseAnalysis]) -> None:
+        """
+        Count the phrases of one response.
+
+        Args:
+            text: The response text, or a shared analysis of it
+        """
+        if self.window_responses >= self.window:
+            self._roll_window()
+        self.responses += 1
+        self.window_responses += 1
+
+        heavy_hitters = self.heavy_hitters
+        for phrase in self.phrases(text):
+            count = self.sketch.add(phrase)
+            entry = heavy_hitters.get(phrase)
+            if entry is not None:
+                entry[0] = count
+                entry[1] += 1
+                heapq.heappush(self._heap, (count, phrase))
+            elif len(heavy_hitters) < self.capacity or count > self._min_count():
+                self._track(phrase, count)
+
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(entry[0], phrase) for phrase, entry in heavy_hitters.items()]
+            heapq.heapify(self._heap)
+
+    def _min_count(self) -> int:
+        """Get the smallest count in the heavy-hitters table, dropping stale heap entries."""
+        heap = self._heap
+        while heap:
+            count, phrase = heap[0]
+            entry = self.heavy_hitters.get(phrase)
+            if entry is not None and entry[0] == count:
+                return count
+            heapq.heappop(heap)
+        return 0
+
+    def _track(self, phrase: str, count: int) -> None:
+        """Add a phrase to the heavy-hitters table, evicting the least frequent if full."""
+        if len(self.heavy_hitters) >= self.capacity:
+            self._min_count()
+            _, evicted = heapq.heappop(self._heap)
+            del self.heavy_hitters[evicted]
+        # The window count starts at this occurrence; earlier ones went untracked
+        self.heavy_hitters[phrase] = [count, 1, 0]
+        heapq.heappush(self._heap, (count, phrase))
+
+    def _roll_window(self) -> None:
+        """Start a new burstiness window."""
+        for entry in self.heavy_hitters.values():
+            entry[2] = entry[1]
+            entry[1] = 0
+        self.previous_window_responses = self.window_responses
+        self.window_responses = 0
+
+    def burst(self, phrase: str) -> float:
+        """
+        Get how many times its average rate a tracked phrase's recent rate is.
+
+        The recent rate covers the current window, or the previous one while
+        the current window is less than half full.
+        """
+        entry = self.heavy_hitters.get(phrase)
+        if entry is None or not entry[0]:
+            return 0.0
+        if self.window_responses * 2 >= self.window or not self.previous_window_responses:
+            recent, responses = entry[1], self.window_responses
+        else:
+            recent, responses = entry[2], self.previous_window_responses
+        if not responses:
+            return 0.0
+        return (recent / responses) / (entry[0] / self.responses)
+
+    def candidates(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get the phrases that pass the frequency and burstiness thresholds.
+
+        A phrase contained in a longer candidate of about the same count is
+        left out, so a recurring phrase is reported once rather than with
+        each of its parts.
+
+        Args:
+            limit: Maximum number of candidates (optional)
+
+        Returns:
+            Candidate dictionaries with "phrase", "count" and "burst", most frequent first
+        """
+        found = []
+        for phrase, entry in self.heavy_hitters.items():
+            if entry[0] < self.min_count or phrase in self.excluded:
+                continue
+            burst = self.burst(phrase)
+            if burst >= self.min_burst:
+                found.append({"phrase": phrase, "count": entry[0], "burst": burst})
+
+        found = [
+            candidate for candidate in found
+            if not any(
+                other["count"] >= SUBSUMPTION_RATIO * candidate["count"] and
+                len(other["phrase"]) > len(candidate["phrase"]) and
+                f" {candidate['phrase']} " in f" {other['phrase']} "
+                for other in found
+            )
+        ]
+        found.sort(key=lambda candidate: (-candidate["count"], candidate["phrase"]))
+        return found[:limit] if limit is not None else found
+
+    def exclude(self, terms: Iterable[str]) -> None:
+        """Stop reporting phrases, such as those promoted to residue patterns."""
+        for term in terms:
+            term = term.lower()
+            self.excluded.add(term)
+            self.heavy_hitters.pop(term, None)
+
+
+def emergent_pattern_id(phrase: str) -> str:
+    """Get the residue pattern ID for a promoted phrase, e.g. "EMERGENT-MIRROR-LOOP"."""
+    return "EMERGENT-" + re.sub(r"[^A-Z0-9]+", "-", phrase.upper()).strip("-")
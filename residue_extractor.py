@@ -0,0 +1,195 @@
+"""
+Recursive Prompting - Residue Extractor
+
+This module compiles residue signatures into a single multi-pattern matcher,
+so every signature in a prompt and response is found in one pass over the
+text, however many patterns the catalog holds.
+
+The signatures are merged into a trie and the trie is emitted as one regular
+expression. Wrapped in a lookahead, the expression is tried at every text
+position and matches the longest signature starting there. Signatures that
+are prefixes of a longer match are credited through a precomputed closure,
+so the result is the same as testing each signature separately.
+
+Small catalogs are cheaper to check term by term with substring search, so
+below DIRECT_SCAN_LIMIT terms no pattern is compiled.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Set
+import hashlib
+import re
+
+from recursive_prompting.shells.base import ResponseAnalysis
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+# Up to this many distinct terms, per-term substring search beats the single pass
+DIRECT_SCAN_LIMIT = 64
+
+
+def _trie_pattern(node: Dict[str, Dict]) -> str:
+    """Emit the regular expression for a trie node; the "" key marks the end of a term."""
+    branches = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != ""
+    ]
+    if not branches:
+        return ""
+
+    terminal = "" in node
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if terminal else pattern
+
+
+def compile_signature_pattern(terms: Iterable[str]) -> re.Pattern:
+    """
+    Compile lowercase terms into a trie-shaped pattern that finds the longest
+    term starting at every position.
+
+    Args:
+        terms: Non-empty lowercase terms
+
+    Returns:
+        A compiled pattern whose group 1 is the matched term
+    """
+    trie: Dict[str, Dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    return re.compile("(?=(" + _trie_pattern(trie) + "))")
+
+
+class ResidueExtractor:
+    """
+    Single-pass residue signature matcher.
+
+    Signatures are case-insensitive substrings, as with per-pattern
+    scanning. A residue pattern is found if any of its signatures occurs in
+    the prompt or the response; a signature never spans the two.
+    """
+
+    def __init__(self, signatures: Mapping[str, Iterable[str]]):
+        """
+        Compile a residue catalog's signatures.
+
+        Args:
+            signatures: Mapping of residue pattern ID to its signature terms.
+                Empty terms are ignored.
+        """
+        self.signatures = {pattern_id: list(terms) for pattern_id, terms in signatures.items()}
+        self.pattern_ids = list(signatures)
+        self._order = {pattern_id: index for index, pattern_id in enumerate(self.pattern_ids)}
+
+        term_ids: Dict[str, Set[str]] = {}
+        for pattern_id, terms in signatures.items():
+            for term in terms:
+                term = term.lower()
+                if term:
+                    term_ids.setdefault(term, set()).add(pattern_id)
+
+        # A match reports the longest term at its position, so credit every
+        # term that is a prefix of it as well
+        self._matches: Dict[str, frozenset] = {}
+        for term in term_ids:
+            covered = set()
+            for end in range(1, len(term) + 1):
+                covered.update(term_ids.get(term[:end], ()))
+            self._matches[term] = frozenset(covered)
+
+        self.pattern_count = len({pattern_id for ids in term_ids.values() for pattern_id in ids})
+        self.pattern = None
+        if len(term_ids) > DIRECT_SCAN_LIMIT:
+            self.pattern = compile_signature_pattern(term_ids)
+
+        digest = hashlib.blake2b(digest_size=16)
+        for pattern_id in self.pattern_ids:
+            digest.update(repr((pattern_id, sorted(
+                term.lower() for term in signatures[pattern_id] if term
+            ))).encode("utf-8"))
+        self.version = digest.hexdigest()  # Identifies the compiled signature set
+
+        logger.info(f"Compiled {len(term_ids)} residue signatures for {len(self.pattern_ids)} patterns")
+
+    def with_signatures(self, signatures: Mapping[str, Iterable[str]]) -> 'ResidueExtractor':
+        """
+        Compile an extractor with added or replaced residue patterns.
+
+        Args:
+            signatures: Mapping of residue pattern ID to its signature terms
+
+        Returns:
+            A new extractor; new patterns come after the existing ones
+        """
+        merged = dict(self.signatures)
+        merged.update(signatures)
+        return ResidueExtractor(merged)
+
+    def find(self, *texts: str) -> Set[str]:
+        """
+        Find the residue patterns whose signatures occur in any of the texts.
+
+        Scanning stops as soon as every pattern has been found.
+
+        Args:
+            texts: Texts to scan
+
+        Returns:
+            The set of matching residue pattern IDs
+        """
+        return self._scan(text.lower() for text in texts if text)
+
+    def _scan(self, lowered_texts: Iterable[str]) -> Set[str]:
+        """Find the residue patterns in texts that are already lowercase."""
+        found: Set[str] = set()
+        matches = self._matches
+        for text in lowered_texts:
+            if not text:
+                continue
+
+            if self.pattern is None:
+                for term, pattern_ids in matches.items():
+                    if term in text:
+                        found |= pattern_ids
+                continue
+
+            for match in self.pattern.finditer(text):
+                found |= matches[match.group(1)]
+                if len(found) == self.pattern_count:
+                    return found
+        return found
+
+    def extract_residue(self, prompt: str, response: Optional[str]) -> List[str]:
+        """
+        Extract residue patterns from a prompt and its response.
+
+        Args:
+            prompt: The prompt text
+            response: The response text
+
+        Returns:
+            Matching residue pattern IDs, in catalog order
+        """
+        return sorted(self.find(prompt, response or ""), key=self._order.__getitem__)
+
+    def extract_residue_from_analysis(self, prompt: str, analysis: ResponseAnalysis) -> List[str]:
+        """
+        Extract residue patterns, reusing the lowercased text of an analyzed response.
+
+        Args:
+            prompt: The prompt text
+            analysis: Shared analysis of the response
+
+        Returns:
+            Matching residue pattern IDs, in catalog order
+        """
+        found = self._scan((prompt.lower(), analysis.lowered))
+        return sorted(found, key=self._order.__getitem__)
@@ -0,0 +1,276 @@
+"""
+Recursive Prompting - Residue Metrics
+
+This module maintains residue analytics across all interactions of an
+engine, updated incrementally as each response's residue is extracted:
+
+- Co-occurrence: how often two residue patterns are extracted from the same step.
+- Transitions: how often a pattern in one step is followed by a pattern in
+  the next step of the same interaction.
+- Shell and depth frequencies: how often each (shell, depth) pair produces a pattern.
+
+The matrices are stored sparsely as nested dictionaries of counts, so an
+update costs O(m²) for the m distinct patterns of a step, independent of the
+traffic seen so far. Snapshots export to COO triples, dense NumPy arrays or
+SciPy sparse matrices; NumPy and SciPy are only imported when requested.
+"""
+
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from recursive_prompting.utils.logging import setup_logger
+
+# Configure logging
+logger = setup_logger(__name__)
+
+MATRIX_NAMES = ("cooccurrence", "transitions", "shell_depth")
+
+
+def _increment(matrix: Dict[int, Dict[int, int]], row: int, column: int) -> None:
+    """Add one to a cell of a sparse count matrix."""
+    cells = matrix.get(row)
+    if cells is None:
+        matrix[row] = {column: 1}
+    else:
+        cells[column] = cells.get(column, 0) + 1
+
+
+class ResidueMatrices:
+    """
+    Incrementally maintained residue co-occurrence, transition and
+    shell/depth frequency matrices.
+
+    Patterns and (shell, depth) groups are numbered in order of first
+    appearance; these numbers are the row and column indices of exported
+    matrices. Each step counts a pattern once, however often the analyzer
+    reported it.
+    """
+
+    def __init__(self):
+        """Initialize empty matrices."""
+        self.pattern_ids: List[str] = []  # Index -> pattern ID
+        self.pattern_index: Dict[str, int] = {}  # Pattern ID -> index
+        self.pattern_counts: List[int] = []  # Steps in which each pattern was extracted
+        self.groups: List[Tuple[str, int]] = []  # Index -> (shell ID, depth)
+        self.group_index: Dict[Tuple[str, int], int] = {}
+        self.group_steps: List[int] = []  # Steps recorded for each (shell, depth)
+        self.steps = 0
+
+        self.cooccurrence: Dict[int, Dict[int, int]] = {}  # Symmetric, without the diagonal
+        self.transitions: Dict[int, Dict[int, int]] = {}  # Earlier step's pattern -> next step's pattern
+        self.shell_depth: Dict[int, Dict[int, int]] = {}  # Group -> pattern
+
+        self._previous: Dict[Hashable, Tuple[int, ...]] = {}  # Interaction -> patterns of its last step
+        self._ranked: Dict[Tuple[str, int], List[Tuple[int, int]]] = {}  # Cached sorted rows
+
+    def _pattern(self, pattern_id: str) -> int:
+        """Get a pattern's index, numbering it if new."""
+        index = self.pattern_index.get(pattern_id)
+        if index is None:
+            index = len(self.pattern_ids)
+            self.pattern_index[pattern_id] = index
+            self.pattern_ids.append(pattern_id)
+            self.pattern_counts.append(0)
+        return index
+
+    def _group(self, shell_id: str, depth: int) -> int:
+        """Get a (shell, depth) group's index, numbering it if new."""
+        key = (shell_id, depth)
+        index = self.group_index.get(key)
+        if index is None:
+            index = len(self.groups)
+            self.group_index[key] = index
+            self.groups.append(key)
+            self.group_steps.append(0)
+        return index
+
+    def record(self,
+               interaction_id: Hashable,
+               shell_id: str,
+               depth: int,
+               residue: Iterable[str]) -> None:
+        """
+        Record the residue extracted from one step.
+
+        Args:
+            interaction_id: The interaction the step belongs to
+            shell_id: ID of the shell that generated the step
+            depth: Recursion depth of the step
+            residue: Residue pattern IDs extracted from the step
+        """
+        patterns = tuple(dict.fromkeys(self._pattern(pattern_id) for pattern_id in residue))
+        group = self._group(shell_id, depth)
+        ranked = self._ranked
+
+        self.steps += 1
+        self.group_steps[group] += 1
+        for position, pattern in enumerate(patterns):
+            self.pattern_counts[pattern] += 1
+            _increment(self.shell_depth, group, pattern)
+            for other in patterns[position + 1:]:
+                _increment(self.cooccurrence, pattern, other)
+                _increment(self.cooccurrence, other, pattern)
+                ranked.pop(("cooccurrence", other), None)
+            ranked.pop(("cooccurrence", pattern), None)
+        if patterns:
+            ranked.pop(("shell_depth", group), None)
+
+        previous = self._previous.get(interaction_id, ())
+        for earlier in previous:
+            for pattern in patterns:
+                _increment(self.transitions, earlier, pattern)
+            if patterns:
+                ranked.pop(("transitions", earlier), None)
+        self._previous[interaction_id] = patterns
+
+    def forget_interaction(self, interaction_id: Hashable) -> None:
+        """
+        Stop tracking transitions for an interaction.
+
+        Its counts are kept; the next step recorded for it starts a new sequence.
+        """
+        self._previous.pop(interaction_id, None)
+
+    def _top(self, name: str, row: Optional[int], limit: int) -> List[Tuple[int, int]]:
+        """
+        Get the largest cells of a matrix row, largest count first.
+
+        Sorted rows are cached until the row changes, so repeated queries
+        cost O(limit).
+        """
+        if row is None:
+            return []
+
+        key = (name, row)
+        ranked = self._ranked.get(key)
+        if ranked is None:
+            cells = getattr(self, name).get(row, {})
+            ranked = sorted(cells.items(), key=lambda cell: (-cell[1], cell[0]))
+            self._ranked[key] = ranked
+        return ranked[:limit]
+
+    def top_cooccurring(self, pattern_id: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Get the patterns most often extracted in the same step as a pattern.
+
+        Args:
+            pattern_id: The residue pattern ID
+            limit: Maximum number of patterns to return
+
+        Returns:
+            (pattern ID, co-occurrence count) pairs, most frequent first
+        """
+        top = self._top("cooccurrence", self.pattern_index.get(pattern_id), limit)
+        return [(self.pattern_ids[pattern], count) for pattern, count in top]
+
+    def top_successors(self, pattern_id: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Get the patterns most often extracted in the step after a pattern.
+
+        Args:
+            pattern_id: The residue pattern ID
+            limit: Maximum number of patterns to return
+
+        Returns:
+            (pattern ID, transition count) pairs, most frequent first
+        """
+        top = self._top("transitions", self.pattern_index.get(pattern_id), limit)
+        return [(self.pattern_ids[pattern], count) for pattern, count in top]
+
+    def top_patterns(self, shell_id: str, depth: int, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Get the patterns a shell most often produces at a depth.
+
+        Args:
+            shell_id: The shell ID
+            depth: The recursion depth
+            limit: Maximum number of patterns to return
+
+        Returns:
+            (pattern ID, step count) pairs, most frequent first
+        """
+        top = self._top("shell_depth", self.group_index.get((shell_id, depth)), limit)
+        return [(self.pattern_ids[pattern], count) for pattern, count in top]
+
+    def cooccurrence_count(self, pattern_a: str, pattern_b: str) -> int:
+        """Get the number of steps in which two distinct patterns were both extracted."""
+        row = self.pattern_index.get(pattern_a)
+        column = self.pattern_index.get(pattern_b)
+        if row is None or column is None:
+            return 0
+        return self.cooccurrence.get(row, {}).get(column, 0)
+
+    def _matrix(self, name: str) -> Tuple[Dict[int, Dict[int, int]], Tuple[int, int]]:
+        """Get a matrix by name with its shape."""
+        if name not in MATRIX_NAMES:
+            raise ValueError(f"Unknown residue matrix {name}; expected one of {', '.join(MATRIX_NAMES)}")
+        rows = len(self.groups) if name == "shell_depth" else len(self.pattern_ids)
+        return getattr(self, name), (rows, len(self.pattern_ids))
+
+    def to_coo(self, name: str) -> Dict[str, Any]:
+        """
+        Export a matrix as COO triples.
+
+        Args:
+            name: "cooccurrence", "transitions" or "shell_depth"
+
+        Returns:
+            A dictionary with "shape" and parallel "rows", "columns" and "values" lists
+
+        Raises:
+            ValueError: If the matrix name is unknown
+        """
+        matrix, shape = self._matrix(name)
+        rows, columns, values = [], [], []
+        for row, cells in matrix.items():
+            for column, value in cells.items():
+                rows.append(row)
+                columns.append(column)
+                values.append(value)
+        return {"shape": shape, "rows": rows, "columns": columns, "values": values}
+
+    def to_numpy(self, name: str):
+        """
+        Export a matrix as a dense NumPy array.
+
+        Raises:
+            ValueError: If the matrix name is unknown
+            ImportError: If NumPy is not installed
+        """
+        import numpy as np
+
+        coo = self.to_coo(name)
+        array = np.zeros(coo["shape"], dtype=np.int64)
+        array[coo["rows"], coo["columns"]] = coo["values"]
+        return array
+
+    def to_scipy(self, name: str):
+        """
+        Export a matrix as a SciPy CSR sparse matrix.
+
+        Raises:
+            ValueError: If the matrix name is unknown
+            ImportError: If SciPy is not installed
+        """
+        from scipy.sparse import coo_matrix
+
+        coo = self.to_coo(name)
+        return coo_matrix(
+            (coo["values"], (coo["rows"], coo["columns"])), shape=coo["shape"]
+        ).tocsr()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a JSON-serializable snapshot of all matrices and their labels.
+
+        Returns:
+            A dictionary with the pattern and group labels, step counts and
+            each matrix as COO triples
+        """
+        return {
+            "pattern_ids": list(self.pattern_ids),
+            "pattern_counts": list(self.pattern_counts),
+            "groups": [list(group) for group in self.groups],
+            "group_steps": list(self.group_steps),
+            "steps": self.steps,
+            "matrices": {name: self.to_coo(name) for name in MATRIX_NAMES}
+        }
@@ -7,8 +7,15 @@ Shells are structured interaction templates that encode specific recursive patte
 
 import abc
 from dataclasses import dataclass, field
+from collections import OrderedDict
 from enum import Enum
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, Hashable, List, Optional, Any, Pattern, Tuple, Type, Union
+import hashlib
+import importlib
+import os
+import pickle
+import re
+import tempfile
 import uuid
 import json
 
@@ -18,6 +25,18 @@ from recursive_prompting.utils.logging import setup_logger
 # Configure logging
 logger = setup_logger(__name__)
 
+# Sentences are the runs of text between terminal punctuation marks
+SENTENCE_TERMINATORS = ".!?"
+_SENTENCE_PATTERN = re.compile(r"[^.!?]+")
+
+
+def iter_sentences(text: str):
+    """Yield the stripped, non-empty sentences of a text in order."""
+    for match in _SENTENCE_PATTERN.finditer(text):
+        sentence = match.group().strip()
+        if sentence:
+            yield sentence
+
 
 class ShellCategory(Enum):
     """Categories of recursive shells."""
@@ -203,6 +222,263 @@ class MotivationFramework:
         )
 
 
+def compile_marker_pattern(terms: List[str]) -> Pattern:
+    """
+    Compile marker terms into one pattern, so text is scanned once for all of them.
+    
+    Args:
+        terms: Lowercase marker terms, matched as substrings
+        
+    Returns:
+        The compiled pattern
+        
+    Raises:
+        ValueError: If there are no terms or a term is empty, which would
+            match any text
+    """
+    if not terms or not all(terms):
+        raise ValueError("Marker terms must be a non-empty list of non-empty strings")
+    return re.compile("|".join(re.escape(term) for term in terms))
+
+
+class InsightExtractor:
+    """
+    Single-pass insight selection over a stream of sentences.
+    
+    Keeps the first sentences that are longer than min_length and contain
+    a marker term, up to the limit, and the longest sentences seen so far
+    as a fallback. Ties keep the earlier sentence, matching a stable sort
+    by length.
+    """
+    
+    __slots__ = ("marker_pattern", "min_insight_length", "limit", "marked", "longest", "min_length")
+    
+    def __init__(self, 
+                marker_pattern: Pattern,
+                min_insight_length: int = 30,
+                limit: int = 2):
+        """
+        Initialize the extractor.
+        
+        Args:
+            marker_pattern: Compiled pattern matching lowercase marker terms
+            min_insight_length: Length a marker sentence must exceed to count
+            limit: Number of insights to select
+        """
+        self.marker_pattern = marker_pattern
+        self.min_insight_length = min_insight_length
+        self.limit = limit
+        self.marked = []  # Marker sentences, in order of appearance
+        self.longest = []  # Longest sentences, longest first
+        self.min_length = -1  # Length a sentence must exceed to enter longest
+    
+    @property
+    def done(self) -> bool:
+        """Whether enough marker sentences were found to ignore the rest."""
+        return len(self.marked) >= self.limit
+    
+    def add_sentence(self, sentence: str, lowered: Optional[str] = None) -> None:
+        """
+        Consider a sentence as an insight.
+        
+        Args:
+            sentence: A stripped, non-empty sentence
+            lowered: The sentence in lowercase, if already computed
+        """
+        if self.done:
+            return
+        
+        length = len(sentence)
+        if length > self.min_insight_length and self.marker_pattern.search(
+                sentence.lower() if lowered is None else lowered):
+            self.marked.append(sentence)
+        
+        # Bounded top-k by length; equal lengths stay in arrival order
+        longest = self.longest
+        if length > self.min_length:
+            position = len(longest)
+            while position > 0 and len(longest[position - 1]) < length:
+                position -= 1
+            longest.insert(position, sentence)
+            del longest[self.limit:]
+            if len(longest) == self.limit:
+                self.min_length = len(longest[-1])
+
+    def add_analysis(self, analysis: 'ResponseAnalysis') -> None:
+        """
+        Consider the sentences of an analyzed response, stopping once done.
+
+        Args:
+            analysis: Shared analysis of the response
+        """
+        for sentence, lowered in zip(analysis.sentences, analysis.lowered_sentences):
+            if self.done:
+                break
+            self.add_sentence(sentence, lowered)
+
+    def insights(self) -> List[str]:
+        """Get the selected insights."""
+        if self.done:
+            return list(self.marked)
+        return list(self.longest)
+
+
+@dataclass
+class PromptRequest:
+    """Inputs for generating one next prompt as part of a batch."""
+    context: Dict[str, Any]
+    previous_prompt: str
+    previous_response: str
+    depth: int
+    residue: List[str]
+
+
+# Rough characters per token of English text in common subword vocabularies
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "..."
+_TOKEN_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Same pieces, with words captured and punctuation matched as empty groups
+_WORD_PIECE_PATTERN = re.compile(r"(\w+)|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many model tokens a text takes.
+    
+    Counts words and punctuation marks, or characters / CHARS_PER_TOKEN for
+    text dominated by long words, whichever is larger.
+    
+    Args:
+        text: The text to measure
+        
+    Returns:
+        The estimated token count
+    """
+    return max(len(_TOKEN_PIECE_PATTERN.findall(text)), -(-len(text) // CHARS_PER_TOKEN))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Shorten a text at a word boundary so it fits a token budget.
+    
+    Args:
+        text: The text to shorten
+        max_tokens: Token budget for the result
+        
+    Returns:
+        The text itself if it fits, otherwise its longest fitting prefix of
+        whole words followed by TRUNCATION_MARKER, or "" if none fits
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    
+    # Binary search over word counts
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(" ".join(words[:middle]) + TRUNCATION_MARKER) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    
+    return " ".join(words[:low]) + TRUNCATION_MARKER if low else ""
+
+
+class ResponseAnalysis:
+    """
+    Shared text analysis of one response.
+    
+    The engine builds one per response and hands it to residue extraction,
+    metrics, the shell and the word-level feature indexes, so the text is
+    lowercased, split into sentences and tokenized at most once per step
+    however many consumers read it. Each part is computed on first access.
+    """
+    
+    __slots__ = ("text", "_lowered", "_sentences", "_lowered_sentences", "_words", "_token_count")
+    
+    def __init__(self, text: str):
+        """
+        Initialize the analysis of a response.
+        
+        Args:
+            text: The response text
+        """
+        self.text = text
+        self._lowered = None
+        self._sentences = None
+        self._lowered_sentences = None
+        self._words = None
+        self._token_count = None
+    
+    @property
+    def length(self) -> int:
+        """Length of the response in characters."""
+        return len(self.text)
+    
+    @property
+    def lowered(self) -> str:
+        """The response in lowercase."""
+        if self._lowered is None:
+            self._lowered = self.text.lower()
+        return self._lowered
+    
+    @property
+    def sentences(self) -> Tuple[str, ...]:
+        """The stripped, non-empty sentences of the response."""
+        if self._sentences is None:
+            self._sentences = tuple(iter_sentences(self.text))
+        return self._sentences
+    
+    @property
+    def lowered_sentences(self) -> Tuple[str, ...]:
+        """The sentences in lowercase, aligned with sentences, for keyword search."""
+        if self._lowered_sentences is None:
+            self._lowered_sentences = tuple(sentence.lower() for sentence in self.sentences)
+        return self._lowered_sentences
+    
+    @property
+    def words(self) -> List[str]:
+        """Lowercase word tokens of the response, without punctuation."""
+        if self._words is None:
+            self._tokenize()
+        return self._words
+    
+    @property
+    def token_estimate(self) -> int:
+        """Estimated model tokens, as estimate_tokens counts them, of the lowercased text."""
+        if self._token_count is None:
+            self._tokenize()
+        return max(self._token_count, -(-len(self.text) // CHARS_PER_TOKEN))
+    
+    def _tokenize(self) -> None:
+        """Split the lowercased text into words and punctuation in one pass."""
+        pieces = _WORD_PIECE_PATTERN.findall(self.lowered)
+        self._token_count = len(pieces)
+        self._words = list(filter(None, pieces))
+
+
+def render_template(template: str, context: Dict[str, Any]) -> str:
+    """
+    Fill the {key} placeholders of a prompt template from a context.
+    
+    Placeholders without a matching key are left in place.
+    
+    Args:
+        template: The prompt template
+        context: Context dictionary for template variables
+        
+    Returns:
+        The filled-in prompt
+    """
+    prompt = template
+    for key, value in context.items():
+        placeholder = f"{{{key}}}"
+        if placeholder in prompt:
+            prompt = prompt.replace(placeholder, str(value))
+    return prompt
+
+
 class Shell(abc.ABC):
     """
     Base class for recursive shells.
@@ -212,6 +488,25 @@ class Shell(abc.ABC):
     and motivation frameworks that guide recursive interactions.
     """
     
+    # Type name used by the shell factory to reconstruct serialized shells.
+    # Subclasses set this to the name they are registered under.
+    shell_type: Optional[str] = None
+    
+    # Bump when construction or from_dict changes so cached definitions are rebuilt
+    cache_version: str = "1"
+    
+    # Whether the next prompt depends only on the generation inputs. Shells
+    # that sample, call out or read external state set this to False so
+    # their prompts are never cached.
+    deterministic: bool = True
+    
+    # Template variables assemble_prompt may shorten to fit a token budget
+    budget_fields: Tuple[str, ...] = ()
+    
+    # Metadata known without constructing the shell. Shell classes that set
+    # it are listed by the registry without being built.
+    class_metadata: Optional[ShellMetadata] = None
+    
     def __init__(self, 
                 metadata: ShellMetadata,
                 command_alignments: List[CommandAlignment],
@@ -262,6 +557,133 @@ class Shell(abc.ABC):
         """
         raise NotImplementedError("Subclasses must implement generate_next_prompt")
     
+    def create_context(self, initial_prompt: str) -> Dict[str, Any]:
+        """
+        Build the per-interaction context for this shell.
+        
+        Called once when an interaction starts using the shell. Shells put
+        anything derived from the interaction as a whole here (topic,
+        schedules, selections) instead of re-deriving it on every step.
+        The context is kept in the interaction's ShellInstance.state.
+        
+        Args:
+            initial_prompt: The prompt that started the interaction
+            
+        Returns:
+            The initial context dictionary
+        """
+        return {}
+    
+    def create_stream_consumer(self) -> Optional[Any]:
+        """
+        Create a consumer for the sentences of a streamed response.
+        
+        Shells that can analyze responses incrementally return an object
+        with an add_sentence(sentence) method, and optionally a done property
+        that becomes True once further sentences are not needed. The finished
+        stream is passed to update_context. The default returns None.
+        
+        Returns:
+            A sentence consumer, or None
+        """
+        return None
+    
+    def update_context(self,
+                      context: Dict[str, Any],
+                      response: str,
+                      stream: Optional['ResponseStream'] = None,
+                      analysis: Optional[ResponseAnalysis] = None) -> None:
+        """
+        Update the interaction context with a new response.
+        
+        Called once per response, so the work here should only depend on
+        the new response. The default does nothing.
+        
+        Args:
+            context: The interaction context from create_context
+            response: The new response text
+            stream: The finished response stream, if the response was streamed
+            analysis: Shared analysis of the response, to reuse its sentences
+        """
+        pass
+    
+    def generate_next_prompt_in_context(self,
+                                       context: Dict[str, Any],
+                                       previous_prompt: str,
+                                       previous_response: str,
+                                       depth: int,
+                                       residue: List[str]) -> str:
+        """
+        Generate the next prompt using the interaction context.
+        
+        Shells that maintain a context override this to read from it. The
+        default ignores the context and calls generate_next_prompt.
+        
+        Args:
+            context: The interaction context from create_context
+            previous_prompt: The previous prompt
+            previous_response: The response to the previous prompt
+            depth: The current recursion depth
+            residue: Accumulated symbolic residue
+            
+        Returns:
+            The next prompt in the recursive sequence
+        """
+        return self.generate_next_prompt(previous_prompt, previous_response, depth, residue)
+    
+    def generate_next_prompts(self, batch: List[PromptRequest]) -> List[Union[str, Exception]]:
+        """
+        Generate next prompts for a batch of interactions using this shell.
+        
+        Shells can override this to share work across the batch. Failures
+        are returned in place of the prompt rather than raised, so one bad
+        item doesn't fail the batch. The default generates each item in turn.
+        
+        Args:
+            batch: Prompt requests, one per interaction
+            
+        Returns:
+            A prompt or the raised exception for each request, in order
+        """
+        results = []
+        for request in batch:
+            try:
+                results.append(self.generate_next_prompt_in_context(
+                    request.context,
+                    request.previous_prompt,
+                    request.previous_response,
+                    request.depth,
+                    request.residue
+                ))
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    def prompt_cache_inputs(self, request: PromptRequest) -> Optional[Hashable]:
+        """
+        Get the inputs that determine the next prompt, for prompt caching.
+        
+        Shells narrow this to what their prompt actually depends on, such
+        as only the residue patterns they react to, so more requests share
+        a cache entry. Returns None for non-deterministic shells.
+        
+        Args:
+            request: The prompt request
+            
+        Returns:
+            A hashable summary of the inputs, or None if the prompt can't be cached
+        """
+        if not self.deterministic:
+            return None
+        
+        return (
+            request.previous_prompt,
+            request.previous_response,
+            request.depth,
+            tuple(request.residue),
+            repr(request.context)
+        )
+    
     def get_command_alignment(self, command_name: str) -> Optional[CommandAlignment]:
         """
         Get a command alignment by name.
@@ -298,18 +720,88 @@ class Shell(abc.ABC):
             raise ValueError(f"Command '{command_name}' not found in shell {self.id}")
         
         # Apply template variables
-        prompt = command.prompt_template
-        for key, value in context.items():
-            placeholder = f"{{{key}}}"
-            if placeholder in prompt:
-                prompt = prompt.replace(placeholder, str(value))
+        prompt = render_template(command.prompt_template, context)
         
         logger.info(f"Applied command '{command_name}' from shell {self.id}")
         return prompt
     
+    def assemble_prompt(self, 
+                       command_name: str, 
+                       context: Dict[str, Any], 
+                       token_budget: Optional[int] = None) -> Tuple[str, int]:
+        """
+        Apply a command and fit the prompt into a token budget.
+        
+        When the filled-in prompt is over budget, the variables named in
+        budget_fields are shortened at word boundaries. The rest of the
+        prompt is kept whole and the remaining tokens are shared evenly
+        between those variables; tokens a short variable doesn't need go to
+        the others.
+        
+        Args:
+            command_name: The name of the command to apply
+            context: Context dictionary for template variables
+            token_budget: Maximum estimated tokens of the prompt (optional)
+            
+        Returns:
+            A tuple of (prompt, tokens_saved)
+            
+        Raises:
+            ValueError: If the command doesn't exist
+        """
+        command = self.get_command_alignment(command_name)
+        if not command:
+            raise ValueError(f"Command '{command_name}' not found in shell {self.id}")
+        
+        return self.fit_prompt(
+            lambda values: render_template(command.prompt_template, values), context, token_budget
+        )
+    
+    def fit_prompt(self, 
+                  render: Callable[[Dict[str, Any]], str], 
+                  context: Dict[str, Any], 
+                  token_budget: Optional[int] = None) -> Tuple[str, int]:
+        """
+        Render a prompt and fit it into a token budget, as assemble_prompt does.
+        
+        Lets shells with their own template rendering share the budget logic.
+        
+        Args:
+            render: Renders the prompt from a dictionary of template variables
+            context: Context dictionary for template variables
+            token_budget: Maximum estimated tokens of the prompt (optional)
+            
+        Returns:
+            A tuple of (prompt, tokens_saved)
+        """
+        prompt = render(context)
+        fields = [name for name in self.budget_fields if name in context]
+        if token_budget is None or not fields:
+            return prompt, 0
+        
+        full_tokens = estimate_tokens(prompt)
+        if full_tokens <= token_budget:
+            return prompt, 0
+        
+        shortened = dict(context)
+        for name in fields:
+            shortened[name] = ""
+        available = token_budget - estimate_tokens(render(shortened))
+        
+        # Shortest first, so their unused share carries over to longer ones
+        values = sorted(((estimate_tokens(str(context[name])), name) for name in fields))
+        for position, (tokens, name) in enumerate(values):
+            share = max(available, 0) // (len(values) - position)
+            shortened[name] = truncate_to_tokens(str(context[name]), share)
+            available -= estimate_tokens(shortened[name])
+        
+        prompt = render(shortened)
+        return prompt, max(0, full_tokens - estimate_tokens(prompt))
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert shell to dictionary representation."""
         return {
+            "type": self.shell_type,
             "metadata": self.metadata.to_dict(),
             "command_alignments": [cmd.to_dict() for cmd in self.command_alignments],
             "interpretability_map": self.interpretability_map.to_dict(),
@@ -353,6 +845,9 @@ class Shell(abc.ABC):
         """
         Load a shell from a file.
         
+        When called on the base class, the concrete shell class is resolved
+        from the definition's type field through the shell factory.
+        
         Args:
             filepath: Path to the shell definition file
             
@@ -362,6 +857,8 @@ class Shell(abc.ABC):
         with open(filepath, 'r') as f:
             data = json.load(f)
         
+        if cls is Shell:
+            return shell_factory.create(data)
         return cls.from_dict(data)
     
     def get_formatted_representation(self) -> str:
@@ -413,6 +910,179 @@ Motivation:
         return map_str
 
 
+class PromptCache:
+    """
+    Size-bounded LRU cache of generated prompts.
+    
+    Entries are keyed by shell ID and version plus a digest of the inputs
+    reported by Shell.prompt_cache_inputs, so large responses are not kept
+    alive by the cache. Retries and replays of the same step are served
+    without running the shell again.
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        """
+        Initialize the prompt cache.
+        
+        Args:
+            max_size: Maximum number of cached prompts
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()  # Key -> (prompt, tokens_saved), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def key(self, shell: Shell, request: PromptRequest) -> Optional[Tuple[str, str, bytes]]:
+        """
+        Build the cache key for a prompt request.
+        
+        Args:
+            shell: The shell generating the prompt
+            request: The prompt request
+            
+        Returns:
+            The cache key, or None if the shell's prompts can't be cached
+        """
+        inputs = shell.prompt_cache_inputs(request)
+        if inputs is None:
+            return None
+        
+        digest = hashlib.blake2b(
+            repr(inputs).encode("utf-8", "surrogatepass"),
+            digest_size=16
+        ).digest()
+        return (shell.id, shell.metadata.version, digest)
+    
+    def get(self, key: Tuple[str, str, bytes]) -> Optional[Tuple[str, int]]:
+        """Get a cached (prompt, tokens_saved) entry, or None on a miss."""
+        prompt = self.entries.get(key)
+        if prompt is None:
+            self.misses += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return prompt
+    
+    def put(self, key: Tuple[str, str, bytes], prompt: Tuple[str, int]) -> None:
+        """Cache a (prompt, tokens_saved) entry, evicting the least recently used entry if full."""
+        self.entries[key] = prompt
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        """Remove all cached prompts."""
+        self.entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get hit, miss and eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class ResponseStream:
+    """
+    Incremental sentence segmentation for a response arriving in chunks.
+    
+    Each sentence is passed to the shell's stream consumer as soon as its
+    terminating punctuation arrives. Sentences match those produced by
+    iter_sentences on the full response.
+    """
+    
+    def __init__(self, consumer: Optional[Any] = None):
+        """
+        Initialize the response stream.
+        
+        Args:
+            consumer: Sentence consumer from Shell.create_stream_consumer (optional)
+        """
+        self.consumer = consumer
+        self.finished = False
+        self._chunks = []  # All chunks received so far
+        self._pending = []  # Chunks after the last sentence terminator
+    
+    @property
+    def text(self) -> str:
+        """The response text received so far."""
+        return "".join(self._chunks)
+    
+    def feed(self, chunk: str) -> None:
+        """
+        Add a chunk of the response.
+        
+        Args:
+            chunk: The next piece of response text
+            
+        Raises:
+            ValueError: If the stream has already finished
+        """
+        if self.finished:
+            raise ValueError("Cannot feed a finished response stream")
+        
+        self._chunks.append(chunk)
+        boundary = max(chunk.rfind(terminator) for terminator in SENTENCE_TERMINATORS)
+        if boundary < 0:
+            self._pending.append(chunk)
+            return
+        
+        self._pending.append(chunk[:boundary])
+        completed = "".join(self._pending)
+        self._pending = [chunk[boundary + 1:]]
+        self._emit(completed)
+    
+    def finish(self) -> str:
+        """
+        Mark the response as complete and flush the trailing sentence.
+        
+        Returns:
+            The full response text
+        """
+        if not self.finished:
+            self.finished = True
+            self._emit("".join(self._pending))
+            self._pending = []
+        return self.text
+    
+    def _emit(self, text: str) -> None:
+        """Pass the completed sentences in text to the consumer."""
+        consumer = self.consumer
+        if consumer is None or getattr(consumer, "done", False):
+            return
+        
+        for sentence in iter_sentences(text):
+            consumer.add_sentence(sentence)
+            if getattr(consumer, "done", False):
+                break
+
+
+MASTERY_START = 0.2  # Mastery after the first execution of a shell (novice level)
+
+
+def advance_mastery(current: Optional[float]) -> float:
+    """
+    Get the mastery after one more execution of a shell.
+
+    Mastery starts at MASTERY_START and approaches 1.0 (master) with
+    diminishing returns.
+
+    Args:
+        current: Mastery before the execution, or None for a first execution
+    """
+    if current is None:
+        return MASTERY_START
+    return min(1.0, current + (0.1 * (1.0 - current)))
+
+
 @dataclass
 class ShellInstance:
     """
@@ -425,19 +1095,24 @@ class ShellInstance:
     state: Dict[str, Any] = field(default_factory=dict)
     execution_count: int = 0
     residue_generated: List[str] = field(default_factory=list)
-    mastery_score: float = 0.2  # Starting at 0.2 (novice level)
+    mastery_score: float = MASTERY_START  # Starting at 0.2 (novice level)
+    player_id: Optional[str] = None  # Player whose mastery executions count towards
+    mastery_store: Optional[Any] = None  # MasteryStore shared across interactions; leave unset
+                                         # when steps are also recorded by InteractionMetrics
     
     def update_state(self, key: str, value: Any) -> None:
         """Update shell instance state."""
         self.state[key] = value
     
     def increment_execution(self) -> None:
-        """Increment execution count and update mastery."""
+        """Increment execution count and update mastery, in the mastery store too if one is bound."""
         self.execution_count += 1
         
         # Update mastery with diminishing returns
         # Mastery ranges from 0.2 (novice) to 1.0 (master)
-        self.mastery_score = min(1.0, self.mastery_score + (0.1 * (1.0 - self.mastery_score)))
+        self.mastery_score = advance_mastery(self.mastery_score)
+        if self.mastery_store is not None and self.player_id is not None:
+            self.mastery_store.record(self.player_id, self.shell.id)
     
     def add_residue(self, residue: List[str]) -> None:
         """Add generated residue to tracking."""
@@ -455,6 +1130,223 @@ class ShellInstance:
         }
 
 
+# Built-in shell types, as entry-point style "module:ClassName" references.
+# Modules are only imported when a shell of that type is first requested.
+BUILTIN_SHELL_TYPES = {
+    "COINFLUX-SEED": "recursive_prompting.shells.foundation.coinflux_seed:CoinfluxSeedShell",
+    "declarative": "recursive_prompting.shells.declarative:DeclarativeShell",
+}
+
+
+class ShellFactory:
+    """
+    Factory for constructing shells from their type name.
+    
+    Shell types map either to a Shell subclass or to an entry-point style
+    "module:ClassName" reference. References are imported lazily the first
+    time the type is resolved, and the resulting class is cached so later
+    lookups cost a single dictionary access.
+    """
+    
+    def __init__(self, shell_types: Optional[Dict[str, Union[str, Type[Shell]]]] = None):
+        """
+        Initialize the shell factory.
+        
+        Args:
+            shell_types: Initial mapping of type names to classes or references
+        """
+        self.shell_types = dict(shell_types or {})  # Type name -> class or "module:ClassName"
+        self._resolved = {}  # Type name -> resolved Shell subclass
+    
+    def register_type(self, shell_type: str, target: Union[str, Type[Shell]]) -> None:
+        """
+        Register a shell type.
+        
+        Args:
+            shell_type: The type name recorded in shell definitions
+            target: A Shell subclass or a "module:ClassName" reference
+        """
+        self.shell_types[shell_type] = target
+        self._resolved.pop(shell_type, None)
+        logger.info(f"Registered shell type {shell_type}")
+    
+    def has_type(self, shell_type: str) -> bool:
+        """Check whether a shell type is registered."""
+        return shell_type in self.shell_types
+    
+    def resolve(self, shell_type: str) -> Type[Shell]:
+        """
+        Resolve a type name to its Shell subclass, importing it on first use.
+        
+        Args:
+            shell_type: The type name to resolve
+            
+        Returns:
+            The Shell subclass registered for the type
+            
+        Raises:
+            ValueError: If the type is unknown or its reference cannot be imported
+        """
+        shell_cls = self._resolved.get(shell_type)
+        if shell_cls is not None:
+            return shell_cls
+        
+        if shell_type not in self.shell_types:
+            raise ValueError(f"Unknown shell type {shell_type}")
+        
+        target = self.shell_types[shell_type]
+        if isinstance(target, str):
+            module_name, _, class_name = target.partition(":")
+            try:
+                module = importlib.import_module(module_name)
+                shell_cls = getattr(module, class_name)
+            except (ImportError, AttributeError) as e:
+                raise ValueError(f"Cannot import shell type {shell_type} from {target}: {e}")
+        else:
+            shell_cls = target
+        
+        self._resolved[shell_type] = shell_cls
+        return shell_cls
+    
+    def create(self, data: Dict[str, Any]) -> Shell:
+        """
+        Create a shell from its dictionary representation.
+        
+        The type is read from the top-level "type" field. Definitions written
+        before the field existed fall back to the shell ID.
+        
+        Args:
+            data: Dictionary representation of the shell
+            
+        Returns:
+            A Shell instance of the registered type
+        """
+        shell_type = data.get("type") or data.get("metadata", {}).get("id")
+        return self.resolve(shell_type).from_dict(data)
+
+
+# Global shell factory
+shell_factory = ShellFactory(BUILTIN_SHELL_TYPES)
+
+
+# Layout version of cache entries written by ShellDefinitionCache
+SHELL_CACHE_FORMAT = 1
+
+
+class ShellDefinitionCache:
+    """
+    On-disk cache of fully constructed shells.
+    
+    Entries are pickled shells keyed by the SHA-256 of the definition file's
+    content. Each entry also records the shell class's cache_version. On load
+    the entry is validated against both, and any mismatch or unreadable entry
+    falls back to parsing the JSON definition and rewrites the entry.
+    
+    The cache directory must only be writable by trusted processes, since
+    entries are unpickled.
+    """
+    
+    def __init__(self, cache_dir: str, factory: Optional[ShellFactory] = None):
+        """
+        Initialize the shell definition cache.
+        
+        Args:
+            cache_dir: Directory holding cache entries (created if missing)
+            factory: Shell factory used on cache misses (defaults to the global factory)
+        """
+        self.cache_dir = cache_dir
+        self.factory = factory or shell_factory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def _entry_path(self, content_hash: str) -> str:
+        """Get the cache entry path for a content hash."""
+        return os.path.join(self.cache_dir, f"{content_hash}.pickle")
+    
+    def load(self, filepath: str) -> Shell:
+        """
+        Load a shell definition, using the cached shell when it is valid.
+        
+        Args:
+            filepath: Path to the shell definition file
+            
+        Returns:
+            A Shell instance
+        """
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        
+        shell = self._read_entry(content_hash)
+        if shell is not None:
+            self.hits += 1
+            return shell
+        
+        self.misses += 1
+        shell = self.factory.create(json.loads(raw))
+        self._write_entry(content_hash, shell)
+        return shell
+    
+    def _read_entry(self, content_hash: str) -> Optional[Shell]:
+        """Read and validate a cache entry, returning None if it can't be used."""
+        path = self._entry_path(content_hash)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable shell cache entry {path}: {e}")
+            return None
+        
+        if not isinstance(entry, dict) or entry.get("format") != SHELL_CACHE_FORMAT:
+            return None
+        
+        shell = entry.get("shell")
+        if (not isinstance(shell, Shell) or 
+            entry.get("content_hash") != content_hash or 
+            entry.get("cache_version") != type(shell).cache_version):
+            return None
+        
+        return shell
+    
+    def _write_entry(self, content_hash: str, shell: Shell) -> None:
+        """Atomically write a cache entry."""
+        entry = {
+            "format": SHELL_CACHE_FORMAT,
+            "content_hash": content_hash,
+            "cache_version": type(shell).cache_version,
+            "shell": shell
+        }
+        
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._entry_path(content_hash))
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Could not write shell cache entry for {shell.id}: {e}")
+    
+    def clear(self) -> int:
+        """
+        Remove all cache entries.
+        
+        Returns:
+            Number of entries removed
+        """
+        count = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".pickle"):
+                os.remove(os.path.join(self.cache_dir, filename))
+                count += 1
+        return count
+
+
 class ShellRegistry:
     """
     Registry for managing and loading recursive shells.
@@ -463,10 +1355,22 @@ class ShellRegistry:
     and discovering recursive shells.
     """
     
-    def __init__(self):
-        """Initialize the shell registry."""
+    def __init__(self, 
+                factory: Optional[ShellFactory] = None,
+                cache: Optional[ShellDefinitionCache] = None):
+        """
+        Initialize the shell registry.
+        
+        Args:
+            factory: Shell factory used to construct shells (defaults to the global factory)
+            cache: Compiled definition cache used when loading shell files (optional)
+        """
         self.shells = {}  # Dictionary mapping shell_id to Shell instances
         self.shell_paths = {}  # Dictionary mapping shell_id to file paths
+        self.shell_classes = {}  # Dictionary mapping shell_id to Shell classes not yet instantiated
+        self.template_sets = {}  # Dictionary mapping template set ID to compiled library templates
+        self.factory = factory or shell_factory
+        self.cache = cache
         logger.info("Initialized ShellRegistry")
     
     def register_shell(self, shell: Shell) -> None:
@@ -479,6 +1383,25 @@ class ShellRegistry:
         self.shells[shell.id] = shell
         logger.info(f"Registered shell {shell.id} ({shell.metadata.name})")
     
+    def register_shell_class(self, shell_cls: Type[Shell], shell_id: Optional[str] = None) -> None:
+        """
+        Register a shell class without constructing it.
+        
+        Only the class and ID are recorded; the shell instance is built the
+        first time it is requested through get_shell. This keeps importing a
+        shell module cheap.
+        
+        Args:
+            shell_cls: The shell class to register
+            shell_id: The ID of the shell (defaults to the class shell_type)
+        """
+        shell_id = shell_id or shell_cls.shell_type
+        if not shell_id:
+            raise ValueError(f"Shell class {shell_cls.__name__} has no shell_type; pass shell_id")
+        
+        self.shell_classes[shell_id] = shell_cls
+        logger.debug(f"Registered shell class {shell_cls.__name__} as {shell_id}")
+    
     def register_shell_path(self, shell_id: str, filepath: str) -> None:
         """
         Register a shell file path with the registry.
@@ -504,20 +1427,30 @@ class ShellRegistry:
             ValueError: If the shell doesn't exist
         """
         # If shell is already loaded, return it
-        if shell_id in self.shells:
-            return self.shells[shell_id]
+        shell = self.shells.get(shell_id)
+        if shell is not None:
+            return shell
         
-        # If we have a path, try to load it
         if shell_id in self.shell_paths:
-            # This requires knowledge of the specific shell class
-            # In a real implementation, the file would contain type information
-            # or we would use a factory pattern
-            from recursive_prompting.shells.foundation.coinflux_seed import CoinfluxSeedShell
-            shell = CoinfluxSeedShell.load(self.shell_paths[shell_id])
-            self.shells[shell_id] = shell
-            return shell
+            # Definition file: the factory picks the class from its type field
+            filepath = self.shell_paths[shell_id]
+            if self.cache is not None:
+                shell = self.cache.load(filepath)
+            else:
+                with open(filepath, 'r') as f:
+                    data = json.load(f)
+                shell = self.factory.create(data)
+        elif shell_id in self.shell_classes:
+            # Declared at import time, constructed on first use
+            shell = self.shell_classes[shell_id]()
+        elif self.factory.has_type(shell_id):
+            # Built-in shell registered under its own ID
+            shell = self.factory.resolve(shell_id)()
+        else:
+            raise ValueError(f"Shell {shell_id} not found in registry")
         
-        raise ValueError(f"Shell {shell_id} not found in registry")
+        self.shells[shell_id] = shell
+        return shell
     
     def list_shells(self, 
                    level: Optional[Level] = None, 
@@ -525,6 +1458,9 @@ class ShellRegistry:
         """
         List available shells, optionally filtered by level or category.
         
+        Declared shell classes are listed from their class_metadata; those
+        without it are constructed to read their metadata.
+        
         Args:
             level: Filter by level (optional)
             category: Filter by category (optional)
@@ -543,6 +1479,22 @@ class ShellRegistry:
             
             results.append(shell.metadata.to_dict())
         
+        # Then check declared shell classes not yet constructed, from their
+        # class metadata; classes without it have to be constructed
+        for shell_id, shell_cls in list(self.shell_classes.items()):
+            if shell_id in self.shells or shell_id in self.shell_paths:
+                continue
+            
+            metadata = shell_cls.class_metadata
+            if metadata is None:
+                metadata = self.get_shell(shell_id).metadata
+            if level and metadata.level != level:
+                continue
+            if category and metadata.category != category:
+                continue
+            
+            results.append(metadata.to_dict())
+        
         # Then check shell paths not yet loaded
         for shell_id, filepath in self.shell_paths.items():
             if shell_id in self.shells:
@@ -593,6 +1545,50 @@ class ShellRegistry:
         
         logger.info(f"Registered {count} shells from {directory}")
         return count
+    
+    def register_template_library(self, 
+                                 directory: Optional[str] = None, 
+                                 cache_dir: Optional[str] = None) -> int:
+        """
+        Register the compiled templates of a markdown prompt library.
+        
+        With a cache directory, files whose content is unchanged are loaded
+        from their compiled cache entries instead of being parsed.
+        
+        Args:
+            directory: Prompt library directory (defaults to the bundled library)
+            cache_dir: Directory for compiled template cache entries (optional)
+            
+        Returns:
+            Number of template sets registered
+        """
+        from recursive_prompting.templates import LIBRARY_DIR, TemplateCache, load_template_library
+        
+        cache = TemplateCache(cache_dir) if cache_dir else None
+        template_sets = load_template_library(directory or LIBRARY_DIR, cache)
+        for template_set in template_sets:
+            self.template_sets[template_set.id] = template_set
+        
+        logger.info(f"Registered {len(template_sets)} template sets from {directory or LIBRARY_DIR}")
+        return len(template_sets)
+    
+    def get_command_alignments(self, template_set_id: str) -> List[CommandAlignment]:
+        """
+        Get the library templates registered for a shell or library file.
+        
+        Args:
+            template_set_id: Shell ID of a shell template file, or the name of a game level file
+            
+        Returns:
+            The templates as command alignments, in document order
+            
+        Raises:
+            ValueError: If no templates were registered under the ID
+        """
+        template_set = self.template_sets.get(template_set_id)
+        if template_set is None:
+            raise ValueError(f"No library templates registered for {template_set_id}")
+        return template_set.command_alignments()
 
 
 # Global shell registry
@@ -609,6 +1605,35 @@ def register_shell(shell: Shell) -> None:
     shell_registry.register_shell(shell)
 
 
+def register_shell_class(shell_cls: Type[Shell], shell_id: Optional[str] = None) -> Type[Shell]:
+    """
+    Declare a shell class with the global registry.
+    
+    The shell is constructed lazily on first get_shell. Returns the class
+    so this can also be used as a class decorator.
+    
+    Args:
+        shell_cls: The shell class to register
+        shell_id: The ID of the shell (defaults to the class shell_type)
+        
+    Returns:
+        The registered shell class
+    """
+    shell_registry.register_shell_class(shell_cls, shell_id)
+    return shell_cls
+
+
+def register_shell_type(shell_type: str, target: Union[str, Type[Shell]]) -> None:
+    """
+    Register a shell type with the global factory.
+    
+    Args:
+        shell_type: The type name recorded in shell definitions
+        target: A Shell subclass or a "module:ClassName" reference
+    """
+    shell_factory.register_type(shell_type, target)
+
+
 def get_shell(shell_id: str) -> Shell:
     """
     Get a shell from the global registry.
@@ -0,0 +1,219 @@
+"""
+Recursive Prompting - Residue Backfill
+
+Re-extracts the residue of saved interaction files after the residue
+catalog changes. Files are processed by a pool of worker processes that
+share the compiled catalog (inherited by fork where available), and each
+file is rewritten in place as soon as its residue is extracted.
+
+Completed files are recorded in a journal together with the catalog
+version, a hash of the catalog contents, so an interrupted run resumes
+where it stopped, and a run with a changed catalog starts over. A catalog
+whose contents can't be hashed has no version, and runs with it must be
+started with --restart.
+
+Usage:
+    python tools/backfill_residue.py interactions/ --signatures catalog.json --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+from recursive_prompting.residue.analyzer import ResidueAnalyzer
+from recursive_prompting.residue.catalog import ResidueCatalog
+from recursive_prompting.residue.extractor import ResidueExtractor
+
+JOURNAL_NAME = ".residue_backfill"
+
+_analyzer = None  # Residue analyzer of this worker process
+
+
+def iter_interaction_files(paths: Iterable[str]) -> Iterable[str]:
+    """Yield the interaction JSON files among paths, walking directories in sorted order."""
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, filenames in os.walk(path):
+                subdirectories.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith(".json"):
+                        yield os.path.join(directory, filename)
+        else:
+            yield path
+
+
+def load_journal(journal_path: str, version: str) -> Set[str]:
+    """Get the files a previous run completed with the same catalog version."""
+    completed = set()
+    try:
+        with open(journal_path, 'r') as f:
+            for line in f:
+                entry_version, _, path = line.rstrip("\n").partition("\t")
+                if entry_version == version:
+                    completed.add(path)
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def _init_worker(analyzer: Any) -> None:
+    """Install the residue analyzer in a worker process."""
+    global _analyzer
+    _analyzer = analyzer
+
+
+def backfill_file(task: Tuple[str, str]) -> Tuple[str, Optional[int], Optional[str]]:
+    """
+    Re-extract the residue of one saved interaction and rewrite the file.
+
+    Args:
+        task: The file path and the catalog version to stamp it with
+
+    Returns:
+        The path, the number of residue patterns extracted (None on failure)
+        and an error message (None on success)
+    """
+    path, version = task
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        extracted_residue = []
+        for step in data["steps"]:
+            if step.get("response"):
+                extracted_residue.extend(
+                    _analyzer.extract_residue(prompt=step["prompt"], response=step["response"])
+                )
+
+        data["extracted_residue"] = extracted_residue
+        data.setdefault("metrics", {})["residue_count"] = len(extracted_residue)
+        data["residue_catalog_version"] = version
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return path, len(extracted_residue), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def catalog_version(catalog: Any) -> Optional[str]:
+    """
+    Get a version string for a residue catalog from a hash of its contents.
+
+    Args:
+        catalog: The catalog, hashed through its to_dict() if it has one,
+            else through its attributes
+
+    Returns:
+        A hex digest, or None if the contents are not JSON-serializable
+    """
+    to_dict = getattr(catalog, "to_dict", None)
+    try:
+        contents = to_dict() if to_dict is not None else vars(catalog)
+        encoded = json.dumps(contents, sort_keys=True).encode("utf-8")
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def build_analyzer(signatures_path: Optional[str]) -> Tuple[Any, Optional[str]]:
+    """
+    Build the residue analyzer and its catalog version.
+
+    Args:
+        signatures_path: JSON file mapping residue pattern IDs to signature
+            terms, compiled into a ResidueExtractor (optional; defaults to
+            the ResidueAnalyzer over the built-in catalog)
+
+    Returns:
+        The analyzer and a version string identifying its catalog, or None
+        if the built-in catalog can't be versioned
+    """
+    if signatures_path is None:
+        catalog = ResidueCatalog()
+        analyzer = ResidueAnalyzer(catalog)
+        version = getattr(analyzer, "version", None)
+        return analyzer, str(version) if version is not None else catalog_version(catalog)
+
+    with open(signatures_path, 'r') as f:
+        signatures = json.load(f)
+    extractor = ResidueExtractor(signatures)
+    return extractor, extractor.version
+
+
+def main(argv: List[str] = None) -> int:
+    """Run the backfill and report throughput."""
+    parser = argparse.ArgumentParser(description="Re-extract residue for saved interactions")
+    parser.add_argument("paths", nargs="+", help="Interaction files or directories of them")
+    parser.add_argument("--signatures", help="JSON file mapping residue pattern IDs to signature terms")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--chunksize", type=int, default=16, help="Files handed to a worker at a time")
+    parser.add_argument("--journal", help=f"Progress journal (default: {JOURNAL_NAME} in the first directory)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the journal and process every file")
+    args = parser.parse_args(argv)
+
+    analyzer, version = build_analyzer(args.signatures)
+    if version is None:
+        if not args.restart:
+            print("Cannot determine the residue catalog version, so the journal can't tell "
+                  "whether files are up to date; rerun with --restart", file=sys.stderr)
+            return 2
+        version = "unversioned"
+
+    journal_path = args.journal
+    if journal_path is None:
+        first = args.paths[0]
+        journal_path = os.path.join(first if os.path.isdir(first) else os.path.dirname(first) or ".", JOURNAL_NAME)
+    completed = set() if args.restart else load_journal(journal_path, version)
+
+    tasks = [
+        (path, version) for path in iter_interaction_files(args.paths)
+        if os.path.abspath(path) not in completed
+    ]
+    print(f"Backfilling {len(tasks)} files with catalog {version} "
+          f"({len(completed)} already done, {args.workers} workers)", file=sys.stderr)
+
+    # Workers inherit the compiled analyzer through fork instead of recompiling it
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+    done = 0
+    failed = 0
+    start = time.perf_counter()
+    last_report = start
+    with open(journal_path, 'a') as journal, \
+            context.Pool(args.workers, initializer=_init_worker, initargs=(analyzer,)) as pool:
+        for path, residue_count, error in pool.imap_unordered(backfill_file, tasks, args.chunksize):
+            if error is not None:
+                failed += 1
+                print(f"Failed {path}: {error}", file=sys.stderr)
+                continue
+
+            done += 1
+            journal.write(f"{version}\t{os.path.abspath(path)}\n")
+            now = time.perf_counter()
+            if now - last_report >= 5.0:
+                journal.flush()
+                print(f"{done}/{len(tasks)} files, {done / (now - start):.1f} files/s", file=sys.stderr)
+                last_report = now
+
+    elapsed = time.perf_counter() - start
+    print(f"Backfilled {done} files in {elapsed:.1f} s ({done / max(elapsed, 1e-9):.1f} files/s), "
+          f"{failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Recursive Prompting - Insight Extraction Benchmark
+
+Checks that CoinfluxSeedShell.generate_next_prompt produces exactly the
+prompts of the original multi-pass implementation on a golden corpus, then
+times insight extraction on large responses.
+
+Usage:
+    python tools/bench_insights.py --size-kb 100 --repeat 20
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from typing import List
+
+from recursive_prompting.shells.foundation.coinflux_seed import (
+    CoinfluxSeedShell,
+    INSIGHT_MARKERS,
+    extract_insights
+)
+
+
+def legacy_insights(previous_response: str) -> List[str]:
+    """Insight selection as originally written in generate_next_prompt."""
+    sentences = [s.strip() for s in re.split(r'[.!?]', previous_response) if s.strip()]
+    insights = []
+
+    for sentence in sentences:
+        if len(sentence) > 30 and any(term in sentence.lower() for term in ["because", "therefore", "however", "suggests", "indicates", "shows", "reveals", "means"]):
+            insights.append(sentence)
+
+    if len(insights) < 2:
+        insights = sorted(sentences, key=len, reverse=True)[:2]
+    return insights
+
+
+def legacy_generate_next_prompt(shell: CoinfluxSeedShell,
+                                previous_prompt: str,
+                                previous_response: str,
+                                depth: int,
+                                residue: List[str]) -> str:
+    """generate_next_prompt as originally written, kept as the golden reference."""
+    topic_match = re.search(r"concept of ([^\.]+)", previous_prompt)
+    if not topic_match and "topic" not in previous_prompt:
+        words = previous_prompt.split()
+        potential_topics = [w for w in words if len(w) > 5]
+        topic = potential_topics[0] if potential_topics else "this subject"
+    else:
+        topic = topic_match.group(1) if topic_match else "this subject"
+
+    insights = legacy_insights(previous_response)
+
+    dimensions = [
+        "underlying principles",
+        "practical applications",
+        "historical context",
+        "future implications",
+        "ethical considerations",
+        "systemic relationships",
+        "metaphorical representations",
+        "cross-domain connections"
+    ]
+    new_dimension = dimensions[min(depth - 1, len(dimensions) - 1)]
+
+    patterns = []
+    if depth > 1:
+        if "RECURSION-ITSELF" in residue:
+            patterns.append("Our recursive exploration is creating increasingly deeper layers of understanding")
+        if "META-REFLECTION" in residue:
+            patterns.append("We're not just exploring the topic, but also our process of exploration itself")
+        if depth > 3:
+            patterns.append("Each recursive cycle brings new dimensions that transform our previous understanding")
+    pattern = patterns[0] if patterns else "Our perspectives seem to be building upon each other in interesting ways"
+
+    if depth == 1:
+        command = shell.get_command_alignment("INITIATE")
+        context = {"topic": topic}
+    elif depth % 3 == 0:
+        command = shell.get_command_alignment("RECURSE")
+        context = {"topic": topic, "pattern": pattern}
+    else:
+        command = shell.get_command_alignment("NURTURE")
+        context = {
+            "topic": topic,
+            "insight_1": insights[0],
+            "insight_2": insights[1] if len(insights) > 1 else "Your exploration of multiple perspectives",
+            "new_dimension": new_dimension
+        }
+    return shell.apply_command(command.name, context)
+
+
+WORDS = [
+    "recursion", "emergence", "pattern", "system", "loop", "feedback", "layer",
+    "insight", "structure", "signal", "İstanbul", "Straße", "KELVIN", "naïve",
+    "co-intelligence", "the", "a", "of", "and", "to", "in"
+] + [term.upper() for term in INSIGHT_MARKERS] + list(INSIGHT_MARKERS)
+
+PUNCTUATION = [".", "!", "?", "...", ". ", "\n\n", "?!", ""]
+
+
+def make_response(rng: random.Random, target_chars: int, marker_rate: float) -> str:
+    """Build a synthetic response of roughly target_chars characters."""
+    parts = []
+    size = 0
+    while size < target_chars:
+        words = [rng.choice(WORDS[:21]) for _ in range(rng.randint(0, 25))]
+        if words and rng.random() < marker_rate:
+            words.insert(rng.randrange(len(words)), rng.choice(INSIGHT_MARKERS))
+        sentence = " ".join(words) + rng.choice(PUNCTUATION)
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)
+
+
+def make_prompt(rng: random.Random) -> str:
+    """Build a synthetic previous prompt covering each topic extraction branch."""
+    return rng.choice([
+        "Let's explore the concept of {} through recursion.".format(rng.choice(WORDS)),
+        "Let's explore the concept of emergent systems",
+        "Tell me about this topic please",
+        "short words only",
+        "",
+        "An interesting exploration of {}".format(rng.choice(WORDS)),
+    ])
+
+
+def check_golden_corpus(cases: int, seed: int) -> int:
+    """
+    Compare new and legacy prompt generation on a generated corpus.
+
+    Returns:
+        Number of mismatching cases
+    """
+    rng = random.Random(seed)
+    shell = CoinfluxSeedShell()
+    residues = [[], ["RECURSION-ITSELF"], ["META-REFLECTION"], ["META-REFLECTION", "RECURSION-ITSELF"]]
+    mismatches = 0
+
+    for case in range(cases):
+        prompt = make_prompt(rng)
+        response = make_response(rng, rng.choice([0, 40, 400, 4000]), rng.choice([0.0, 0.05, 0.5]))
+        depth = rng.randint(1, 12)
+        residue = rng.choice(residues)
+
+        try:
+            expected = legacy_generate_next_prompt(shell, prompt, response, depth, residue)
+        except IndexError:
+            expected = IndexError
+        try:
+            actual = shell.generate_next_prompt(prompt, response, depth, residue)
+        except IndexError:
+            actual = IndexError
+
+        if actual != expected:
+            mismatches += 1
+            print(f"Mismatch in case {case} at depth {depth}", file=sys.stderr)
+    return mismatches
+
+
+def time_call(func, text: str, repeat: int) -> float:
+    """Return the best per-call time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main(argv: List[str] = None) -> int:
+    """Run the golden corpus check and the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark COINFLUX-SEED insight extraction")
+    parser.add_argument("--cases", type=int, default=2000, help="Golden corpus size")
+    parser.add_argument("--size-kb", type=int, default=100, help="Benchmark response size")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    mismatches = check_golden_corpus(args.cases, args.seed)
+    print(f"Golden corpus: {args.cases - mismatches}/{args.cases} identical")
+
+    rng = random.Random(args.seed)
+    for label, marker_rate in [("marker-rich", 0.3), ("marker-free", 0.0)]:
+        text = make_response(rng, args.size_kb * 1024, marker_rate)
+        legacy_ms = time_call(legacy_insights, text, args.repeat)
+        new_ms = time_call(extract_insights, text, args.repeat)
+        print(f"{args.size_kb} KB {label}: legacy {legacy_ms:.2f} ms, "
+              f"single-pass {new_ms:.2f} ms ({legacy_ms / max(new_ms, 1e-9):.1f}x)")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Recursive Prompting - Residue Extraction Benchmark
+
+Compares per-pattern signature scanning with the single-pass
+ResidueExtractor on synthetic catalogs of increasing size, checking that
+both find the same residue.
+
+Usage:
+    python tools/bench_residue.py --sizes 10 100 1000 10000 --text-kb 8
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from typing import Dict, List
+
+from recursive_prompting.residue.extractor import ResidueExtractor
+
+
+def make_catalog(rng: random.Random, size: int) -> Dict[str, List[str]]:
+    """Build a synthetic catalog of residue IDs with one to three signature terms each."""
+    catalog = {}
+    for index in range(size):
+        terms = []
+        for _ in range(rng.randint(1, 3)):
+            words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+                     for _ in range(rng.randint(1, 2))]
+            terms.append(" ".join(words))
+        catalog[f"RESIDUE-{index}"] = terms
+    return catalog
+
+
+def make_text(rng: random.Random, catalog: Dict[str, List[str]], size_chars: int, hits: int) -> str:
+    """Build filler text of roughly size_chars characters with some signatures planted."""
+    words = []
+    length = 0
+    while length < size_chars:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 10)))
+        words.append(word)
+        length += len(word) + 1
+
+    terms = [term for signature in catalog.values() for term in signature]
+    for _ in range(hits):
+        words.insert(rng.randrange(len(words)), rng.choice(terms).upper())
+    return " ".join(words)
+
+
+def scan_per_pattern(catalog: Dict[str, List[str]], prompt: str, response: str) -> List[str]:
+    """Reference implementation: test every signature of every pattern."""
+    prompt, response = prompt.lower(), response.lower()
+    return [
+        pattern_id for pattern_id, terms in catalog.items()
+        if any(term in prompt or term in response for term in terms)
+    ]
+
+
+def best_time(func, repeat: int) -> float:
+    """Return the best wall time of func in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main(argv: List[str] = None) -> int:
+    """Run the benchmark across catalog sizes."""
+    parser = argparse.ArgumentParser(description="Benchmark single-pass residue extraction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="Catalog sizes (number of residue patterns)")
+    parser.add_argument("--text-kb", type=int, default=8, help="Response size")
+    parser.add_argument("--hits", type=int, default=5, help="Signatures planted in the response")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+
+    for size in args.sizes:
+        catalog = make_catalog(rng, size)
+        prompt = make_text(rng, catalog, 400, 1)
+        response = make_text(rng, catalog, args.text_kb * 1024, args.hits)
+
+        start = time.perf_counter()
+        extractor = ResidueExtractor(catalog)
+        compile_ms = (time.perf_counter() - start) * 1000.0
+
+        expected = scan_per_pattern(catalog, prompt, response)
+        actual = extractor.extract_residue(prompt, response)
+        if actual != expected:
+            mismatches += 1
+            print(f"Mismatch at {size} patterns: {len(actual)} vs {len(expected)}", file=sys.stderr)
+
+        scan_ms = best_time(lambda: scan_per_pattern(catalog, prompt, response), args.repeat)
+        single_ms = best_time(lambda: extractor.extract_residue(prompt, response), args.repeat)
+        print(f"{size:6d} patterns: per-pattern {scan_ms:8.2f} ms, single-pass {single_ms:7.2f} ms "
+              f"({scan_ms / max(single_ms, 1e-9):5.1f}x), compile {compile_ms:7.1f} ms, "
+              f"{len(actual)} found")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Recursive Prompting - Import Time Budget
+
+Profiles module import cost with ``python -X importtime`` and checks it
+against a budget. Short-lived CLI jobs and forked workers pay this cost on
+every start, so shell modules should stay cheap to import.
+
+Usage:
+    python tools/import_budget.py recursive_prompting.shells.base \\
+        recursive_prompting.engine --budget-ms 150 --top 15
+"""
+
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import List, Tuple
+
+
+DEFAULT_MODULES = [
+    "recursive_prompting.shells.base",
+    "recursive_prompting.shells.foundation.coinflux_seed",
+    "recursive_prompting.engine",
+]
+
+
+@dataclass
+class ImportRecord:
+    """A single line of ``-X importtime`` output."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def profile_import(module: str) -> List[ImportRecord]:
+    """
+    Import a module in a fresh interpreter and collect its import timings.
+
+    Args:
+        module: Dotted name of the module to import
+
+    Returns:
+        Import records in the order the interpreter reported them
+
+    Raises:
+        RuntimeError: If the module cannot be imported
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip()}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append(ImportRecord(
+            module=name.strip(),
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=depth
+        ))
+    return records
+
+
+def check_budget(module: str, budget_ms: float, top: int) -> Tuple[bool, str]:
+    """
+    Profile a module and compare its cumulative import time to a budget.
+
+    Args:
+        module: Dotted name of the module to import
+        budget_ms: Allowed cumulative import time in milliseconds
+        top: Number of most expensive imports to include in the report
+
+    Returns:
+        A tuple of (within_budget, report)
+
+    Raises:
+        RuntimeError: If the module cannot be imported or reports no import time
+    """
+    records = profile_import(module)
+    target = next((r for r in records if r.module == module), None)
+    if target is None:
+        # Imported before the timed statement (e.g. at startup) or under
+        # another name, so its cost can't be measured
+        raise RuntimeError(f"No import time recorded for {module}")
+    total_ms = target.cumulative_us / 1000.0
+    within_budget = total_ms <= budget_ms
+
+    lines = [
+        f"{module}: {total_ms:.1f} ms cumulative "
+        f"(budget {budget_ms:.1f} ms) {'OK' if within_budget else 'OVER BUDGET'}"
+    ]
+    for record in sorted(records, key=lambda r: r.self_us, reverse=True)[:top]:
+        lines.append(
+            f"    {record.self_us / 1000.0:8.2f} ms self "
+            f"{record.cumulative_us / 1000.0:8.2f} ms cumulative  {record.module}"
+        )
+    return within_budget, "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    """Run the import-time report and return a process exit code."""
+    parser = argparse.ArgumentParser(description="Check module import time against a budget")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES,
+                        help="Modules to profile (default: core shell and engine modules)")
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="Allowed cumulative import time per module in milliseconds")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Number of most expensive imports to list per module")
+    args = parser.parse_args(argv)
+
+    all_within_budget = True
+    for module in args.modules:
+        try:
+            within_budget, report = check_budget(module, args.budget_ms, args.top)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+        print(report)
+        all_within_budget = all_within_budget and within_budget
+
+    return 0 if all_within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
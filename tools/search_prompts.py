@@ -0,0 +1,44 @@
+"""
+Recursive Prompting - Prompt Library Search
+
+Searches the markdown prompt library, building or incrementally updating
+its index.json first.
+
+Usage:
+    python tools/search_prompts.py "feedback loop amplification" --level AMPLIFICATION
+"""
+
+import argparse
+import sys
+import time
+from typing import List
+
+from recursive_prompting.library import LIBRARY_DIR, get_index
+
+
+def main(argv: List[str] = None) -> int:
+    """Run a library search and print the ranked entries."""
+    parser = argparse.ArgumentParser(description="Search the recursive prompt library")
+    parser.add_argument("query", help="Free-text query")
+    parser.add_argument("--level", help="Only show entries of this level (e.g. FOUNDATION)")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of results")
+    parser.add_argument("--root", default=LIBRARY_DIR, help="Prompt library directory")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = get_index(args.root)
+    loaded = time.perf_counter()
+    results = index.search(args.query, level=args.level, limit=args.limit)
+    searched = time.perf_counter()
+
+    for result in results:
+        level = result.entry.level or "-"
+        print(f"{result.score:7.3f}  [{level}] {result.entry.entry_id}  {result.entry.title}")
+    print(f"{len(results)} results from {len(index.documents)} entries "
+          f"(index {1000 * (loaded - start):.1f} ms, search {1000 * (searched - loaded):.2f} ms)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())